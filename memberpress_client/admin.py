@@ -1,5 +1,5 @@
 from django.contrib import admin
-from memberpress_client.models import MemberpressEventLog
+from memberpress_client.models import MemberpressEventLog, MemberStatus, UsernameIndex
 
 
 class MemberpressEventLogAdmin(admin.ModelAdmin):
@@ -23,3 +23,44 @@ class MemberpressEventLogAdmin(admin.ModelAdmin):
 
 
 admin.site.register(MemberpressEventLog, MemberpressEventLogAdmin)
+
+
+class MemberStatusAdmin(admin.ModelAdmin):
+    """
+    Local member status store
+    """
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    search_fields = ("username",)
+    list_display = (
+        "modified",
+        "user_id",
+        "username",
+        "is_active_subscription",
+        "is_trial_subscription",
+        "expires_at",
+    )
+
+
+admin.site.register(MemberStatus, MemberStatusAdmin)
+
+
+class UsernameIndexAdmin(admin.ModelAdmin):
+    """
+    username -> user id index
+    """
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    search_fields = ("username",)
+    list_display = (
+        "modified",
+        "username",
+        "user_id",
+    )
+
+
+admin.site.register(UsernameIndex, UsernameIndexAdmin)
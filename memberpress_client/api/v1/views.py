@@ -1,8 +1,10 @@
 import logging
+import time
 
 from rest_framework.views import APIView
 from django.http import HttpResponse
 
+from memberpress_client import member_status, metrics, username_index
 from memberpress_client.decorators import app_logger
 from memberpress_client.events import get_event
 from memberpress_client.models import MemberpressEventLog
@@ -14,6 +16,7 @@ logger = logging.getLogger(__name__)
 class EventView(APIView):
     @app_logger
     def post(self, request):
+        start = time.monotonic()
         data = request.POST
         method = request.REQUEST_METHOD
 
@@ -24,12 +27,37 @@ class EventView(APIView):
         except Exception:
             username = "missing"
 
+        try:
+            is_processed = event.update_cache()
+        except Exception:
+            # never fail the webhook because of the cache. the entry will expire on its own.
+            logger.exception("could not update the member cache for event {event}".format(event=event.event))
+            is_processed = False
+
+        if member_status.enabled():
+            try:
+                event.update_member_status()
+            except Exception:
+                # the row expires after MEMBERPRESS_MEMBER_STATUS_EXPIRATION
+                logger.exception("could not update the member status for event {event}".format(event=event.event))
+                is_processed = False
+
+        if username_index.enabled():
+            try:
+                event.update_username_index()
+            except Exception:
+                # usernames that are missing from the index are looked up with members?search=
+                logger.exception("could not update the username index for event {event}".format(event=event.event))
+                is_processed = False
+
         MemberpressEventLog(
             sender=request.REMOTE_HOST,
             username=username,
             event=event.event,
             event_type=event.event_type,
             is_valid=event.is_valid,
+            is_processed=is_processed,
             json=event.json,
         ).save()
+        metrics.webhook(event.event, is_processed, time.monotonic() - start)
         return HttpResponse(status=201)
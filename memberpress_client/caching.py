@@ -0,0 +1,407 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - cache helpers for MemberpressAPIClient.
+
+single-flight: when a cache entry is missing, exactly one caller per cache key,
+across all threads and worker processes sharing the Django cache, fetches it
+from the rest api. The caller holds a lease, created with the atomic cache.add(),
+that expires on its own if the caller dies. Everyone else polls the cache
+briefly for the result, and falls back to the last known good value.
+
+last known good values: an entry is kept in the Django cache for
+MEMBERPRESS_CACHE_STALE_EXPIRATION seconds, well past its own expiration. Once
+expired, or invalidated, it is a miss for regular reads, but its value is still
+there to fall back on, so there is only ever one copy of each response.
+
+stale-while-revalidate (opt-in): cache entries carry a soft expiration that is
+shorter than their hard, cache-enforced, expiration: MEMBERPRESS_CACHE_SOFT_EXPIRATION,
+but at most MEMBERPRESS_CACHE_SOFT_RATIO of the hard expiration, so that there
+is always a stale window. Between the two, callers are served the cached value
+immediately while a single background refresh brings the entry up to date.
+
+negative caching: empty search results, 404s and other non-member responses are
+cached in a separate namespace with a short MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION,
+so that repeated lookups of users who are not memberpress members stay local.
+
+local tier (opt-in): cache entries and negative entries are also kept for a few
+seconds in an in-process LRU cache, see local_cache.py.
+
+serialization: values are written to and read from the Django cache through
+codec.py, which can store them as compressed json or msgpack.
+
+expiration: entries expire after a randomly shortened, ie jittered, timeout so
+that entries cached together do not all expire together. Before that, each read
+may decide to refresh the entry early, in the background, with a probability
+that rises as the entry nears its expiration and with how long it took to fetch
+(XFetch, Vattani et al., "Optimal Probabilistic Cache Stampede Prevention").
+Expiration, jitter and beta, the eagerness of early refreshes, can be set per
+MemberPressAPI_Operations value with MEMBERPRESS_CACHE_POLICIES.
+
+expiry-aware expiration (opt-in): member dicts are cached until their next
+membership, subscription or transaction expiry, within the bounds of
+MEMBERPRESS_CACHE_MIN_EXPIRATION and MEMBERPRESS_CACHE_MAX_EXPIRATION.
+
+conditional requests: each entry stores the ETag and Last-Modified validators,
+and a digest of the body, of the response it came from. A refetch sends
+If-None-Match / If-Modified-Since, and a 304, or a body with the same digest,
+re-caches the last known good value as-is.
+"""
+# python stuff
+import asyncio
+import logging
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# django stuff
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+# our stuff
+from memberpress_client import codec, deadline, local_cache
+
+logger = logging.getLogger(__name__)
+
+LEASE_PREFIX = "MemberpressAPIClient.lease:"
+NEGATIVE_PREFIX = "MemberpressAPIClient.negative:"
+ENTRY_MARKER = "_memberpress_cache_entry"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def lease_timeout() -> int:
+    return getattr(settings, "MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT", 10)
+
+
+def wait_timeout() -> float:
+    return getattr(settings, "MEMBERPRESS_SINGLE_FLIGHT_WAIT", 2.0)
+
+
+def poll_interval() -> float:
+    return getattr(settings, "MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL", 0.05)
+
+
+def stale_expiration() -> int:
+    return getattr(settings, "MEMBERPRESS_CACHE_STALE_EXPIRATION", 60 * 60 * 24 * 7)
+
+
+def stale_while_revalidate() -> bool:
+    return getattr(settings, "MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE", False)
+
+
+def soft_expiration() -> int:
+    return getattr(settings, "MEMBERPRESS_CACHE_SOFT_EXPIRATION", settings.MEMBERPRESS_CACHE_EXPIRATION)
+
+
+def soft_ratio() -> float:
+    return getattr(settings, "MEMBERPRESS_CACHE_SOFT_RATIO", 0.5)
+
+
+def negative_expiration() -> int:
+    # 0 disables negative caching
+    return getattr(settings, "MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION", 60 * 5)
+
+
+def cache_policy(operation: str = "") -> dict:
+    """
+    expiration, jitter and beta of operation's cache entries.
+    MEMBERPRESS_CACHE_POLICIES = {MemberPressAPI_Operations.GET_MEMBER: {"expiration": 60 * 15, "beta": 2.0}}
+    """
+    retval = {
+        "expiration": settings.MEMBERPRESS_CACHE_EXPIRATION,
+        "jitter": getattr(settings, "MEMBERPRESS_CACHE_JITTER", 0.1),
+        # 0 disables early refreshes
+        "beta": getattr(settings, "MEMBERPRESS_CACHE_EARLY_REFRESH_BETA", 1.0),
+    }
+    retval.update(getattr(settings, "MEMBERPRESS_CACHE_POLICIES", {}).get(operation, {}))
+    return retval
+
+
+def conditional_get() -> bool:
+    return getattr(settings, "MEMBERPRESS_CONDITIONAL_GET", True)
+
+
+def expiry_aware() -> bool:
+    return getattr(settings, "MEMBERPRESS_CACHE_EXPIRY_AWARE", False)
+
+
+def min_expiration() -> int:
+    return getattr(settings, "MEMBERPRESS_CACHE_MIN_EXPIRATION", 60)
+
+
+def max_expiration() -> int:
+    return getattr(settings, "MEMBERPRESS_CACHE_MAX_EXPIRATION", 60 * 60 * 24 * 7)
+
+
+def jittered(timeout: int, jitter: float) -> int:
+    """
+    timeout, shortened by a random fraction of at most jitter.
+    """
+    if not timeout or not jitter:
+        return timeout
+    return max(1, int(timeout * (1 - random.uniform(0, jitter))))
+
+
+def refresh_hook():
+    """
+    optional callable(url, params, operation) that refreshes an entry elsewhere,
+    for example by queueing a celery task that calls MemberpressAPIClient().refresh().
+    """
+    hook = getattr(settings, "MEMBERPRESS_CACHE_REFRESH_HOOK", None)
+    return import_string(hook) if hook else None
+
+
+def make_entry(value, timeout: int, delta: float = 0, beta: float = 0, validators: dict = None) -> dict:
+    """
+    wrap value for the cache. The soft expiration only differs from
+    the hard expiration when stale-while-revalidate is enabled. delta
+    is the number of seconds that it took to fetch value, and validators
+    describe the http response that it came from.
+    """
+    now = time.time()
+    soft_timeout = timeout
+    if stale_while_revalidate():
+        # a soft expiration equal to the hard one would leave nothing to serve stale
+        soft_timeout = min(soft_expiration(), int(timeout * soft_ratio()))
+    return {
+        ENTRY_MARKER: 1,
+        "value": value,
+        "soft_expires_at": now + soft_timeout,
+        "expires_at": now + timeout,
+        "delta": delta,
+        "beta": beta,
+        "validators": validators or {},
+    }
+
+
+def unwrap(entry) -> tuple:
+    """
+    returns (value, is_soft_expired) for a cached entry, or (None, False) once
+    it has expired and is only kept as the last known good value. values cached
+    by earlier versions of this package are returned as-is and considered fresh.
+    """
+    if not is_entry(entry):
+        return entry, False
+    now = time.time()
+    if now >= entry.get("expires_at", math.inf):
+        return None, False
+    return entry.get("value"), now >= entry.get("soft_expires_at", 0)
+
+
+def is_entry(entry) -> bool:
+    return type(entry) == dict and ENTRY_MARKER in entry
+
+
+def shared_get(cache_key: str):
+    """
+    cache.get(cache_key), bypassing the local tier.
+    """
+    return codec.decode(cache.get(cache_key))
+
+
+def cache_get(cache_key: str):
+    """
+    cache.get(cache_key), served from the local tier when possible.
+    """
+    entry = local_cache.get(cache_key)
+    if entry is None:
+        entry = shared_fill(cache_key)
+    return entry
+
+
+def shared_fill(cache_key: str):
+    """
+    shared_get() that copies a hit into the local tier. for callers that have
+    already missed the local tier, so that the miss is only counted once.
+    """
+    entry = shared_get(cache_key)
+    if entry is not None and unwrap(entry)[0] is not None:
+        local_cache.set(cache_key, entry)
+    return entry
+
+
+def cache_set(cache_key: str, entry, timeout: int) -> None:
+    """
+    cache.set() that writes through to the local tier. entries, see make_entry(),
+    are kept for at least MEMBERPRESS_CACHE_STALE_EXPIRATION as last known good values.
+    """
+    cache.set(cache_key, codec.encode(entry), max(timeout, stale_expiration()) if is_entry(entry) else timeout)
+    local_cache.set(cache_key, entry, timeout)
+
+
+def cache_delete(cache_key: str) -> None:
+    cache.delete(cache_key)
+    local_cache.delete_many([cache_key])
+
+
+def refresh_early(entry) -> bool:
+    """
+    XFetch: True if this read should refresh entry ahead of its expiration.
+    """
+    if type(entry) != dict or not entry.get("beta") or not entry.get("delta") or "expires_at" not in entry:
+        return False
+    # 1 - random() is in (0, 1], so its log is finite
+    return time.time() - entry["delta"] * entry["beta"] * math.log(1 - random.random()) >= entry["expires_at"]
+
+
+def submit(func, *args):
+    """
+    run func(*args) on the shared background refresh thread pool.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "MEMBERPRESS_CACHE_REFRESH_WORKERS", 4),
+                    thread_name_prefix="memberpress-refresh",
+                )
+    return _executor.submit(func, *args)
+
+
+def acquire_lease(cache_key: str):
+    """
+    try to become the one caller that fetches cache_key.
+    returns a lease token on success, otherwise None.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(LEASE_PREFIX + cache_key, token, lease_timeout()):
+        return token
+    return None
+
+
+def release_lease(cache_key: str, token: str) -> None:
+    # only release our own lease. if ours expired and another caller took
+    # over then leave theirs alone.
+    if token and cache.get(LEASE_PREFIX + cache_key) == token:
+        cache.delete(LEASE_PREFIX + cache_key)
+
+
+def recheck(cache_key: str, resolve=None) -> tuple:
+    """
+    read the value, or the negative entry, that a lease holder stores for
+    cache_key. returns (found, value).
+
+    resolve is an optional callable that returns the key under which the value
+    will be stored, if that differs from cache_key. see keys.py
+    """
+    value, _ = unwrap(shared_get(resolve() if resolve else cache_key))
+    if value:
+        return True, value
+    negative = get_negative(cache_key)
+    if negative is not None:
+        return True, negative["value"]
+    return False, None
+
+
+async def async_recheck(cache_key: str, resolve=None) -> tuple:
+    """
+    recheck() for AsyncMemberpressAPIClient.
+    """
+    return await sync_to_async(recheck, thread_sensitive=False)(cache_key, resolve=resolve)
+
+
+def wait_for(cache_key: str, timeout: float = None, resolve=None) -> tuple:
+    """
+    poll the cache for the value being fetched by the lease holder.
+    returns (found, value). found is False if nothing arrives within timeout seconds.
+    """
+    timeout = deadline.clip(wait_timeout() if timeout is None else timeout)
+    wait_until = time.monotonic() + timeout
+    while True:
+        found, value = recheck(cache_key, resolve=resolve)
+        if found:
+            return True, value
+        if time.monotonic() >= wait_until:
+            return False, None
+        time.sleep(poll_interval())
+
+
+async def async_wait_for(cache_key: str, timeout: float = None, resolve=None) -> tuple:
+    """
+    wait_for() for AsyncMemberpressAPIClient. sleeps without blocking the event loop.
+    """
+    timeout = deadline.clip(wait_timeout() if timeout is None else timeout)
+    wait_until = time.monotonic() + timeout
+    while True:
+        found, value = await async_recheck(cache_key, resolve=resolve)
+        if found:
+            return True, value
+        if time.monotonic() >= wait_until:
+            return False, None
+        await asyncio.sleep(poll_interval())
+
+
+def get_stale(cache_key: str):
+    """
+    the last known good value of cache_key, expired or not. it is kept for
+    MEMBERPRESS_CACHE_STALE_EXPIRATION.
+    """
+    value, _ = get_validated(cache_key)
+    return value
+
+
+def get_validated(cache_key: str) -> tuple:
+    """
+    returns (value, validators): the last known good value of cache_key and the
+    {"etag", "last_modified", "digest"} of the response that it came from.
+    validators is {} for values that did not come straight from the rest api.
+    """
+    entry = shared_get(cache_key)
+    if is_entry(entry):
+        return entry.get("value"), entry.get("validators") or {}
+    return entry, {}
+
+
+def invalidate(cache_key: str) -> None:
+    """
+    expire the cache entry and drop any negative entry for cache_key. The
+    expired entry is kept as the last known good fallback.
+    """
+    entry = shared_get(cache_key)
+    if is_entry(entry):
+        expired = dict(entry, soft_expires_at=0, expires_at=0)
+        cache.set(cache_key, codec.encode(expired), stale_expiration())
+        cache.delete(NEGATIVE_PREFIX + cache_key)
+    else:
+        cache.delete_many([cache_key, NEGATIVE_PREFIX + cache_key])
+    local_cache.delete_many([cache_key, NEGATIVE_PREFIX + cache_key])
+
+
+def is_negative(value) -> bool:
+    """
+    True for responses that do not describe anything: None, empty lists and
+    dicts, and anything that is neither a dict nor a list.
+    """
+    return not value or type(value) not in (dict, list)
+
+
+def get_negative(cache_key: str):
+    """
+    returns {"value": <cached negative response>}, or None if there is no negative entry.
+    """
+    return cache_get(NEGATIVE_PREFIX + cache_key)
+
+
+def set_negative(cache_key: str, value) -> None:
+    cache_set(NEGATIVE_PREFIX + cache_key, {"value": value}, jittered(negative_expiration(), cache_policy()["jitter"]))
+
+
+def _reset_after_fork() -> None:
+    # worker threads do not survive a fork. let the child create its own pool.
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,222 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - circuit breaker.
+
+One breaker per memberpress host, shared by all threads and worker processes
+through the Django cache.
+
+closed: calls go through. Failures, ie transport errors, 429s, 5xx and calls
+slower than MEMBERPRESS_CIRCUIT_SLOW_CALL seconds, are counted over a window
+of MEMBERPRESS_CIRCUIT_FAILURE_WINDOW seconds. Reaching
+MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD opens the breaker.
+
+open: calls fail immediately with CircuitOpenError for
+MEMBERPRESS_CIRCUIT_OPEN_DURATION seconds. MemberpressAPIClient.get() serves
+the last known good value instead, where it has one.
+
+half-open: once the open period ends, exactly one probe call is let through.
+Success closes the breaker, failure opens it again. Any other outcome, such as
+a 404, lets the next call probe.
+"""
+# python stuff
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from requests.exceptions import HTTPError, RequestException
+
+# django stuff
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+# our stuff
+from memberpress_client.exceptions import CircuitOpenError
+from memberpress_client.session import httpx, session_key
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_PREFIX = "MemberpressAPIClient.circuit:"
+
+
+def enabled() -> bool:
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_BREAKER", True)
+
+
+def failure_threshold() -> int:
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD", 5)
+
+
+def failure_window() -> int:
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_FAILURE_WINDOW", 60)
+
+
+def slow_call() -> float:
+    # 0 disables the latency threshold
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_SLOW_CALL", 5.0)
+
+
+def open_duration() -> int:
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_OPEN_DURATION", 30)
+
+
+def open_policy() -> str:
+    # "fail-closed": paywall everyone. "fail-open", opt-in: no paywall while memberpress is unavailable.
+    return getattr(settings, "MEMBERPRESS_CIRCUIT_OPEN_POLICY", "fail-closed")
+
+
+def keys(url: str) -> dict:
+    host = session_key(url or settings.MEMBERPRESS_API_BASE_URL)
+    return {
+        name: "{prefix}{host}:{name}".format(prefix=CIRCUIT_PREFIX, host=host, name=name)
+        for name in ("failures", "open", "tripped", "probe")
+    }
+
+
+def state(url: str = None) -> str:
+    """
+    "closed", "open" or "half-open"
+    """
+    k = keys(url)
+    values = cache.get_many([k["open"], k["tripped"]])
+    if k["open"] in values:
+        return "open"
+    if k["tripped"] in values:
+        return "half-open"
+    return "closed"
+
+
+def admit(url: str) -> tuple:
+    """
+    (allowed, probe). probe is True when the call is the half-open probe.
+    """
+    current = state(url)
+    if current == "closed":
+        return True, False
+    if current == "half-open":
+        # one probe at a time, across all processes
+        probe = cache.add(keys(url)["probe"], 1, open_duration())
+        return probe, probe
+    return False, False
+
+
+def allow_request(url: str) -> bool:
+    if not enabled():
+        return True
+    return admit(url)[0]
+
+
+def release_probe(url: str) -> None:
+    cache.delete(keys(url)["probe"])
+
+
+def trip(url: str) -> None:
+    k = keys(url)
+    cache.set(k["open"], 1, open_duration())
+    # remembers that the breaker is not closed once the open period ends
+    cache.set(k["tripped"], 1, None)
+    cache.delete_many([k["failures"], k["probe"]])
+    logger.error(
+        "circuit breaker for {host} opened for {seconds} seconds.".format(
+            host=session_key(url), seconds=open_duration()
+        )
+    )
+
+
+def reset(url: str = None) -> None:
+    k = keys(url)
+    cache.delete_many(list(k.values()))
+
+
+def record_failure(url: str) -> None:
+    k = keys(url)
+    if state(url) == "half-open":
+        trip(url)
+        return
+
+    cache.add(k["failures"], 0, failure_window())
+    try:
+        failures = cache.incr(k["failures"])
+    except ValueError:
+        # the window expired between add() and incr()
+        cache.set(k["failures"], 1, failure_window())
+        failures = 1
+    if failures >= failure_threshold():
+        trip(url)
+
+
+def record_success(url: str, elapsed: float) -> None:
+    if slow_call() and elapsed > slow_call():
+        logger.warning("memberpress call took {elapsed:.2f} seconds.".format(elapsed=elapsed))
+        record_failure(url)
+        return
+
+    if state(url) == "half-open":
+        reset(url)
+        logger.info("circuit breaker for {host} closed.".format(host=session_key(url)))
+
+
+def is_failure(e: Exception) -> bool:
+    """
+    transport errors, throttling and server errors count against the breaker.
+    other client errors, like a 404 for a non-member, do not.
+    """
+    if isinstance(e, HTTPError):
+        return e.response is None or e.response.status_code == 429 or e.response.status_code >= 500
+    if httpx is not None and isinstance(e, httpx.TransportError):
+        return True
+    return isinstance(e, RequestException)
+
+
+@contextmanager
+def guard(url: str):
+    """
+    wrap one http call, including its raise_for_status().
+    """
+    if not enabled():
+        yield
+        return
+
+    allowed, probe = admit(url)
+    if not allowed:
+        raise CircuitOpenError("the circuit breaker for {host} is open.".format(host=session_key(url)))
+
+    start = time.monotonic()
+    try:
+        yield
+    except BaseException as e:
+        if is_failure(e):
+            record_failure(url)
+        elif probe:
+            # neither a success nor a failure. the next call probes again.
+            release_probe(url)
+        raise
+    record_success(url, time.monotonic() - start)
+
+
+@asynccontextmanager
+async def async_guard(url: str):
+    """
+    guard() for AsyncMemberpressAPIClient. cache calls run in a worker thread.
+    """
+    if not enabled():
+        yield
+        return
+
+    allowed, probe = await sync_to_async(admit, thread_sensitive=False)(url)
+    if not allowed:
+        raise CircuitOpenError("the circuit breaker for {host} is open.".format(host=session_key(url)))
+
+    start = time.monotonic()
+    try:
+        yield
+    except BaseException as e:
+        if is_failure(e):
+            await sync_to_async(record_failure, thread_sensitive=False)(url)
+        elif probe:
+            # neither a success nor a failure, including a cancelled call. the next call probes again.
+            await sync_to_async(release_probe, thread_sensitive=False)(url)
+        raise
+    await sync_to_async(record_success, thread_sensitive=False)(url, time.monotonic() - start)
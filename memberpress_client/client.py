@@ -6,21 +6,60 @@ memberpress REST API Client plugin for Django - rest api client implementation.
 This is the base class for memberpress Classes.
 """
 # Python stuff
+import asyncio
+import functools
+import hashlib
 import logging
-import inspect
 import json
+import time
+from datetime import datetime
 import urllib3
 from urllib.parse import urljoin
 import requests
+from requests.exceptions import HTTPError
 
 # Django stuff
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.cache import cache
 
 # our stuff
+from memberpress_client import caching, circuit_breaker, codec, deadline, keys, local_cache, metrics, ratelimit
+from memberpress_client.exceptions import MemberpressUpstreamUnavailable
 from memberpress_client.memberpress import Memberpress
 from memberpress_client.utils import log_pretrip, log_postrip
 from memberpress_client.decorators import request_manager
+from memberpress_client.retry import TRANSPORT_ERRORS
+from memberpress_client.caching import (
+    NEGATIVE_PREFIX,
+    acquire_lease,
+    async_recheck,
+    async_wait_for,
+    cache_delete,
+    cache_get,
+    cache_policy,
+    conditional_get,
+    expiry_aware,
+    get_negative,
+    get_stale,
+    get_validated,
+    is_negative,
+    jittered,
+    make_entry,
+    max_expiration,
+    min_expiration,
+    negative_expiration,
+    recheck,
+    refresh_early,
+    refresh_hook,
+    release_lease,
+    set_negative,
+    shared_fill,
+    stale_while_revalidate,
+    submit,
+    unwrap,
+    wait_for,
+)
+from memberpress_client.session import get_async_session, get_session, httpx
 
 # disable the following warnings:
 # -------------------------------
@@ -31,13 +70,22 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
+# what get() may fall back to the last known good value for. see fallback()
+UPSTREAM_ERRORS = TRANSPORT_ERRORS + (MemberpressUpstreamUnavailable,)
+
 
 class MemberpressAPIClient(Memberpress):
     def init(self):
         super().init()
 
-    def get_url(self, path) -> str:
-        return urljoin(settings.MEMBERPRESS_API_BASE_URL, path)
+    def get_url(self, path, host=None) -> str:
+        return urljoin(host or settings.MEMBERPRESS_API_BASE_URL, path)
+
+    def get_session(self, host=None) -> requests.Session:
+        """
+        the process-wide pooled session for host. shared by all client instances.
+        """
+        return get_session(host or settings.MEMBERPRESS_API_BASE_URL)
 
     @property
     def headers(self) -> dict:
@@ -48,10 +96,15 @@ class MemberpressAPIClient(Memberpress):
     @request_manager
     def post(self, path, data=None, host=None, operation="") -> json:
         url = self.get_url(path, host=host)
-        log_pretrip(caller=inspect.currentframe().f_code.co_name, url=url, data=data, operation=operation)
-        response = requests.post(url, data=data, headers=self.headers)
-        log_postrip(caller=inspect.currentframe().f_code.co_name, path=url, response=response, operation=operation)
-        response.raise_for_status()
+        log_pretrip(caller="post", url=url, data=data, operation=operation)
+        ratelimit.acquire(url)
+        with circuit_breaker.guard(url), deadline.enforce(), metrics.upstream("post", operation) as call:
+            response = self.get_session(host).post(
+                url, data=data, headers=self.headers, timeout=deadline.timeouts(operation)
+            )
+            call.status_code = response.status_code
+            log_postrip(caller="post", path=url, response=response, operation=operation)
+            response.raise_for_status()
         return response.json()
 
     @request_manager
@@ -60,10 +113,15 @@ class MemberpressAPIClient(Memberpress):
         if not headers:
             headers = self.headers
 
-        log_pretrip(caller=inspect.currentframe().f_code.co_name, url=url, data=data, operation=operation)
-        response = requests.patch(url, json=data, headers=headers)
-        log_postrip(caller=inspect.currentframe().f_code.co_name, path=url, response=response, operation=operation)
-        response.raise_for_status()
+        log_pretrip(caller="patch", url=url, data=data, operation=operation)
+        ratelimit.acquire(url)
+        with circuit_breaker.guard(url), deadline.enforce(), metrics.upstream("patch", operation) as call:
+            response = self.get_session(host).patch(
+                url, json=data, headers=headers, timeout=deadline.timeouts(operation)
+            )
+            call.status_code = response.status_code
+            log_postrip(caller="patch", path=url, response=response, operation=operation)
+            response.raise_for_status()
         if json:
             return response.json()
         return response
@@ -73,36 +131,321 @@ class MemberpressAPIClient(Memberpress):
         url = self.get_url(path)
         response = None
         if enable_caching:
-            cache_key_params = json.dumps(params, sort_keys=True, separators=(',', ':'))
-            cache_key = f"MemberpressAPIClient.get:{url}:{cache_key_params}"
-            response = cache.get(cache_key)
+            cache_key, found, response = self.cached(url, params, operation)
+            if found:
+                return response
 
         if not response and not self.locked:
-            # set a lock to prevent multiple calls
+            # set a lock to prevent re-entrant calls from this instance.
             self.lock()
+            token = None
+            try:
+                if enable_caching:
+                    token, found, response = self.lease(cache_key, url, params)
+                    if found:
+                        return keys.reshape(url, params, response)
+
+                try:
+                    start = time.monotonic()
+                    response, validators = self.conditional_fetch(
+                        url, params=params, operation=operation, cache_key=cache_key if enable_caching else None
+                    )
+                except UPSTREAM_ERRORS as e:
+                    if enable_caching and self.is_negative_error(e):
+                        set_negative(cache_key, None)
+                        return None
+                    response = self.fallback(e, cache_key, url, params) if enable_caching else None
+                    if response:
+                        return response
+                    raise
+
+                # caching results iff response is a valid json object.
+                if enable_caching:
+                    self.store(
+                        cache_key,
+                        url,
+                        params,
+                        response,
+                        operation=operation,
+                        delta=time.monotonic() - start,
+                        validators=validators,
+                    )
+            finally:
+                if token:
+                    release_lease(cache_key, token)
+                self.unlock()
+        return response
+
+    def cached(self, url, params=None, operation="") -> tuple:
+        """
+        look url up in the cache. returns (cache_key, found, response). found is
+        True for cache hits, including negative entries. soft-expired hits, and
+        hits that are due for an early refresh, are refreshed in the background.
+        """
+        cache_key = self.cache_key(url, params)
+        entry = cache_get(cache_key)
+        response, is_stale = unwrap(entry)
+        response = keys.reshape(url, params, response)
+        if response:
+            metrics.cache_result(operation, "stale" if is_stale else "hit")
+            if (is_stale and stale_while_revalidate()) or refresh_early(entry):
+                # serve the cached value now and refresh it in the background.
+                self.revalidate(cache_key, url, params=params, operation=operation)
+            return cache_key, True, response
 
-            # purge whatever might have previously existing in the cache, in case our
-            # response object raises an exception here ...
-            if enable_caching:
-                cache.delete(cache_key)
+        negative = get_negative(cache_key)
+        if negative is not None:
+            metrics.cache_result(operation, "negative")
+            return cache_key, True, negative["value"]
+        metrics.cache_result(operation, "miss")
+        return cache_key, False, None
 
-            log_pretrip(caller=inspect.currentframe().f_code.co_name, url=url, data={}, operation=operation)
-            response = requests.get(url, params=params, headers=self.headers, verify=False)
-            log_postrip(caller=inspect.currentframe().f_code.co_name, path=url, response=response, operation=operation)
+    def lease(self, cache_key, url, params) -> tuple:
+        """
+        single-flight: only the lease holder, in any process, calls the rest api.
+        everyone else waits briefly for its result or serves the last known good value.
+
+        returns (token, found, response). token is the lease, if we hold it. found
+        is True if response, a cached value, should be returned instead of calling
+        the rest api.
+        """
+        resolve = functools.partial(self.cache_key, url, params)
+        token = acquire_lease(cache_key)
+        if token:
+            # the previous lease holder may have stored its value since our cache miss
+            found, response = recheck(cache_key, resolve=resolve)
+            return token, found, response
+
+        found, response = wait_for(cache_key, resolve=resolve)
+        if not found:
+            response = get_stale(cache_key)
+            found = bool(response)
+        return None, found, response
+
+    def fallback(self, e, cache_key, url, params):
+        """
+        the last known good value of cache_key to serve instead of raising e,
+        if e means that memberpress is unavailable or failing. otherwise None.
+        the failure was already counted by the circuit breaker, so rather than
+        retrying while a paywall check waits, the fallback is served at once.
+        """
+        if not isinstance(e, MemberpressUpstreamUnavailable) and not circuit_breaker.is_failure(e):
+            return None
+        response = get_stale(cache_key)
+        if not response:
+            return None
+        logger.warning("memberpress is unavailable. serving the last known good {url}".format(url=url))
+        return keys.reshape(url, params, response)
+
+    def fetch(self, url, params=None, operation="") -> json:
+        """
+        call the rest api, bypassing the cache.
+        """
+        return self.decode(self.fetch_response(url, params=params, operation=operation))
+
+    def fetch_response(self, url, params=None, operation="", headers=None):
+        log_pretrip(caller="get", url=url, data={}, operation=operation)
+        ratelimit.acquire(url)
+        with circuit_breaker.guard(url), deadline.enforce(), metrics.upstream("get", operation) as call:
+            response = self.get_session().get(
+                url,
+                params=params,
+                headers=headers or self.headers,
+                verify=False,
+                timeout=deadline.timeouts(operation),
+            )
+            call.status_code = response.status_code
+            log_postrip(caller="get", path=url, response=response, operation=operation)
 
             # @request_manager will create verbose log entries for any responses outside of 200-299.
             response.raise_for_status()
+        return response
 
-            if type(response) not in [dict, list]:
-                try:
-                    response = response.json()
-                except Exception:
-                    response = json.dumps(response)
-
-            # caching results iff response is a valid json object.
-            if enable_caching:
-                cache.set(cache_key, response, settings.MEMBERPRESS_CACHE_EXPIRATION)
-            self.unlock()
+    def conditional_fetch(self, url, params=None, operation="", cache_key=None) -> tuple:
+        """
+        call the rest api, revalidating the last known good value of cache_key
+        if there is one. returns (response, validators). response is the last
+        known good value itself when memberpress reports it as unchanged.
+        """
+        stale, validators = None, {}
+        if cache_key and conditional_get():
+            stale, validators = get_validated(cache_key)
+        response = self.fetch_response(
+            url, params=params, operation=operation, headers=self.conditional_headers(stale, validators)
+        )
+        return self.read_response(url, params, response, stale, validators)
+
+    def conditional_headers(self, stale, validators: dict) -> dict:
+        headers = dict(self.headers)
+        if stale is None:
+            return headers
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def read_response(self, url, params, response, stale, validators: dict) -> tuple:
+        """
+        returns (response, validators) for the http response of conditional_fetch().
+        an unchanged response is neither decoded nor re-validated.
+        """
+        if not conditional_get():
+            return self.decode(response), None
+        if stale is not None and response.status_code == 304:
+            logger.debug("{url} is not modified. keeping the cached response.".format(url=url))
+            return keys.reshape(url, params, stale), validators
+
+        fresh = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            # for servers that send neither validator
+            "digest": hashlib.blake2b(response.content, digest_size=16).hexdigest(),
+        }
+        if stale is not None and fresh["digest"] == validators.get("digest"):
+            logger.debug("{url} is unchanged. keeping the cached response.".format(url=url))
+            return keys.reshape(url, params, stale), fresh
+        return self.decode(response), fresh
+
+    def refresh(self, url, params=None, operation="") -> json:
+        """
+        fetch url from the rest api and replace its cache entry. This is what
+        stale-while-revalidate runs in the background, and what a
+        MEMBERPRESS_CACHE_REFRESH_HOOK task should call.
+        """
+        start = time.monotonic()
+        cache_key = self.cache_key(url, params)
+        response, validators = self.conditional_fetch(url, params=params, operation=operation, cache_key=cache_key)
+        self.store(
+            cache_key,
+            url,
+            params,
+            response,
+            operation=operation,
+            delta=time.monotonic() - start,
+            validators=validators,
+        )
+        return response
+
+    def revalidate(self, cache_key, url, params=None, operation="") -> None:
+        """
+        schedule a background refresh of a soft-expired cache entry, unless
+        another caller in any process is already refreshing it.
+        """
+        token = acquire_lease(cache_key)
+        if not token:
+            return
+
+        hook = refresh_hook()
+        if hook:
+            # the lease is left to expire on its own, which also throttles how often
+            # the hook can be asked to refresh the same entry.
+            hook(url=url, params=params, operation=operation)
+            return
+
+        submit(self._revalidate, cache_key, token, url, params, operation)
+
+    def _revalidate(self, cache_key, token, url, params, operation) -> None:
+        try:
+            with ratelimit.memberpress_priority(ratelimit.BATCH):
+                self.refresh(url, params=params, operation=operation)
+        except Exception:
+            logger.exception("background refresh of {url} failed.".format(url=url))
+        finally:
+            release_lease(cache_key, token)
+
+    def cache_key(self, url, params=None) -> str:
+        """
+        members/{id}, and members?search={username} once the username's user id
+        is known, share the member's canonical key. see keys.py
+        """
+        kind, value = keys.member_lookup(url, params)
+        if kind == "username":
+            value = keys.get_alias(value)
+            kind = "user_id" if value else None
+        if kind == "user_id":
+            return keys.member_key(value)
+        return keys.url_key(url, params)
+
+    def store(self, cache_key, url, params, response, operation="", delta=0, validators=None) -> None:
+        """
+        cache a fresh response. a search result that holds the searched member
+        is cached as that member, under its canonical key.
+        """
+        member = keys.searched_member(url, params, response)
+        if member:
+            self.cache_set(
+                keys.member_key(member["id"]), member, operation=operation, delta=delta, validators=validators
+            )
+            cache_delete(NEGATIVE_PREFIX + cache_key)
+            return
+        self.cache_set(cache_key, response, operation=operation, delta=delta, validators=validators)
+
+    def cache_set(self, cache_key, response, operation="", delta=0, validators=None) -> None:
+        """
+        cache response according to operation's cache policy. delta is the
+        number of seconds that it took to fetch it, and validators describe
+        the http response that it came from, see conditional_fetch().
+        """
+        if is_negative(response) and negative_expiration():
+            set_negative(cache_key, response)
+            return
+
+        response = codec.project(response)
+        if codec.is_member_dict(response):
+            keys.set_alias(response["username"], response["id"])
+        policy = cache_policy(operation)
+        timeout = policy["expiration"]
+        if codec.is_member_dict(response) and expiry_aware():
+            timeout = self.entitlement_timeout(response)
+        timeout = jittered(timeout, policy["jitter"])
+        entry = make_entry(response, timeout, delta=delta, beta=policy["beta"], validators=validators)
+        caching.cache_set(cache_key, entry, timeout)
+        cache_delete(NEGATIVE_PREFIX + cache_key)
+
+    def entitlement_timeout(self, member: dict) -> int:
+        """
+        seconds until the soonest upcoming expiration of the member's active
+        memberships, subscriptions and transactions, ie until its paywall status
+        can next change, bounded by MEMBERPRESS_CACHE_MIN_EXPIRATION and
+        MEMBERPRESS_CACHE_MAX_EXPIRATION.
+        """
+        dates = [membership.get("expire_fixed") for membership in member.get("active_memberships") or []]
+        dates += [subscription.get("expires_at") for subscription in member.get("recent_subscriptions") or []]
+        dates += [transaction.get("expires_at") for transaction in member.get("recent_transactions") or []]
+        if type(member.get("latest_txn")) == dict:
+            dates.append(member["latest_txn"].get("expires_at"))
+
+        now = datetime.now()
+        # "0000-00-00 00:00:00" means never
+        dates = [self.str2datetime(date) for date in dates if date and not str(date).startswith("0000")]
+        upcoming = [date for date in dates if date and date > now]
+        if not upcoming:
+            return max_expiration()
+        # re-check just after the soonest expiration
+        timeout = int((min(upcoming) - now).total_seconds()) + 1
+        return min(max(timeout, min_expiration()), max_expiration())
+
+    def is_negative_error(self, e: HTTPError) -> bool:
+        """
+        a 404 means that the member does not exist, which we cache like an empty result.
+        """
+        return (
+            bool(negative_expiration())
+            and isinstance(e, HTTPError)
+            and e.response is not None
+            and e.response.status_code == 404
+        )
+
+    def decode(self, response):
+        """
+        convert an http response object into the json dict/list that we cache.
+        """
+        if type(response) not in [dict, list]:
+            try:
+                response = response.json()
+            except Exception:
+                response = json.dumps(response)
         return response
 
     def is_valid_dict(self, response, qc_keys) -> bool:
@@ -114,3 +457,205 @@ class MemberpressAPIClient(Memberpress):
             )
             return False
         return all(key in response for key in qc_keys)
+
+
+class AsyncMemberpressAPIClient(MemberpressAPIClient):
+    """
+    asyncio counterpart of MemberpressAPIClient. get(), post() and patch() are
+    coroutines that share the same urls, headers, cache keys, logging and error
+    handling as the blocking client, so that many member lookups can overlap
+    on one event loop.
+
+    http calls use a pooled httpx.AsyncClient when httpx is installed. Otherwise
+    the blocking pooled session runs in the event loop's default executor.
+    Django 3.x cache backends are synchronous, so cache calls are
+    delegated to a worker thread with asgiref's sync_to_async.
+    """
+
+    async def request(self, verb: str, url: str, host=None, verify=True, timeout=None, **kwargs):
+        """
+        timeout is a requests style (connect, read) tuple.
+        """
+        session = get_async_session(host or settings.MEMBERPRESS_API_BASE_URL, verify=verify)
+        if session is not None:
+            if timeout:
+                connect, read = timeout
+                kwargs["timeout"] = httpx.Timeout(read, connect=connect)
+            return await session.request(verb, url, **kwargs)
+
+        kwargs["timeout"] = timeout
+
+        loop = asyncio.get_running_loop()
+        func = functools.partial(self.get_session(host).request, verb, url, verify=verify, **kwargs)
+        return await loop.run_in_executor(None, func)
+
+    @request_manager
+    async def post(self, path, data=None, host=None, operation="") -> json:
+        url = self.get_url(path, host=host)
+        log_pretrip(caller="post", url=url, data=data, operation=operation)
+        await ratelimit.async_acquire(url)
+        async with circuit_breaker.async_guard(url):
+            with deadline.enforce(), metrics.upstream("post", operation) as call:
+                response = await self.request(
+                    "POST", url, host=host, data=data, headers=self.headers, timeout=deadline.timeouts(operation)
+                )
+                call.status_code = response.status_code
+            log_postrip(caller="post", path=url, response=response, operation=operation)
+            raise_for_status(response)
+        return response.json()
+
+    @request_manager
+    async def patch(self, path, data=None, host=None, headers=None, json=True, operation=""):
+        url = self.get_url(path, host=host)
+        if not headers:
+            headers = self.headers
+
+        log_pretrip(caller="patch", url=url, data=data, operation=operation)
+        await ratelimit.async_acquire(url)
+        async with circuit_breaker.async_guard(url):
+            with deadline.enforce(), metrics.upstream("patch", operation) as call:
+                response = await self.request(
+                    "PATCH", url, host=host, json=data, headers=headers, timeout=deadline.timeouts(operation)
+                )
+                call.status_code = response.status_code
+            log_postrip(caller="patch", path=url, response=response, operation=operation)
+            raise_for_status(response)
+        if json:
+            return response.json()
+        return response
+
+    @request_manager
+    async def get(self, path, params=None, operation="", enable_caching=True) -> json:
+        url = self.get_url(path)
+        response = None
+        if enable_caching:
+            cache_key, found, response = await self.cached(url, params, operation)
+            if found:
+                return response
+
+        if not response and not self.locked:
+            self.lock()
+            token = None
+            try:
+                if enable_caching:
+                    token, found, response = await self.lease(cache_key, url, params)
+                    if found:
+                        return keys.reshape(url, params, response)
+
+                try:
+                    start = time.monotonic()
+                    response, validators = await self.conditional_fetch(
+                        url, params=params, operation=operation, cache_key=cache_key if enable_caching else None
+                    )
+                except UPSTREAM_ERRORS as e:
+                    if enable_caching and self.is_negative_error(e):
+                        await sync_to_async(set_negative, thread_sensitive=False)(cache_key, None)
+                        return None
+                    response = None
+                    if enable_caching:
+                        response = await sync_to_async(self.fallback, thread_sensitive=False)(e, cache_key, url, params)
+                    if response:
+                        return response
+                    raise
+
+                if enable_caching:
+                    await sync_to_async(self.store, thread_sensitive=False)(
+                        cache_key,
+                        url,
+                        params,
+                        response,
+                        operation=operation,
+                        delta=time.monotonic() - start,
+                        validators=validators,
+                    )
+            finally:
+                if token:
+                    await sync_to_async(release_lease, thread_sensitive=False)(cache_key, token)
+                self.unlock()
+        return response
+
+    async def cached(self, url, params=None, operation="") -> tuple:
+        cache_key = await sync_to_async(self.cache_key, thread_sensitive=False)(url, params)
+        # a local tier hit needs no worker thread
+        entry = local_cache.get(cache_key)
+        if entry is None:
+            entry = await sync_to_async(shared_fill, thread_sensitive=False)(cache_key)
+        response, is_stale = unwrap(entry)
+        response = keys.reshape(url, params, response)
+        if response:
+            metrics.cache_result(operation, "stale" if is_stale else "hit")
+            if (is_stale and stale_while_revalidate()) or refresh_early(entry):
+                # the refresh itself runs on the shared background thread pool, using the blocking client.
+                await sync_to_async(MemberpressAPIClient().revalidate, thread_sensitive=False)(
+                    cache_key, url, params=params, operation=operation
+                )
+            return cache_key, True, response
+
+        negative = await sync_to_async(get_negative, thread_sensitive=False)(cache_key)
+        if negative is not None:
+            metrics.cache_result(operation, "negative")
+            return cache_key, True, negative["value"]
+        metrics.cache_result(operation, "miss")
+        return cache_key, False, None
+
+    async def lease(self, cache_key, url, params) -> tuple:
+        resolve = functools.partial(self.cache_key, url, params)
+        token = await sync_to_async(acquire_lease, thread_sensitive=False)(cache_key)
+        if token:
+            # the previous lease holder may have stored its value since our cache miss
+            found, response = await async_recheck(cache_key, resolve=resolve)
+            return token, found, response
+
+        found, response = await async_wait_for(cache_key, resolve=resolve)
+        if not found:
+            response = await sync_to_async(get_stale, thread_sensitive=False)(cache_key)
+            found = bool(response)
+        return None, found, response
+
+    async def fetch(self, url, params=None, operation="") -> json:
+        return self.decode(await self.fetch_response(url, params=params, operation=operation))
+
+    async def fetch_response(self, url, params=None, operation="", headers=None):
+        log_pretrip(caller="get", url=url, data={}, operation=operation)
+        await ratelimit.async_acquire(url)
+        async with circuit_breaker.async_guard(url):
+            with deadline.enforce(), metrics.upstream("get", operation) as call:
+                response = await self.request(
+                    "GET",
+                    url,
+                    verify=False,
+                    params=params,
+                    headers=headers or self.headers,
+                    timeout=deadline.timeouts(operation),
+                )
+                call.status_code = response.status_code
+            log_postrip(caller="get", path=url, response=response, operation=operation)
+            raise_for_status(response)
+        return response
+
+    async def conditional_fetch(self, url, params=None, operation="", cache_key=None) -> tuple:
+        stale, validators = None, {}
+        if cache_key and conditional_get():
+            stale, validators = await sync_to_async(get_validated, thread_sensitive=False)(cache_key)
+        response = await self.fetch_response(
+            url, params=params, operation=operation, headers=self.conditional_headers(stale, validators)
+        )
+        return self.read_response(url, params, response, stale, validators)
+
+
+def raise_for_status(response) -> None:
+    """
+    requests.Response.raise_for_status() for either a requests or an httpx response.
+    httpx errors are re-raised as requests.HTTPError so that @request_manager
+    handles both transports identically.
+    """
+    if httpx is not None and isinstance(response, httpx.Response):
+        if response.is_error:
+            raise requests.HTTPError(
+                "{status_code} Error: {reason} for url: {url}".format(
+                    status_code=response.status_code, reason=response.reason_phrase, url=response.url
+                ),
+                response=response,
+            )
+        return
+    response.raise_for_status()
@@ -0,0 +1,164 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - cache serialization.
+
+By default rest api responses are stored in the Django cache as-is, and the
+cache backend pickles them. MEMBERPRESS_CACHE_CODEC = "json" or "msgpack"
+stores them as a compact versioned envelope instead:
+
+    {"_memberpress_codec": 1, "codec": "json", "compression": "zlib", "data": b"..."}
+
+data is compressed with MEMBERPRESS_CACHE_COMPRESSION ("zlib", "lz4" or None)
+when it is at least MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES long. The envelope
+names its own codec and compression, so entries written with other settings,
+and plain entries written by earlier versions of this package, stay readable.
+Entries that cannot be decoded are treated as cache misses.
+
+MEMBERPRESS_CACHE_CODEC may also be the dotted path of a class with
+encode(value) -> bytes and decode(bytes) -> value methods.
+
+MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS lists member dict keys, for example
+["address", "profile"], that are dropped before a member is cached.
+
+msgpack and lz4 are optional: pip install django-memberpress-client[codecs]
+"""
+# python stuff
+import json
+import logging
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    # optional dependency, only needed for MEMBERPRESS_CACHE_CODEC = "msgpack"
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    # optional dependency, only needed for MEMBERPRESS_CACHE_COMPRESSION = "lz4"
+    lz4_frame = None
+
+# django stuff
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CODEC_MARKER = "_memberpress_codec"
+CODEC_VERSION = 1
+PICKLE = "pickle"
+
+
+class JSONCodec:
+    def encode(self, value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes):
+        return json.loads(data.decode("utf-8"))
+
+
+class MsgpackCodec:
+    def encode(self, value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data: bytes):
+        return msgpack.unpackb(data, raw=False)
+
+
+CODECS = {
+    "json": JSONCodec(),
+    "msgpack": MsgpackCodec(),
+}
+
+COMPRESSIONS = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "lz4": (
+        lambda data: lz4_frame.compress(data),
+        lambda data: lz4_frame.decompress(data),
+    ),
+}
+
+
+def codec_name() -> str:
+    return getattr(settings, "MEMBERPRESS_CACHE_CODEC", PICKLE) or PICKLE
+
+
+def compression() -> str:
+    return getattr(settings, "MEMBERPRESS_CACHE_COMPRESSION", "zlib")
+
+
+def compress_min_bytes() -> int:
+    return getattr(settings, "MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES", 1024)
+
+
+def exclude_fields() -> list:
+    return getattr(settings, "MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS", [])
+
+
+def get_codec(name: str):
+    if name in CODECS:
+        if name == "msgpack" and msgpack is None:
+            raise ImportError("MEMBERPRESS_CACHE_CODEC = 'msgpack' requires the msgpack package.")
+        return CODECS[name]
+    return import_string(name)()
+
+
+def encode(value):
+    """
+    the value to hand to the Django cache for value.
+    """
+    name = codec_name()
+    if name == PICKLE or value is None:
+        return value
+
+    data = get_codec(name).encode(value)
+    compressed_with = None
+    if compression() and len(data) >= compress_min_bytes():
+        if compression() == "lz4" and lz4_frame is None:
+            raise ImportError("MEMBERPRESS_CACHE_COMPRESSION = 'lz4' requires the lz4 package.")
+        compress, _ = COMPRESSIONS[compression()]
+        data = compress(data)
+        compressed_with = compression()
+    return {CODEC_MARKER: CODEC_VERSION, "codec": name, "compression": compressed_with, "data": data}
+
+
+def decode(entry):
+    """
+    the value that was passed to encode(). returns None, ie a cache miss, for
+    envelopes that this version of the package cannot read.
+    """
+    if type(entry) != dict or CODEC_MARKER not in entry:
+        return entry
+    try:
+        if entry[CODEC_MARKER] != CODEC_VERSION:
+            raise ValueError("unknown cache codec version {version}".format(version=entry[CODEC_MARKER]))
+        data = entry["data"]
+        if entry.get("compression"):
+            _, decompress = COMPRESSIONS[entry["compression"]]
+            data = decompress(data)
+        return get_codec(entry["codec"]).decode(data)
+    except Exception:
+        logger.warning("could not decode a cached memberpress response. treating it as a cache miss.", exc_info=True)
+        return None
+
+
+def is_member_dict(value) -> bool:
+    return type(value) == dict and bool(value.get("id")) and bool(value.get("username"))
+
+
+def project(response):
+    """
+    drop MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS from a member dict, or from
+    each member dict in a list. other responses are returned unchanged.
+    """
+    fields = exclude_fields()
+    if not fields:
+        return response
+    if is_member_dict(response):
+        return {key: value for key, value in response.items() if key not in fields}
+    if type(response) == list:
+        return [project(item) if is_member_dict(item) else item for item in response]
+    return response
@@ -140,11 +140,13 @@ MEMBERPRESS_EVENTS = (
 
 MEMBERPRESS_OPERATION_PREFIX = "memberpress_api_operation_"
 OPERATION_GET_MEMBER = MEMBERPRESS_OPERATION_PREFIX + "get_member"
+OPERATION_LIST_MEMBERS = MEMBERPRESS_OPERATION_PREFIX + "list_members"
 
 
 class MemberPressAPI_Operations:
     __slots__ = ()
     GET_MEMBER = OPERATION_GET_MEMBER
+    LIST_MEMBERS = OPERATION_LIST_MEMBERS
 
 
 class MemberPressAPI_Endpoints:
@@ -167,6 +169,13 @@ class MemberPressAPI_Endpoints:
     def MEMBERPRESS_API_ME_PATH(cls):
         return f"{cls.MEMBERPRESS_API_BASE}me/"
 
+    # -------------------------------------------------------------------------
+    # curl "https://set-me-please.com/wp-json/mp/v1/members?page=1&per_page=100" -H "MEMBERPRESS-API-KEY: set-me-please"
+    # -------------------------------------------------------------------------
+    @classproperty
+    def MEMBERPRESS_API_MEMBERS_PATH(cls):
+        return f"{cls.MEMBERPRESS_API_BASE}members"
+
     # -------------------------------------------------------------------------
     # curl "https://set-me-please.com/wp-json/mp/v1/members/123456" -H "MEMBERPRESS-API-KEY: set-me-please", or
     # curl "https://set-me-please.com/wp-json/mp/v1/members?search=mcdaniel" -H "MEMBERPRESS-API-KEY: set-me-please"
@@ -0,0 +1,104 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - timeouts and deadlines.
+
+Every http call gets a (connect, read) timeout, configurable per operation
+with MEMBERPRESS_HTTP_TIMEOUTS. memberpress_deadline() additionally bounds
+the total time that a block of code, for example one Django request, spends
+on memberpress: single-flight waits, retries and http calls are all cut to
+the time that is left, and DeadlineExceeded is raised once it runs out.
+MemberpressAPIClient.get() then serves the last known good value, or else
+Member raises the paywall.
+
+    with memberpress_deadline(0.3):
+        if Member(user=request.user).should_raise_paywall:
+            ...
+"""
+# python stuff
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+
+# django stuff
+from django.conf import settings
+
+# our stuff
+from memberpress_client.exceptions import DeadlineExceeded
+from memberpress_client.session import httpx
+
+# absolute time.monotonic() deadline of the current context, or None
+_deadline = ContextVar("memberpress_deadline", default=None)
+
+TIMEOUT_EXCEPTIONS = (requests.Timeout,) + ((httpx.TimeoutException,) if httpx is not None else ())
+
+
+@contextmanager
+def memberpress_deadline(seconds: float):
+    """
+    bound the memberpress time spent inside the block. nested deadlines can
+    only shorten the budget, never extend it.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float:
+    """
+    seconds left in the current deadline, or None if there is none.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired() -> bool:
+    return remaining() == 0.0
+
+
+def check() -> None:
+    if expired():
+        raise DeadlineExceeded("the memberpress deadline has been exceeded.")
+
+
+def clip(seconds: float) -> float:
+    """
+    seconds, or the time left in the current deadline if that is shorter.
+    """
+    left = remaining()
+    return seconds if left is None else min(seconds, left)
+
+
+def timeouts(operation: str = "") -> tuple:
+    """
+    (connect, read) timeouts in seconds for operation, cut to the current deadline.
+    MEMBERPRESS_HTTP_TIMEOUTS = {MemberPressAPI_Operations.GET_MEMBER: (3.05, 5)}
+    """
+    connect = getattr(settings, "MEMBERPRESS_HTTP_CONNECT_TIMEOUT", 3.05)
+    read = getattr(settings, "MEMBERPRESS_HTTP_READ_TIMEOUT", 10.0)
+    connect, read = getattr(settings, "MEMBERPRESS_HTTP_TIMEOUTS", {}).get(operation, (connect, read))
+    return clip(connect), clip(read)
+
+
+@contextmanager
+def enforce():
+    """
+    wrap one http call. raises DeadlineExceeded, rather than a timeout, when the
+    call was cut short by the deadline rather than by the memberpress host.
+    """
+    check()
+    try:
+        yield
+    except TIMEOUT_EXCEPTIONS as e:
+        if expired():
+            raise DeadlineExceeded("the memberpress deadline has been exceeded.") from e
+        raise
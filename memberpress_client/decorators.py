@@ -7,13 +7,18 @@ request_manager() - common logging and error handling for all REST api verbs
 app_logger() - better logging for lms.log and cms.log
 """
 # python stuff
+import asyncio
 import json
 import functools
 import logging
-from requests.exceptions import HTTPError
+import time
+from requests.exceptions import HTTPError, RequestException
 
 # our stuff
-from .utils import MPJSONEncoder, masked_dict
+from . import circuit_breaker, metrics
+from .exceptions import MemberpressUpstreamUnavailable
+from .retry import TRANSPORT_ERRORS, Retry
+from .utils import LazyJSON, MPJSONEncoder, masked_dict
 
 # module initializations
 logger = logging.getLogger(__name__)
@@ -22,47 +27,110 @@ logger = logging.getLogger(__name__)
 def request_manager(method):
     """
     Decorate a method to
-    - retry on 401 http exceptions. Will attempt to refresh the token in this case, and try again.
-    - catch and kill 429 exceptions.
-    - catch and kill 415 exceptions.
+    - retry failed calls according to the retry policy of the method's verb. see retry.py
+    - add request meta data to the exception raised for http errors that are not retried.
+    - raise MemberpressUpstreamUnavailable for transport errors, 429s and 5xx that
+      outlasted the retries, so that callers can fall back like for an open circuit.
+
+    Works with both regular methods and coroutines (see AsyncMemberpressAPIClient).
     """
 
-    def wrapper(*args, **kwargs):
-        cls = args[0]  # noqa: F841
+    def unhandled_exception(e: HTTPError, kwargs: dict) -> Exception:
         operation = ""
 
-        try:
-            return method(*args, **kwargs)
-        except HTTPError as e:
-            # look for an operation description if it exists
-            if "operation" in kwargs.keys():
-                operation = " " + kwargs["operation"]
-
-            # treat any exception as unhandled. however, we should add meta
-            # data about the request to the stack trace. dump the request
-            # headers and body using MPJSONEncoder so that
-            # sensitive data is masked.
-            request_body = json.dumps(e.response.content, cls=MPJSONEncoder, indent=4) if e.response is not None else ""
-            request_headers = (
-                json.dumps(masked_dict(dict(e.response.request.headers)), cls=MPJSONEncoder, indent=4)
-                if e.response is not None and e.response.request is not None
-                else ""
+        # look for an operation description if it exists
+        if "operation" in kwargs.keys():
+            operation = " " + kwargs["operation"]
+
+        # treat any exception as unhandled. however, we should add meta
+        # data about the request to the stack trace. dump the request
+        # headers and body using MPJSONEncoder so that
+        # sensitive data is masked.
+        request_body = json.dumps(e.response.content, cls=MPJSONEncoder, indent=4) if e.response is not None else ""
+        request_headers = (
+            json.dumps(masked_dict(dict(e.response.request.headers)), cls=MPJSONEncoder, indent=4)
+            if e.response is not None and e.response.request is not None
+            else ""
+        )
+        return Exception(
+            "memberpress_client.decorators.request_manager(){operation} an unhandled exception '{error_message}', was returned by {method}(): {verb} {url}, headers={headers}, body={body}".format(
+                operation=operation,
+                method=method.__name__,
+                verb=e.response.request.method,
+                url=e.response.request.url,
+                headers=request_headers,
+                body=request_body,
+                error_message=str(e),
             )
-            raise Exception(
-                "memberpress_client.decorators.request_manager(){operation} an unhandled exception '{error_message}', was returned by {method}(): {verb} {url}, headers={headers}, body={body}".format(
-                    operation=operation,
-                    method=method.__name__,
-                    verb=e.response.request.method,
-                    url=e.response.request.url,
-                    headers=request_headers,
-                    body=request_body,
-                    error_message=str(e),
-                )
-            ) from e
+        )
+
+    def give_up(e: Exception, kwargs: dict) -> Exception:
+        """
+        the exception to raise once e is not retried, or e itself.
+        """
+        if isinstance(e, HTTPError) and e.response is not None:
+            described = unhandled_exception(e, kwargs)
+        else:
+            described = e
+        if circuit_breaker.is_failure(e):
+            return MemberpressUpstreamUnavailable(str(described))
+        return described
+
+    if asyncio.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            retry = Retry(method.__name__)
+            while True:
+                try:
+                    return await method(*args, **kwargs)
+                except TRANSPORT_ERRORS as e:
+                    delay = retry.backoff(e)
+                    if delay is None:
+                        exception = give_up(e, kwargs)
+                        if exception is e:
+                            raise
+                        raise exception from e
+                metrics.retry(method.__name__, kwargs.get("operation", ""))
+                await asyncio.sleep(delay)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        cls = args[0]  # noqa: F841
+
+        retry = Retry(method.__name__)
+        while True:
+            try:
+                return method(*args, **kwargs)
+            except RequestException as e:
+                delay = retry.backoff(e)
+                if delay is None:
+                    exception = give_up(e, kwargs)
+                    if exception is e:
+                        raise
+                    raise exception from e
+            metrics.retry(method.__name__, kwargs.get("operation", ""))
+            time.sleep(delay)
 
     return wrapper
 
 
+class LazyRepr:
+    """
+    the positional arguments of an app_logger() record, repr()'d only when the record is formatted.
+    """
+
+    __slots__ = ("args",)
+
+    def __init__(self, args):
+        self.args = args
+
+    def __str__(self) -> str:
+        return str([repr(a) for a in self.args]) if self.args else ""
+
+
 def app_logger(func):
     """
     Decorate a function to add an entry to the app log with the function name,
@@ -77,9 +145,11 @@ def app_logger(func):
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+
         name_of_def = func.__name__
         logged_args = args
-        kwargs_dict_repr = ""
 
         # try initializing variables assuming that we were called by a class method
         try:
@@ -94,20 +164,15 @@ def app_logger(func):
             name_of_class = ""
             name_of_module = func.__module__
 
-        positional_args = [repr(a) for a in logged_args]
-
-        if len(kwargs.keys()) > 0:
-            kwargs_dict_repr = "keyword args: "
-            kwargs_dict_repr += json.dumps(masked_dict(kwargs), cls=MPJSONEncoder, indent=4)
-
         logger.info(
-            "app_logger: {name_of_module}.{name_of_class}{name_of_def}() {args} {kwargs}".format(
-                name_of_module=name_of_module,
-                name_of_class=name_of_class,
-                name_of_def=name_of_def,
-                args=positional_args if len(positional_args) > 0 else "",
-                kwargs=kwargs_dict_repr,
-            )
+            "app_logger: %s.%s%s() %s %s%s",
+            name_of_module,
+            name_of_class,
+            name_of_def,
+            LazyRepr(logged_args),
+            "keyword args: " if kwargs else "",
+            LazyJSON(kwargs) if kwargs else "",
+            extra={"memberpress": {"module": name_of_module, "function": name_of_class + name_of_def}},
         )
         return func(*args, **kwargs)
 
@@ -36,6 +36,7 @@ from memberpress_client.constants import (
     MemberpressEvents,
     MemberpressEventTypes,
 )
+from memberpress_client import member_status, username_index
 from memberpress_client.memberpress import Memberpress
 from memberpress_client.member import Member
 from memberpress_client.membership import Membership
@@ -129,7 +130,46 @@ class MemberpressEvent(Generic[MemberpressEventChild], Memberpress):
 
     @property
     def has_member(self) -> bool:
-        return MemberpressEventTypes.MEMBER in self.qc_keys
+        # member events carry the member dict in json["data"] itself
+        return self.event_type == MemberpressEventTypes.MEMBER or MemberpressEventTypes.MEMBER in self.qc_keys
+
+    def update_cache(self) -> bool:
+        """
+        bring the cached rest api responses for this event's member up to date.
+        events that carry a member dict that Member would accept as valid, ie member
+        events, are written through to the cache. all others, including member-deleted,
+        invalidate the member's cache entries so that the next lookup goes to the rest api.
+
+        returns True if the cache was touched.
+        """
+        if not self.is_valid or not self.has_member:
+            return False
+
+        member = self.member
+        user_id = member.id
+        username = member.username
+        if not (user_id or username):
+            return False
+
+        if self.event != MemberpressEvents.MEMBER_DELETED and member.is_minimum_member_dict:
+            Member.update_cache(member.json)
+        else:
+            Member.invalidate_cache(user_id=user_id, username=username)
+        return True
+
+    def update_member_status(self) -> bool:
+        """
+        apply this event to the local member status store.
+        returns True if the store was touched.
+        """
+        return member_status.update_from_event(self)
+
+    def update_username_index(self) -> bool:
+        """
+        apply this event to the username -> user id index.
+        returns True if the index was touched.
+        """
+        return username_index.update_from_event(self)
 
     @property
     def has_membership(self) -> bool:
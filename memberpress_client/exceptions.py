@@ -0,0 +1,32 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - exceptions.
+"""
+
+
+class MemberpressUpstreamUnavailable(Exception):
+    """
+    the memberpress rest api cannot be used right now. Member raises the
+    paywall when it sees one, except for a CircuitOpenError.
+    """
+
+
+class CircuitOpenError(MemberpressUpstreamUnavailable):
+    """
+    the circuit breaker is open, or half-open with a probe already in flight.
+    Member applies MEMBERPRESS_CIRCUIT_OPEN_POLICY to its paywall checks when it sees one.
+    """
+
+
+class DeadlineExceeded(MemberpressUpstreamUnavailable):
+    """
+    the time budget of the current memberpress_deadline() ran out.
+    """
+
+
+class RateLimitExceeded(MemberpressUpstreamUnavailable):
+    """
+    no outbound rate limit token became available in time.
+    """
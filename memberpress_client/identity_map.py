@@ -0,0 +1,53 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - request-scoped identity map.
+
+MemberIdentityMapMiddleware opens an identity map at the start of each request
+and discards it when the request ends. While a map is open, Member(username=...)
+and Member(user_id=...) return the instance that was already built for that
+member earlier in the same request, rather than repeating the cache lookup,
+json decoding and validation. Without an open map every construction builds
+a new instance, as before.
+
+The map lives in a contextvar, so concurrent requests on threads or event
+loop tasks never see each other's members.
+"""
+# python stuff
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_identity_map = ContextVar("memberpress_identity_map", default=None)
+
+
+def get(key: tuple):
+    identity_map = _identity_map.get()
+    if identity_map is None:
+        return None
+    return identity_map.get(key)
+
+
+def add(key: tuple, obj) -> None:
+    identity_map = _identity_map.get()
+    if identity_map is not None:
+        identity_map[key] = obj
+
+
+def discard(key: tuple) -> None:
+    identity_map = _identity_map.get()
+    if identity_map is not None:
+        identity_map.pop(key, None)
+
+
+@contextmanager
+def identity_map():
+    """
+    open a fresh identity map for the duration of the block. use this in
+    management commands and celery tasks that are not wrapped by the middleware.
+    """
+    token = _identity_map.set({})
+    try:
+        yield
+    finally:
+        _identity_map.reset(token)
@@ -0,0 +1,178 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - cache keys.
+
+A member is cached once, under a canonical key built from its user id, whether
+it was looked up with members/{id} or with members?search={username}. A
+separate alias entry maps the username to the user id, so that both kinds of
+lookup read, and invalidate, the same entry. Any other url is cached under a
+key built from the url and its query parameters.
+
+Every key contains a namespace version. bump_namespace() increments it, which
+orphans every existing entry at once. The orphans simply expire.
+
+Keys that would exceed MAX_KEY_LENGTH, for example because of a long url, are
+replaced by a hash, so that they stay within memcached's 250 byte limit.
+"""
+# python stuff
+import hashlib
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+# django stuff
+from django.conf import settings
+from django.core.cache import cache
+
+# our stuff
+from memberpress_client import codec
+from memberpress_client.caching import cache_delete, cache_get, cache_set, stale_expiration
+from memberpress_client.session import session_key
+
+GET_PREFIX = "MemberpressAPIClient.get:"
+MEMBER_PREFIX = "MemberpressAPIClient.member:"
+ALIAS_PREFIX = "MemberpressAPIClient.alias:"
+NAMESPACE_KEY = "MemberpressAPIClient.namespace"
+
+# leaves room for the lease, stale and negative prefixes and for Django's own key prefix
+MAX_KEY_LENGTH = 200
+
+# how long this process trusts its copy of the namespace version
+NAMESPACE_REFRESH = 1.0
+
+MEMBER_ID_PATH = re.compile(r"/members/(?P<user_id>\d+)/?$")
+MEMBERS_PATH = re.compile(r"/members/?$")
+
+_namespace = {"version": None, "expires_at": 0}
+_namespace_lock = threading.Lock()
+
+
+def namespace() -> int:
+    """
+    the current namespace version.
+    """
+    with _namespace_lock:
+        if _namespace["version"] is None or _namespace["expires_at"] <= time.monotonic():
+            _namespace["version"] = cache.get(NAMESPACE_KEY, 0)
+            _namespace["expires_at"] = time.monotonic() + NAMESPACE_REFRESH
+        return _namespace["version"]
+
+
+def bump_namespace() -> int:
+    """
+    invalidate every cached response, in all processes. other processes
+    notice within NAMESPACE_REFRESH seconds.
+    """
+    cache.add(NAMESPACE_KEY, 0, None)
+    try:
+        version = cache.incr(NAMESPACE_KEY)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(NAMESPACE_KEY, 1, None)
+        version = 1
+    with _namespace_lock:
+        _namespace["version"] = version
+        _namespace["expires_at"] = time.monotonic() + NAMESPACE_REFRESH
+    return version
+
+
+def shorten(key: str) -> str:
+    if len(key) <= MAX_KEY_LENGTH:
+        return key
+    prefix = key[: key.index(":") + 1]
+    return "{prefix}sha256:{digest}".format(prefix=prefix, digest=hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+
+def host() -> str:
+    return session_key(settings.MEMBERPRESS_API_BASE_URL)
+
+
+def url_key(url: str, params=None) -> str:
+    params = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return shorten(
+        "{prefix}{namespace}:{url}:{params}".format(prefix=GET_PREFIX, namespace=namespace(), url=url, params=params)
+    )
+
+
+def member_key(user_id) -> str:
+    return shorten(
+        "{prefix}{host}:{namespace}:{user_id}".format(
+            prefix=MEMBER_PREFIX, host=host(), namespace=namespace(), user_id=user_id
+        )
+    )
+
+
+def alias_key(username: str) -> str:
+    return shorten(
+        "{prefix}{host}:{namespace}:{username}".format(
+            prefix=ALIAS_PREFIX, host=host(), namespace=namespace(), username=username
+        )
+    )
+
+
+def get_alias(username: str):
+    """
+    the user id of username, if it is known.
+    """
+    return cache_get(alias_key(username))
+
+
+def get_aliases(usernames) -> dict:
+    """
+    get_alias() for many usernames with a single cache.get_many().
+    """
+    aliases = {alias_key(username): username for username in usernames}
+    return {aliases[key]: codec.decode(user_id) for key, user_id in cache.get_many(list(aliases)).items()}
+
+
+def set_alias(username: str, user_id) -> None:
+    cache_set(alias_key(username), user_id, stale_expiration())
+
+
+def delete_alias(username: str) -> None:
+    cache_delete(alias_key(username))
+
+
+def member_lookup(url: str, params=None) -> tuple:
+    """
+    ("user_id", <id>) for members/{id}, ("username", <username>) for
+    members?search={username}, otherwise (None, None).
+    """
+    parts = urlsplit(url)
+    query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+    query.update(params or {})
+
+    match = MEMBER_ID_PATH.search(parts.path)
+    if match and not query:
+        return "user_id", match.group("user_id")
+    if MEMBERS_PATH.search(parts.path) and list(query) == ["search"] and query["search"]:
+        return "username", query["search"]
+    return None, None
+
+
+def searched_member(url: str, params, response) -> dict:
+    """
+    the member dict that a members?search={username} response holds for
+    username itself, or None.
+    """
+    kind, username = member_lookup(url, params)
+    if kind != "username" or type(response) != list:
+        return None
+    for member in response:
+        if codec.is_member_dict(member) and member["username"] == username:
+            return member
+    return None
+
+
+def reshape(url: str, params, response):
+    """
+    a search lookup that was served from a canonical member entry still
+    returns a list, like the search endpoint does.
+    """
+    if codec.is_member_dict(response) and member_lookup(url, params)[0] == "username":
+        return [response]
+    return response
@@ -0,0 +1,158 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - in-process cache tier.
+
+An optional, bounded LRU cache that sits in front of the Django cache, so that
+hot members are served without a round trip to redis or memcached. Entries
+live for at most MEMBERPRESS_LOCAL_CACHE_TIMEOUT seconds, and the tier holds at
+most MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES entries and
+MEMBERPRESS_LOCAL_CACHE_MAX_BYTES bytes. The least recently used entries are
+evicted first.
+
+Values are kept pickled, like Django's own locmem backend does, so that callers
+can never modify each other's copy and so that their size is known exactly.
+The price is a pickle.loads() on every local hit. That is much cheaper than a
+round trip to redis or memcached, but it is not free: the local tier removes
+the network hop, not the deserialization.
+
+Writes and invalidations made through MemberpressAPIClient, including those
+driven by webhooks, update this process's tier immediately. Other processes
+catch up once their local copy times out, so keep the timeout short.
+"""
+# python stuff
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# django stuff
+from django.conf import settings
+
+
+def enabled() -> bool:
+    return getattr(settings, "MEMBERPRESS_LOCAL_CACHE", False)
+
+
+def local_timeout() -> float:
+    return getattr(settings, "MEMBERPRESS_LOCAL_CACHE_TIMEOUT", 5)
+
+
+def max_entries() -> int:
+    return getattr(settings, "MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES", 1000)
+
+
+def max_bytes() -> int:
+    return getattr(settings, "MEMBERPRESS_LOCAL_CACHE_MAX_BYTES", 10 * 1024 * 1024)
+
+
+class LocalCache:
+    """
+    a thread-safe LRU cache with per-entry expiration and entry count and size limits.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, pickled = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return pickle.loads(pickled)
+                self._remove(key)
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value, timeout: float = None) -> None:
+        timeout = local_timeout() if timeout is None else min(timeout, local_timeout())
+        if timeout <= 0:
+            self.delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remove(key)
+            if len(pickled) > max_bytes():
+                return
+            self._data[key] = (time.monotonic() + timeout, pickled)
+            self.size += len(pickled)
+            while len(self._data) > max_entries() or self.size > max_bytes():
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def delete_many(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1])
+
+
+local_cache = LocalCache()
+
+
+def get(key: str, default=None):
+    """
+    the locally cached value of key, or default. always default when the local tier is disabled.
+    """
+    if not enabled():
+        return default
+    return local_cache.get(key, default)
+
+
+def set(key: str, value, timeout: float = None) -> None:
+    """
+    cache value locally for at most timeout, and at most MEMBERPRESS_LOCAL_CACHE_TIMEOUT, seconds.
+    """
+    if enabled():
+        local_cache.set(key, value, timeout)
+
+
+def delete_many(keys) -> None:
+    # also applied while disabled, so that a tier that is toggled at runtime never serves evicted values
+    local_cache.delete_many(keys)
+
+
+def clear() -> None:
+    local_cache.clear()
+
+
+def stats() -> dict:
+    """
+    entry count, size in bytes and hit, miss and eviction counters of this process's local tier.
+    """
+    return local_cache.stats()
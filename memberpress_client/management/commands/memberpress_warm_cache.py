@@ -0,0 +1,134 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - cache pre-warming.
+
+Fills the member cache ahead of traffic, for example after a deploy or after
+the cache backend was restarted, so that the first page view of each user
+does not pay for a cold rest api call.
+
+    ./manage.py memberpress_warm_cache --source users
+    ./manage.py memberpress_warm_cache --source users --since-days 7
+    ./manage.py memberpress_warm_cache --source csv --csv usernames.csv
+    ./manage.py memberpress_warm_cache --source members
+
+members that are already cached are skipped. misses are fetched by
+Member.prefetch_many(), --workers at a time, at batch priority, so the
+warm-up stays within MEMBERPRESS_RATE_LIMIT and yields to interactive
+requests. --source members walks the paginated members listing instead and
+caches each member it returns, without any per-member requests.
+"""
+# python stuff
+import csv
+import time
+from datetime import timedelta
+
+# django stuff
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# our stuff
+from memberpress_client.member import Member, iter_members
+
+SOURCES = ["users", "csv", "members"]
+
+
+def batches(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Fill the memberpress member cache ahead of traffic."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=SOURCES, default="users", help="where to find the members to warm.")
+        parser.add_argument(
+            "--since-days", type=int, default=None, help="--source users: only users who logged in this recently."
+        )
+        parser.add_argument(
+            "--csv", dest="csv_path", default=None, help="--source csv: a csv file with a username or user_id column."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "MEMBERPRESS_BULK_MAX_WORKERS", 8),
+            help="how many members to fetch concurrently.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100, help="how many members to look up at a time.")
+        parser.add_argument("--page-size", type=int, default=100, help="--source members: members per page.")
+        parser.add_argument(
+            "--prefetch-pages",
+            type=int,
+            default=1,
+            help="--source members: how many pages to fetch ahead in the background.",
+        )
+
+    def handle(self, *args, **options):
+        self.started = time.monotonic()
+        self.warmed = 0
+        self.missing = 0
+
+        if options["source"] == "members":
+            members = iter_members(page_size=options["page_size"], prefetch_pages=options["prefetch_pages"])
+            for batch in batches(members, options["batch_size"]):
+                for member in batch:
+                    Member.update_cache(member)
+                self.warmed += len(batch)
+                self.progress()
+        else:
+            for batch in batches(self.identifiers(options), options["batch_size"]):
+                usernames = [identifier for kind, identifier in batch if kind == "username"]
+                user_ids = [identifier for kind, identifier in batch if kind == "user_id"]
+                members = Member.prefetch_many(usernames=usernames, user_ids=user_ids, max_workers=options["workers"])
+                found = len([member for member in members.values() if member])
+                self.warmed += found
+                self.missing += len(batch) - found
+                self.progress()
+
+        self.stdout.write(self.style.SUCCESS("done. " + self.summary()))
+
+    def identifiers(self, options):
+        """
+        yields ("username", <username>) or ("user_id", <user id>) tuples.
+        """
+        if options["source"] == "csv":
+            if not options["csv_path"]:
+                raise CommandError("--source csv requires --csv <path>")
+            with open(options["csv_path"], newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                if "username" not in (reader.fieldnames or []) and "user_id" not in (reader.fieldnames or []):
+                    raise CommandError("{path} has neither a username nor a user_id column".format(path=f.name))
+                for row in reader:
+                    if row.get("user_id"):
+                        yield "user_id", int(row["user_id"])
+                    elif row.get("username"):
+                        yield "username", row["username"].strip()
+            return
+
+        users = get_user_model().objects.filter(is_active=True)
+        if options["since_days"] is not None:
+            users = users.filter(last_login__gte=timezone.now() - timedelta(days=options["since_days"]))
+        for username in users.order_by("pk").values_list("username", flat=True).iterator():
+            yield "username", username
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        return "warmed {warmed} members, {missing} not found, in {elapsed:.1f}s ({rate:.1f}/s)".format(
+            warmed=self.warmed,
+            missing=self.missing,
+            elapsed=elapsed,
+            rate=self.warmed / elapsed if elapsed else 0,
+        )
+
+    def progress(self):
+        self.stdout.write(self.summary())
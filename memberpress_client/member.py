@@ -7,11 +7,20 @@ memberpress REST API Client plugin for Django - Member class
 
 # Python stuff
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import requests
 
+# django stuff
+from django.conf import settings
+from django.core.cache import cache
+
 # our stuff
-from memberpress_client.client import MemberpressAPIClient
+from memberpress_client import circuit_breaker, codec, identity_map, keys, member_status, ratelimit, username_index
+from memberpress_client.caching import NEGATIVE_PREFIX, invalidate, unwrap
+from memberpress_client.client import AsyncMemberpressAPIClient, MemberpressAPIClient
+from memberpress_client.exceptions import CircuitOpenError, MemberpressUpstreamUnavailable
 from memberpress_client.subscription import Subscription
 from memberpress_client.transaction import Transaction
 from memberpress_client.membership import Membership
@@ -32,6 +41,11 @@ class Member(MemberpressAPIClient):
 
     _request = None
     _username = None
+    _status = None
+    _initialized = False
+
+    # share instances through the request-scoped identity map. see identity_map.py
+    use_identity_map = True
 
     _recent_subscriptions = None
     _recent_transactions = None
@@ -39,15 +53,30 @@ class Member(MemberpressAPIClient):
     _latest_transaction = None
     _active_memberships = None
 
-    def __init__(self, username=None, user=None, request=None, response=None, user_id=None) -> None:
+    def __new__(cls, *args, **kwargs):
+        if cls.use_identity_map:
+            obj = identity_map.get(cls.identity_key(*args, **kwargs))
+            if obj is not None:
+                return obj
+        return super().__new__(cls)
+
+    def __init__(
+        self, username=None, user=None, request=None, response=None, user_id=None, use_status_store=None
+    ) -> None:
         """
         username <str>: a Wordpress username
         user <obj>: a Django user object
         request <requests> a Django requests.request object
         response <json> the json reponse from memberpress REST API
         user_id <int>: a Wordpress user ID
+        use_status_store <bool>: read the local member status store first. defaults to MEMBERPRESS_MEMBER_STATUS_STORE
         """
+        if self._initialized:
+            # this instance came from the identity map
+            return
+
         super().__init__()
+        self.use_status_store = member_status.enabled() if use_status_store is None else use_status_store
         self.init()
         self.request = request
         self.json = response
@@ -81,12 +110,67 @@ class Member(MemberpressAPIClient):
         if user_id:
             self._user_id = user_id
 
+        self._load(response)
+        self._initialized = True
+        if self.use_identity_map and self.identity_key(username, user, request, response, user_id):
+            # members built from a response are not shared. the response may not be current.
+            self._register()
+
+    def _load(self, response) -> None:
+        """
+        read the member's status from the local store, or else validate the
+        member dict, fetching it if needed, and record its status in the store.
+        """
+        if self.use_status_store and not self.json:
+            # answer paywall checks from the local store without an http call.
+            # the member dict is only fetched if some other property needs it.
+            self._status = member_status.get_status(user_id=self._user_id, username=self._username)
+        if self._status:
+            return
+
         self.validate()
 
         if self.username:
             # invoke the getter
             self.member
 
+        if self.use_status_store and not response:
+            member_status.upsert_status(self)
+
+    def _register(self) -> None:
+        """
+        share this instance through the identity map, under its user id and its username.
+        """
+        for key in self.identity_keys(
+            user_id=self._user_id or self.json.get("id"), username=self._username or self.json.get("username")
+        ):
+            identity_map.add(key, self)
+
+    @classmethod
+    def identity_key(cls, username=None, user=None, request=None, response=None, user_id=None, **kwargs) -> tuple:
+        """
+        the identity map key of a Member(...) call, following the same priorities as __init__().
+        None if the instance should not be shared.
+        """
+        if response:
+            return None
+        if not username:
+            try:
+                username = user.username if user else request.user.username
+            except Exception:
+                pass
+        keys = cls.identity_keys(user_id=user_id, username=username)
+        return keys[0] if keys else None
+
+    @classmethod
+    def identity_keys(cls, user_id=None, username=None) -> list:
+        retval = []
+        if user_id:
+            retval.append((cls, "user_id", str(user_id)))
+        if username:
+            retval.append((cls, "username", username))
+        return retval
+
     def init(self):
         super().init()
         self._request = None
@@ -98,6 +182,8 @@ class Member(MemberpressAPIClient):
         self._first_transaction = None
         self._latest_transaction = None
         self._active_memberships = None
+        self._upstream_unavailable = False
+        self._upstream_error = None
 
     def validate(self) -> None:
         super().validate()
@@ -161,31 +247,186 @@ class Member(MemberpressAPIClient):
         an empty dict {} for the life of the object instance.
         """
         # note: need to use private _username in order to avoid recursion.
-        if (self._user_id or self._username) and not self.json and not self.locked:
+        if (self._user_id or self._username) and not self.json and not self.locked and not self._upstream_unavailable:
             """
             expected result is a dict if `user_id` is provided, or list containing
             one or more dicts if `username` is used to search for the member.
             """
-            path = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=self._user_id, username=self._username)
-            retval = self.get(path=path, operation=MemberPressAPI_Operations.GET_MEMBER)
+            try:
+                self.json = self.fetch_member()
+            except MemberpressUpstreamUnavailable as e:
+                # should_raise_paywall answers from here on, see there.
+                logger.error("member() could not reach memberpress: {e}".format(e=e))
+                self._upstream_unavailable = True
+                self._upstream_error = e
+                return {}
+            if self._status:
+                # the constructor was answered by the local status store. from here on
+                # the member dict is authoritative.
+                self._status = None
+                self.validate()
+        # convert NoneType to a dict so that other class properties
+        # can safely use the form, val = self.member.get("blah")
+        return self.json or {}
+
+    @classmethod
+    def cache_keys(cls, user_id=None, username=None) -> dict:
+        """
+        the MemberpressAPIClient.get() cache keys of a member's rest api lookups,
+        by user id and by username. "search" is the key of a username lookup
+        whose user id is not known yet, ie of negative search results.
+        """
+        client = MemberpressAPIClient()
+        retval = {}
+        if user_id:
+            url = client.get_url(MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=user_id))
+            retval["user_id"] = client.cache_key(url)
+        if username:
+            url = client.get_url(MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(username=username))
+            retval["username"] = client.cache_key(url)
+            retval["search"] = keys.url_key(url)
+        return retval
+
+    @classmethod
+    def invalidate_cache(cls, user_id=None, username=None) -> None:
+        """
+        forget the cached rest api responses for a member, so that the next lookup
+        by either user id or username goes to the rest api.
+        """
+        for cache_key in set(cls.cache_keys(user_id=user_id, username=username).values()):
+            invalidate(cache_key)
+        for key in cls.identity_keys(user_id=user_id, username=username):
+            identity_map.discard(key)
 
-            if type(retval) == list and len(retval) == 1:
-                retval = retval[0]
+    @classmethod
+    def update_cache(cls, member: dict) -> None:
+        """
+        write-through: replace the cached rest api responses for a member with
+        a member dict received from elsewhere, for example a webhook event.
+        """
+        client = MemberpressAPIClient()
+        cache_keys = cls.cache_keys(user_id=member.get("id"), username=member.get("username"))
+        if "user_id" in cache_keys:
+            # also records the username alias, so that username lookups share this entry
+            client.cache_set(cache_keys["user_id"], member, operation=MemberPressAPI_Operations.GET_MEMBER)
+            if "search" in cache_keys:
+                invalidate(cache_keys["search"])
+        elif "search" in cache_keys:
+            # members?search= responds with a list of members
+            client.cache_set(cache_keys["search"], [member], operation=MemberPressAPI_Operations.GET_MEMBER)
+
+    @classmethod
+    def prefetch_many(cls, usernames=None, user_ids=None, max_workers=None) -> dict:
+        """
+        look up many members at once. cache hits are read with a single cache.get_many()
+        and the misses are fetched concurrently, at most max_workers, by default
+        MEMBERPRESS_BULK_MAX_WORKERS, at a time. The responses are cached as usual.
 
-            if type(retval) == list and len(retval) > 1:
-                for d in retval:
-                    if d.get("username") == self.username:
-                        retval = d
-                        break
+        returns a dict of username or user id -> member dict, or None for anyone who
+        is not a member or could not be fetched.
+        """
+        client = MemberpressAPIClient()
+        # usernames with a known user id are looked up with members/{id}
+        indexed = username_index.get_user_ids(usernames or [])
+        lookups = {}
+        cache_keys = {}
+        for username in usernames or []:
+            if username in indexed:
+                lookups[username] = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=indexed[username])
+                cache_keys[username] = keys.member_key(indexed[username])
+            else:
+                lookups[username] = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(username=username)
+                cache_keys[username] = keys.url_key(client.get_url(lookups[username]))
+        for user_id in user_ids or []:
+            lookups[user_id] = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=user_id)
+            cache_keys[user_id] = keys.member_key(user_id)
+        cached = cache.get_many(
+            list(cache_keys.values()) + [NEGATIVE_PREFIX + cache_key for cache_key in cache_keys.values()]
+        )
+        cached = {key: codec.decode(entry) for key, entry in cached.items()}
+
+        retval = {}
+        misses = []
+        for identifier, cache_key in cache_keys.items():
+            response, _ = unwrap(cached.get(cache_key))
+            if response:
+                retval[identifier] = response
+            elif cached.get(NEGATIVE_PREFIX + cache_key) is not None:
+                retval[identifier] = cached[NEGATIVE_PREFIX + cache_key]["value"]
+            else:
+                misses.append(identifier)
+
+        def fetch(identifier):
+            # one client per call. client instances are not re-entrant.
+            try:
+                with ratelimit.memberpress_priority(ratelimit.BATCH):
+                    return MemberpressAPIClient().get(
+                        path=lookups[identifier], operation=MemberPressAPI_Operations.GET_MEMBER
+                    )
+            except Exception:
+                logger.exception("prefetch_many() could not fetch member {identifier}".format(identifier=identifier))
 
-            if type(retval) != dict:
-                logger.warning("member() was expecting a return type of dict but received {t}.".format(t=type(retval)))
-                retval = None
+        if misses:
+            max_workers = min(len(misses), max_workers or getattr(settings, "MEMBERPRESS_BULK_MAX_WORKERS", 8))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="memberpress-bulk") as executor:
+                retval.update(zip(misses, executor.map(fetch, misses)))
 
-            self.json = retval
-        # convert NoneType to a dict so that other class properties
-        # can safely use the form, val = self.member.get("blah")
-        return self.json or {}
+        usernames = set(usernames or [])
+        return {
+            identifier: cls.select_member(response, identifier if identifier in usernames else None)
+            for identifier, response in retval.items()
+        }
+
+    @classmethod
+    def bulk(cls, usernames=None, user_ids=None) -> dict:
+        """
+        prefetch_many(), returning validated Member objects rather than member dicts.
+        """
+        members = cls.prefetch_many(usernames=usernames, user_ids=user_ids)
+        return {identifier: cls(response=member) if member else None for identifier, member in members.items()}
+
+    def member_path(self) -> str:
+        return MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=self._user_id, username=self._username)
+
+    def fetch_member(self) -> dict:
+        """
+        get the member dict from the rest api. a username whose user id is in
+        the username index is looked up with the exact members/{id} endpoint,
+        and any other username is added to the index once it is found.
+        """
+        indexed_user_id = None if self._user_id else username_index.get_user_id(self._username)
+        if indexed_user_id:
+            path = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=indexed_user_id)
+            member = self.select_member(self.get(path=path, operation=MemberPressAPI_Operations.GET_MEMBER))
+            if member and member.get("username") == self._username:
+                return member
+            # the username was renamed or deleted since it was indexed
+            username_index.forget(user_id=indexed_user_id, username=self._username)
+
+        retval = self.get(path=self.member_path(), operation=MemberPressAPI_Operations.GET_MEMBER)
+        member = self.select_member(retval, self._username)
+        if member and not self._user_id and member.get("username") == self._username:
+            username_index.remember(self._username, member.get("id"))
+        return member
+
+    @classmethod
+    def select_member(cls, retval, username=None) -> dict:
+        """
+        reduce a rest api response to the member dict for username, or None.
+        """
+        if type(retval) == list and len(retval) == 1:
+            retval = retval[0]
+
+        if type(retval) == list and len(retval) > 1:
+            for d in retval:
+                if d.get("username") == username:
+                    retval = d
+                    break
+
+        if type(retval) != dict:
+            logger.warning("member() was expecting a return type of dict but received {t}.".format(t=type(retval)))
+            retval = None
+        return retval
 
     @property
     def id(self) -> int:
@@ -338,6 +579,9 @@ class Member(MemberpressAPIClient):
 
     @property
     def is_active_subscription(self) -> bool:
+        if self._status:
+            return self._status.is_active_subscription
+
         if not self.is_valid:
             return False
 
@@ -349,6 +593,9 @@ class Member(MemberpressAPIClient):
 
     @property
     def is_trial_subscription(self) -> bool:
+        if self._status:
+            return self._status.is_trial_subscription
+
         if not self.is_valid:
             return False
 
@@ -360,8 +607,128 @@ class Member(MemberpressAPIClient):
 
         return False
 
+    @property
+    def upstream_unavailable(self) -> bool:
+        """
+        True if memberpress could not be reached and there was no last known good member dict.
+        """
+        return self._upstream_unavailable
+
     @property
     def should_raise_paywall(self) -> bool:
+        if self._status:
+            return self._status.should_raise_paywall
+
+        if self.upstream_unavailable:
+            if isinstance(self._upstream_error, CircuitOpenError):
+                return circuit_breaker.open_policy() == "fail-closed"
+            # a deadline or the local rate limit ran out. memberpress itself may be fine.
+            return True
+
         if self.is_active_subscription or self.is_trial_subscription:
             return False
         return self.ready
+
+
+def iter_members(page_size: int = 100, prefetch_pages: int = 1):
+    """
+    walk every member of the memberpress site, one page of the paginated
+    members endpoint at a time. The next prefetch_pages pages are fetched in
+    the background while the current page is being consumed, so memory use is
+    bounded by prefetch_pages + 1 pages regardless of the number of members.
+
+    yields member dicts. pages are not cached.
+
+        for member in iter_members(page_size=200):
+            print(member["username"])
+    """
+
+    def fetch(page: int) -> list:
+        with ratelimit.memberpress_priority(ratelimit.BATCH):
+            return MemberpressAPIClient().get(
+                path=MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBERS_PATH,
+                params={"page": page, "per_page": page_size},
+                operation=MemberPressAPI_Operations.LIST_MEMBERS,
+                enable_caching=False,
+            )
+
+    prefetch_pages = max(0, prefetch_pages)
+    with ThreadPoolExecutor(max_workers=prefetch_pages + 1, thread_name_prefix="memberpress-pages") as executor:
+        pending = deque(executor.submit(fetch, page) for page in range(1, prefetch_pages + 2))
+        next_page = prefetch_pages + 2
+        try:
+            while pending:
+                members = pending.popleft().result()
+                if type(members) != list:
+                    logger.warning(
+                        "iter_members() was expecting a return type of list but received {t}.".format(t=type(members))
+                    )
+                    return
+                username_index.remember_many(members)
+                if len(members) < page_size:
+                    # the last page
+                    yield from members
+                    return
+                pending.append(executor.submit(fetch, next_page))
+                next_page += 1
+                yield from members
+        finally:
+            # the caller stopped early, or we ran past the last page
+            for future in pending:
+                future.cancel()
+
+
+class AsyncMember(Member):
+    """
+    awaitable Member. construction never blocks; awaiting the instance fetches
+    the member dict on the running event loop and returns the validated member.
+
+        member = await AsyncMember(username="jsmith")
+        if member.should_raise_paywall:
+            ...
+
+        members = await asyncio.gather(*[AsyncMember(username=u) for u in usernames])
+    """
+
+    # awaited after construction, so never shared
+    use_identity_map = False
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._client = AsyncMemberpressAPIClient()
+        # the local member status store is a blocking database read
+        kwargs["use_status_store"] = False
+        super().__init__(*args, **kwargs)
+
+    def __await__(self):
+        return self.fetch().__await__()
+
+    async def fetch(self):
+        if self.pending and not self.locked:
+            self.lock()
+            try:
+                retval = await self._client.get(path=self.member_path(), operation=MemberPressAPI_Operations.GET_MEMBER)
+            except MemberpressUpstreamUnavailable as e:
+                logger.error("fetch() could not reach memberpress: {e}".format(e=e))
+                self._upstream_unavailable = True
+                self._upstream_error = e
+                return self
+            finally:
+                self.unlock()
+            self.json = self.select_member(retval, self._username)
+        self.validate()
+        return self
+
+    def validate(self) -> None:
+        # nothing to validate until the member dict has been awaited.
+        if self.pending:
+            self._is_valid = False
+            return
+        super().validate()
+
+    @property
+    def pending(self) -> bool:
+        return bool((self._user_id or self._username) and not self.json)
+
+    @property
+    def member(self) -> dict:
+        return self.json or {}
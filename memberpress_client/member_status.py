@@ -0,0 +1,139 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - local member status store.
+
+a compact MemberStatus row per member that answers Member.should_raise_paywall
+without an http call. Rows are upserted from member webhook events and from
+rest api lookups made by Member. Subscription, transaction and member-deleted
+events do not carry enough of the member to recompute the row, so they delete
+it and the next lookup goes to the rest api.
+"""
+# python stuff
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+# django stuff
+from django.conf import settings
+from django.utils import timezone
+
+# our stuff
+from memberpress_client.constants import MemberpressEvents
+from memberpress_client.models import MemberStatus
+
+logger = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return getattr(settings, "MEMBERPRESS_MEMBER_STATUS_STORE", False)
+
+
+def utc(value: datetime) -> datetime:
+    # memberpress dates are naive utc
+    if value and timezone.is_naive(value):
+        return value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def db_value(value: datetime) -> datetime:
+    """
+    an aware datetime as a DateTimeField stores it: aware with USE_TZ, otherwise
+    naive in TIME_ZONE, which is what timezone.now() returns without USE_TZ.
+    """
+    if value and not settings.USE_TZ:
+        return timezone.make_naive(value)
+    return value
+
+
+def never(value) -> bool:
+    # memberpress sends "0000-00-00 00:00:00" for dates that never come
+    return str(value).startswith("0000")
+
+
+def soonest_expiry(member) -> datetime:
+    """
+    the soonest upcoming expiry of the member's active memberships and
+    subscriptions, in utc, or None. Trials and recurring subscriptions often
+    have no fixed membership expiry.
+    """
+    dates = [
+        membership.expire_fixed
+        for membership in member.active_memberships or []
+        if not never(membership.json.get("expire_fixed"))
+    ]
+    dates += [
+        subscription.expires_at
+        for subscription in member.recent_subscriptions or []
+        if not never(subscription.json.get("expires_at"))
+    ]
+    now = datetime.now(dt_timezone.utc)
+    upcoming = [utc(date) for date in dates if date and utc(date) >= now]
+    return min(upcoming) if upcoming else None
+
+
+def get_status(user_id=None, username=None) -> MemberStatus:
+    """
+    the member's status row, or None if there is no row or it is stale.
+    """
+    if user_id:
+        status = MemberStatus.objects.filter(user_id=user_id).first()
+    elif username:
+        status = MemberStatus.objects.filter(username=username).first()
+    else:
+        return None
+
+    if status and status.is_stale:
+        logger.debug("member status for {username} is stale".format(username=status.username))
+        return None
+    return status
+
+
+def upsert_status(member) -> MemberStatus:
+    """
+    create or update the status row of a validated Member.
+    """
+    if not member.is_valid or not member.username:
+        return None
+
+    user_id = member.id
+    if user_id:
+        # the member's username changed
+        MemberStatus.objects.filter(user_id=user_id).exclude(username=member.username).delete()
+
+    status, _ = MemberStatus.objects.update_or_create(
+        username=member.username,
+        defaults={
+            "user_id": user_id,
+            "is_active_subscription": member.is_active_subscription,
+            "is_trial_subscription": member.is_trial_subscription,
+            "expires_at": db_value(soonest_expiry(member)),
+        },
+    )
+    logger.debug("upserted member status for {username}".format(username=member.username))
+    return status
+
+
+def delete_status(user_id=None, username=None) -> None:
+    if user_id:
+        MemberStatus.objects.filter(user_id=user_id).delete()
+    if username:
+        MemberStatus.objects.filter(username=username).delete()
+
+
+def update_from_event(event) -> bool:
+    """
+    apply a webhook event to the store. returns True if the store was touched.
+    """
+    if not event.is_valid or not event.has_member:
+        return False
+
+    member = event.member
+    if not (member.id or member.username):
+        return False
+
+    if event.event != MemberpressEvents.MEMBER_DELETED and member.is_minimum_member_dict:
+        upsert_status(member)
+    else:
+        delete_status(user_id=member.id, username=member.username)
+    return True
@@ -106,6 +106,8 @@ class Memberpress:
         return all(key in response for key in qc_keys)
 
     def lock(self):
+        # re-entrancy guard for this instance only. cross-process de-duplication
+        # of rest api calls is handled by the single-flight lease in caching.py
         self._locked = True
 
     def unlock(self):
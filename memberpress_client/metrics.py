@@ -0,0 +1,203 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - metrics.
+
+With MEMBERPRESS_METRICS = True, the client and the webhook view record
+counters and latency histograms in memory, labelled by MemberPressAPI_Operations
+operation or by webhook event:
+
+    memberpress_cache_requests_total{operation, result}  hit, stale, negative or miss
+    memberpress_upstream_requests_total{verb, operation, status_code}
+    memberpress_upstream_request_duration_seconds{verb, operation}
+    memberpress_retries_total{verb, operation}
+    memberpress_webhook_events_total{event, processed}
+    memberpress_webhook_duration_seconds{event}
+
+metrics_view() serves them in the Prometheus text exposition format, see
+urls.py. Metrics are kept per process, like prometheus_client's default
+registry, so scrape every worker process.
+
+The view answers 403 unless the request carries
+"Authorization: Bearer <MEMBERPRESS_METRICS_TOKEN>", or, with no token
+configured, comes from a logged in staff user.
+"""
+# python stuff
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+# django stuff
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def enabled() -> bool:
+    return getattr(settings, "MEMBERPRESS_METRICS", False)
+
+
+def token() -> str:
+    return getattr(settings, "MEMBERPRESS_METRICS_TOKEN", "")
+
+
+def is_authorized(request) -> bool:
+    if token():
+        expected = "Bearer {token}".format(token=token())
+        return hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", "").encode(), expected.encode())
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def buckets() -> tuple:
+    return tuple(getattr(settings, "MEMBERPRESS_METRICS_BUCKETS", DEFAULT_BUCKETS))
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join('{key}="{value}"'.format(key=key, value=escape(value)) for key, value in labels.items()) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> list:
+        with self.lock:
+            values = dict(self.values)
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in sorted(values.items())]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.values = {}
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self.lock:
+            if key not in self.values:
+                self.values[key] = {"buckets": [0] * len(buckets()), "sum": 0.0, "count": 0}
+            observed = self.values[key]
+            for position, bound in enumerate(buckets()):
+                if value <= bound:
+                    observed["buckets"][position] += 1
+            observed["sum"] += value
+            observed["count"] += 1
+
+    def samples(self) -> list:
+        with self.lock:
+            values = {key: dict(observed, buckets=list(observed["buckets"])) for key, observed in self.values.items()}
+        samples = []
+        for key, observed in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            # bucket counts are already cumulative
+            for bound, count in zip(buckets(), observed["buckets"]):
+                samples.append((self.name + "_bucket", dict(labels, le=repr(float(bound))), count))
+            samples.append((self.name + "_bucket", dict(labels, le="+Inf"), observed["count"]))
+            samples.append((self.name + "_sum", labels, observed["sum"]))
+            samples.append((self.name + "_count", labels, observed["count"]))
+        return samples
+
+
+CACHE_REQUESTS = Counter(
+    "memberpress_cache_requests_total", "MemberpressAPIClient.get() cache lookups.", ("operation", "result")
+)
+UPSTREAM_REQUESTS = Counter(
+    "memberpress_upstream_requests_total", "http calls to memberpress.", ("verb", "operation", "status_code")
+)
+UPSTREAM_DURATION = Histogram(
+    "memberpress_upstream_request_duration_seconds", "duration of http calls to memberpress.", ("verb", "operation")
+)
+RETRIES = Counter("memberpress_retries_total", "retried http calls to memberpress.", ("verb", "operation"))
+WEBHOOK_EVENTS = Counter("memberpress_webhook_events_total", "received webhook events.", ("event", "processed"))
+WEBHOOK_DURATION = Histogram(
+    "memberpress_webhook_duration_seconds", "time spent processing webhook events.", ("event",)
+)
+
+REGISTRY = [CACHE_REQUESTS, UPSTREAM_REQUESTS, UPSTREAM_DURATION, RETRIES, WEBHOOK_EVENTS, WEBHOOK_DURATION]
+
+
+def cache_result(operation: str, result: str) -> None:
+    if enabled():
+        CACHE_REQUESTS.inc(operation=operation, result=result)
+
+
+def retry(verb: str, operation: str) -> None:
+    if enabled():
+        RETRIES.inc(verb=verb, operation=operation)
+
+
+def webhook(event: str, processed: bool, elapsed: float) -> None:
+    if enabled():
+        WEBHOOK_EVENTS.inc(event=event, processed=str(bool(processed)).lower())
+        WEBHOOK_DURATION.observe(elapsed, event=event)
+
+
+class UpstreamCall:
+    __slots__ = ("status_code",)
+
+    def __init__(self):
+        self.status_code = None
+
+
+@contextmanager
+def upstream(verb: str, operation: str):
+    """
+    time an http call to memberpress. set the status_code of the yielded
+    object once the response arrives. calls that raise before then are
+    counted with status_code="error".
+    """
+    call = UpstreamCall()
+    if not enabled():
+        yield call
+        return
+    start = time.monotonic()
+    try:
+        yield call
+    finally:
+        UPSTREAM_DURATION.observe(time.monotonic() - start, verb=verb, operation=operation)
+        UPSTREAM_REQUESTS.inc(verb=verb, operation=operation, status_code=call.status_code or "error")
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append("# HELP {name} {documentation}".format(name=metric.name, documentation=metric.documentation))
+        lines.append("# TYPE {name} {kind}".format(name=metric.name, kind=metric.kind))
+        for name, labels, value in metric.samples():
+            lines.append("{name}{labels} {value}".format(name=name, labels=format_labels(labels), value=value))
+    return "\n".join(lines) + "\n"
+
+
+def clear() -> None:
+    for metric in REGISTRY:
+        metric.clear()
+
+
+def metrics_view(request) -> HttpResponse:
+    if not is_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,24 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - middleware.
+"""
+# our stuff
+from memberpress_client.identity_map import identity_map
+
+
+class MemberIdentityMapMiddleware:
+    """
+    share Member objects across all code paths of a request.
+    see identity_map.py
+
+    settings.MIDDLEWARE += ["memberpress_client.middleware.MemberIdentityMapMiddleware"]
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with identity_map():
+            return self.get_response(request)
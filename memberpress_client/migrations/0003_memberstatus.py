@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:38
+
+from django.db import migrations, models
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberpress_client', '0002_auto_20221219_0316'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberStatus',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('user_id', models.IntegerField(blank=True, help_text='The Wordpress user ID provided by memberpress.', null=True, unique=True)),
+                ('username', models.CharField(help_text='The username provided by memberpress.', max_length=50, unique=True)),
+                ('is_active_subscription', models.BooleanField(blank=True, default=False, help_text='True if the member has at least one active subscription.')),
+                ('is_trial_subscription', models.BooleanField(blank=True, default=False, help_text='True if the member has at least one unexpired membership.')),
+                ('expires_at', models.DateTimeField(blank=True, help_text="The soonest expiration date of the member's active memberships, if any.", null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'memberpress member status',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:12
+
+from django.db import migrations, models
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberpress_client', '0003_memberstatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsernameIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('username', models.CharField(help_text='The username provided by memberpress.', max_length=50, unique=True)),
+                ('user_id', models.IntegerField(help_text='The Wordpress user ID provided by memberpress.', unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'memberpress username index',
+            },
+        ),
+    ]
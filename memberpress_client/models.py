@@ -4,7 +4,10 @@ Oct-2022
 
 memberpress REST API Client plugin for Django - Models.
 """
+from datetime import timedelta
 from email.policy import default
+from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 from django.db import models
 from model_utils.models import TimeStampedModel
@@ -65,3 +68,91 @@ class MemberpressEventLog(TimeStampedModel):
 
     def __str__(self):
         return str(self.created) + "-" + self.event
+
+
+class MemberStatus(TimeStampedModel):
+    """
+    compact, locally materialized paywall status of a member. kept current by
+    webhook events and by rest api lookups. see member_status.py
+    """
+
+    class Meta:
+        verbose_name_plural = "memberpress member status"
+
+    user_id = models.IntegerField(
+        blank=True,
+        null=True,
+        unique=True,
+        help_text=_("The Wordpress user ID provided by memberpress."),
+    )
+
+    username = models.CharField(
+        blank=False,
+        max_length=50,
+        unique=True,
+        help_text=_("The username provided by memberpress."),
+    )
+
+    is_active_subscription = models.BooleanField(
+        blank=True,
+        default=False,
+        help_text=_("True if the member has at least one active subscription."),
+    )
+
+    is_trial_subscription = models.BooleanField(
+        blank=True,
+        default=False,
+        help_text=_("True if the member has at least one unexpired membership."),
+    )
+
+    expires_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_("The soonest expiration date of the member's active memberships, if any."),
+    )
+
+    @property
+    def is_stale(self) -> bool:
+        """
+        True once the row is older than MEMBERPRESS_MEMBER_STATUS_EXPIRATION or
+        one of the member's memberships has expired since it was written.
+        """
+        now = timezone.now()
+        expiration = getattr(settings, "MEMBERPRESS_MEMBER_STATUS_EXPIRATION", 60 * 60 * 24)
+        if self.modified < now - timedelta(seconds=expiration):
+            return True
+        return bool(self.expires_at and self.expires_at <= now)
+
+    @property
+    def should_raise_paywall(self) -> bool:
+        return not (self.is_active_subscription or self.is_trial_subscription)
+
+    def __str__(self):
+        return self.username
+
+
+class UsernameIndex(TimeStampedModel):
+    """
+    persistent username -> Wordpress user id mapping, so that members can be
+    looked up with members/{id} rather than with the members?search= endpoint.
+    see username_index.py
+    """
+
+    class Meta:
+        verbose_name_plural = "memberpress username index"
+
+    username = models.CharField(
+        blank=False,
+        max_length=50,
+        unique=True,
+        help_text=_("The username provided by memberpress."),
+    )
+
+    user_id = models.IntegerField(
+        blank=False,
+        unique=True,
+        help_text=_("The Wordpress user ID provided by memberpress."),
+    )
+
+    def __str__(self):
+        return self.username
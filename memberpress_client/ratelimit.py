@@ -0,0 +1,215 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - outbound rate limiter.
+
+A token bucket per memberpress host, shared by all workers through the Django
+cache, implemented as GCRA (generic cell rate algorithm): the bucket is a single
+"theoretical arrival time" (TAT) per host. A call may start once the TAT is at
+most MEMBERPRESS_RATE_LIMIT_BURST - 1 emission intervals (1 / MEMBERPRESS_RATE_LIMIT
+seconds) ahead of now, and each call moves the TAT one interval further. Unused
+capacity carries over between seconds up to the bucket size, so at most
+MEMBERPRESS_RATE_LIMIT + MEMBERPRESS_RATE_LIMIT_BURST - 1 calls start in any one
+second span. With the default burst of 1, calls are spaced evenly and never more
+than MEMBERPRESS_RATE_LIMIT start in any one second.
+
+The Django cache has no atomic read-modify-write, so the TATs of a host are read
+and written under a short per-host lock taken with cache.add(), which is atomic
+on redis and memcached.
+
+Calls run at either interactive (the default) or batch priority. Batch calls,
+ie background refreshes, iter_members() and anything inside
+memberpress_priority(BATCH), must also conform to a second bucket with
+MEMBERPRESS_RATE_LIMIT_BATCH_SHARE of the rate and burst, so that they can
+never starve paywall checks.
+
+Interactive calls wait at most MEMBERPRESS_RATE_LIMIT_WAIT seconds for a token.
+Batch calls wait as long as it takes. Both are bounded by memberpress_deadline().
+RateLimitExceeded is raised when the wait runs out.
+"""
+# python stuff
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# django stuff
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+# our stuff
+from memberpress_client import deadline
+from memberpress_client.exceptions import RateLimitExceeded
+from memberpress_client.session import session_key
+
+logger = logging.getLogger(__name__)
+
+RATELIMIT_PREFIX = "MemberpressAPIClient.ratelimit:"
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# the per-host lock only guards a get_many() and a set_many()
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_RETRY = 0.001
+
+_priority = ContextVar("memberpress_priority", default=INTERACTIVE)
+
+
+def rate() -> int:
+    # requests per second. 0 disables the rate limiter
+    return getattr(settings, "MEMBERPRESS_RATE_LIMIT", 0)
+
+
+def burst() -> int:
+    # bucket size: how many calls may start back to back after an idle period
+    return max(1, getattr(settings, "MEMBERPRESS_RATE_LIMIT_BURST", 1))
+
+
+def batch_share() -> float:
+    return getattr(settings, "MEMBERPRESS_RATE_LIMIT_BATCH_SHARE", 0.5)
+
+
+def max_wait() -> float:
+    return getattr(settings, "MEMBERPRESS_RATE_LIMIT_WAIT", 1.0)
+
+
+@contextmanager
+def memberpress_priority(priority: str):
+    """
+    run the calls made inside the block at INTERACTIVE or BATCH priority.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def priority() -> str:
+    return _priority.get()
+
+
+def keys(url: str) -> dict:
+    host = session_key(url or settings.MEMBERPRESS_API_BASE_URL)
+    return {
+        name: "{prefix}{host}:{name}".format(prefix=RATELIMIT_PREFIX, host=host, name=name)
+        for name in ("lock", "shared", "batch")
+    }
+
+
+def buckets(url: str, current_priority: str) -> list:
+    """
+    (cache key, rate, burst) of each bucket that a call at current_priority takes a token from.
+    """
+    k = keys(url)
+    retval = [(k["shared"], rate(), burst())]
+    if current_priority == BATCH:
+        retval.append((k["batch"], max(1.0, rate() * batch_share()), max(1, math.floor(burst() * batch_share()))))
+    return retval
+
+
+def lock(key: str):
+    token = uuid.uuid4().hex
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key, token, LOCK_TIMEOUT):
+            return token
+        time.sleep(LOCK_RETRY)
+    return None
+
+
+def unlock(key: str, token: str) -> None:
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+def reserve(url: str, current_priority: str) -> float:
+    """
+    take a token from each bucket of url's host. returns 0 when the call may
+    start, otherwise the number of seconds until it may, and takes nothing.
+    """
+    lock_key = keys(url)["lock"]
+    token = lock(lock_key)
+    if token is None:
+        return LOCK_RETRY
+    try:
+        now = time.time()
+        bucket_list = buckets(url, current_priority)
+        tats = cache.get_many([key for key, _, _ in bucket_list])
+        wait = 0.0
+        updates = {}
+        for key, bucket_rate, bucket_burst in bucket_list:
+            interval = 1.0 / bucket_rate
+            tat = max(tats.get(key, now), now)
+            wait = max(wait, tat - (bucket_burst - 1) * interval - now)
+            updates[key] = tat + interval
+        if wait > 0:
+            return wait
+        # once the tat is in the past the bucket is full, and the key can go
+        cache.set_many(updates, math.ceil(max(updates.values()) - now) + 1)
+        return 0.0
+    finally:
+        unlock(lock_key, token)
+
+
+def try_acquire(url: str, current_priority: str) -> bool:
+    return reserve(url, current_priority) == 0
+
+
+def wait_budget(current_priority: str) -> float:
+    budget = math.inf if current_priority == BATCH else max_wait()
+    return deadline.clip(budget)
+
+
+def jittered(delay: float) -> float:
+    # a little jitter spreads out the waiters
+    return delay + random.uniform(0, 0.005)
+
+
+def acquire(url: str = None) -> None:
+    """
+    block until a token is available for url's host, or raise RateLimitExceeded.
+    """
+    if not rate():
+        return
+
+    current_priority = priority()
+    wait_until = time.monotonic() + wait_budget(current_priority)
+    while True:
+        delay = reserve(url, current_priority)
+        if not delay:
+            return
+        delay = jittered(delay)
+        if time.monotonic() + delay > wait_until:
+            raise RateLimitExceeded(
+                "no {priority} memberpress rate limit token available.".format(priority=current_priority)
+            )
+        logger.debug("rate limited. waiting {delay:.3f} seconds.".format(delay=delay))
+        time.sleep(delay)
+
+
+async def async_acquire(url: str = None) -> None:
+    """
+    acquire() for AsyncMemberpressAPIClient. waits without blocking the event loop.
+    """
+    if not rate():
+        return
+
+    current_priority = priority()
+    wait_until = time.monotonic() + wait_budget(current_priority)
+    while True:
+        delay = await sync_to_async(reserve, thread_sensitive=False)(url, current_priority)
+        if not delay:
+            return
+        delay = jittered(delay)
+        if time.monotonic() + delay > wait_until:
+            raise RateLimitExceeded(
+                "no {priority} memberpress rate limit token available.".format(priority=current_priority)
+            )
+        await asyncio.sleep(delay)
@@ -0,0 +1,111 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - redaction of sensitive values.
+
+The keys in MEMBERPRESS_SENSITIVE_KEYS are compiled once into a case-insensitive
+set, and redact() masks their values anywhere in a payload, including nested
+dicts and lists such as member profiles and addresses, in a single traversal.
+Containers are only copied when something inside them is masked, so the
+unchanged parts of a payload are shared with the original.
+
+Traversal stops after MEMBERPRESS_REDACTION_MAX_ITEMS keys and list items, or
+MAX_DEPTH levels of nesting. Whatever was not inspected is replaced by TRUNCATED
+rather than being passed on unmasked.
+"""
+# django stuff
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+REDACTED = "*** -- REDACTED -- ***"
+TRUNCATED = "*** -- TRUNCATED -- ***"
+TRUNCATED_KEY = "..."
+MAX_DEPTH = 32
+
+
+class Redactor:
+    def __init__(self, sensitive_keys, max_items: int = 0):
+        self.sensitive_keys = frozenset(key.lower() for key in sensitive_keys)
+        self.max_items = max_items or float("inf")
+
+    def is_sensitive(self, key) -> bool:
+        return type(key) == str and key.lower() in self.sensitive_keys
+
+    def redact(self, obj):
+        """
+        obj with the values of sensitive keys masked. returns obj itself when
+        there is nothing to mask.
+        """
+        return self._redact(obj, [self.max_items], 0)
+
+    def _redact(self, obj, budget: list, depth: int):
+        if type(obj) == dict:
+            return self._redact_dict(obj, budget, depth)
+        if type(obj) in (list, tuple):
+            return self._redact_list(obj, budget, depth)
+        return obj
+
+    def _redact_dict(self, obj: dict, budget: list, depth: int):
+        if depth >= MAX_DEPTH:
+            return TRUNCATED
+        copy = None
+        for position, (key, value) in enumerate(obj.items()):
+            budget[0] -= 1
+            if budget[0] < 0:
+                # keep what was inspected, and say how much was not
+                copy = dict(list((copy or obj).items())[:position])
+                copy[TRUNCATED_KEY] = "{count} more keys".format(count=len(obj) - position)
+                return copy
+            if self.is_sensitive(key):
+                redacted = REDACTED
+            else:
+                redacted = self._redact(value, budget, depth + 1)
+            if redacted is not value:
+                if copy is None:
+                    copy = dict(obj)
+                copy[key] = redacted
+        return obj if copy is None else copy
+
+    def _redact_list(self, obj, budget: list, depth: int):
+        if depth >= MAX_DEPTH:
+            return TRUNCATED
+        copy = None
+        for position, value in enumerate(obj):
+            budget[0] -= 1
+            if budget[0] < 0:
+                copy = list((copy or obj)[:position])
+                copy.append("{more} {count} more items".format(more=TRUNCATED_KEY, count=len(obj) - position))
+                return copy
+            redacted = self._redact(value, budget, depth + 1)
+            if redacted is not value:
+                if copy is None:
+                    copy = list(obj)
+                copy[position] = redacted
+        if copy is None:
+            return obj
+        return tuple(copy) if type(obj) == tuple else copy
+
+
+_redactor = None
+
+
+def redactor() -> Redactor:
+    global _redactor
+    if _redactor is None:
+        _redactor = Redactor(
+            settings.MEMBERPRESS_SENSITIVE_KEYS, getattr(settings, "MEMBERPRESS_REDACTION_MAX_ITEMS", 10000)
+        )
+    return _redactor
+
+
+def redact(obj):
+    return redactor().redact(obj)
+
+
+@receiver(setting_changed)
+def _recompile(setting, **kwargs) -> None:
+    global _redactor
+    if setting in ("MEMBERPRESS_SENSITIVE_KEYS", "MEMBERPRESS_REDACTION_MAX_ITEMS"):
+        _redactor = None
@@ -0,0 +1,142 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - retry policy for request_manager().
+
+Failed calls are retried with exponential backoff and full jitter, or after the
+delay that the server asked for in a Retry-After header. Which http status codes
+and transport errors are retried depends on the verb: idempotent verbs retry
+server errors and dropped connections, while post and patch only retry when the
+request was certainly not processed, ie a 429 or a connect timeout. httpx
+transport errors, raised by AsyncMemberpressAPIClient, are treated like their
+requests counterparts. No retry is
+attempted if it would start after the overall MEMBERPRESS_RETRY_DEADLINE, or
+after the end of the current memberpress_deadline().
+"""
+# python stuff
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, RequestException, Timeout
+
+# django stuff
+from django.conf import settings
+
+# our stuff
+from memberpress_client import deadline
+from memberpress_client.session import httpx
+
+logger = logging.getLogger(__name__)
+
+if httpx is not None:
+    TRANSPORT_ERRORS = (RequestException, httpx.TransportError)
+    IDEMPOTENT_EXCEPTIONS = (ConnectionError, Timeout, httpx.TransportError)
+    NON_IDEMPOTENT_EXCEPTIONS = (ConnectTimeout, httpx.ConnectTimeout)
+else:
+    TRANSPORT_ERRORS = (RequestException,)
+    IDEMPOTENT_EXCEPTIONS = (ConnectionError, Timeout)
+    NON_IDEMPOTENT_EXCEPTIONS = (ConnectTimeout,)
+
+IDEMPOTENT_POLICY = {"statuses": [429, 500, 502, 503, 504], "exceptions": IDEMPOTENT_EXCEPTIONS}
+NON_IDEMPOTENT_POLICY = {"statuses": [429], "exceptions": NON_IDEMPOTENT_EXCEPTIONS}
+
+DEFAULT_RETRY_POLICY = {
+    "get": IDEMPOTENT_POLICY,
+    "post": NON_IDEMPOTENT_POLICY,
+    "patch": NON_IDEMPOTENT_POLICY,
+}
+
+
+def max_attempts() -> int:
+    # 1 disables retries
+    return max(1, getattr(settings, "MEMBERPRESS_RETRY_MAX_ATTEMPTS", 3))
+
+
+def backoff_base() -> float:
+    return getattr(settings, "MEMBERPRESS_RETRY_BACKOFF", 0.2)
+
+
+def backoff_max() -> float:
+    return getattr(settings, "MEMBERPRESS_RETRY_BACKOFF_MAX", 5.0)
+
+
+def retry_deadline() -> float:
+    return getattr(settings, "MEMBERPRESS_RETRY_DEADLINE", 10.0)
+
+
+def policy(verb: str) -> dict:
+    """
+    the retry policy of verb. MEMBERPRESS_RETRY_POLICY can override the retried
+    status codes per verb, for example {"post": {"statuses": [429, 503]}}
+    """
+    retval = dict(DEFAULT_RETRY_POLICY.get(verb, NON_IDEMPOTENT_POLICY))
+    retval.update(getattr(settings, "MEMBERPRESS_RETRY_POLICY", {}).get(verb, {}))
+    return retval
+
+
+def retry_after(response) -> float:
+    """
+    the delay in seconds requested by a Retry-After header, either delta-seconds
+    or an http date. None if there is no usable header.
+    """
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After") if response.headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        logger.warning("ignoring unparseable Retry-After header {value}".format(value=value))
+        return None
+
+
+class Retry:
+    """
+    retry bookkeeping for one call of a method decorated by request_manager()
+    """
+
+    def __init__(self, verb: str) -> None:
+        self.verb = verb
+        self.policy = policy(verb)
+        self.attempt = 0
+        self.deadline = time.monotonic() + retry_deadline()
+
+    def is_retryable(self, e: Exception) -> bool:
+        if isinstance(e, HTTPError):
+            return e.response is not None and e.response.status_code in self.policy["statuses"]
+        return isinstance(e, self.policy["exceptions"])
+
+    def backoff(self, e: Exception) -> float:
+        """
+        the number of seconds to wait before retrying after e, or None to give up.
+        """
+        self.attempt += 1
+        if self.attempt >= max_attempts() or not self.is_retryable(e):
+            return None
+
+        delay = retry_after(getattr(e, "response", None))
+        if delay is None:
+            # full jitter
+            delay = random.uniform(0, min(backoff_max(), backoff_base() * 2 ** (self.attempt - 1)))
+
+        if time.monotonic() + delay > self.deadline or deadline.clip(delay) < delay:
+            logger.warning(
+                "not retrying {verb}: the next attempt would exceed the retry deadline.".format(verb=self.verb)
+            )
+            return None
+
+        logger.warning(
+            "retrying {verb} in {delay:.2f} seconds after attempt {attempt} failed: {e}".format(
+                verb=self.verb, delay=delay, attempt=self.attempt, e=e
+            )
+        )
+        return delay
@@ -0,0 +1,145 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - pooled http sessions.
+
+All MemberpressAPIClient instances (Member, Subscription, Transaction, ...)
+share one requests.Session per base url so that keep-alive connections and
+their TLS sessions are reused across calls, rather than paying a fresh
+TCP + TLS handshake on every cache miss.
+
+AsyncMemberpressAPIClient uses an httpx.AsyncClient per event loop and host
+when httpx is installed (pip install django-memberpress-client[async]).
+"""
+# python stuff
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    # optional dependency. AsyncMemberpressAPIClient falls back to running
+    # the pooled requests session in the event loop's default executor.
+    httpx = None
+
+# django stuff
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# event loop -> {(host, verify): httpx.AsyncClient}. httpx clients are bound to
+# the loop that created them, and they are only touched from that loop's thread.
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def session_key(base_url: str) -> str:
+    """
+    scheme://host:port of the url. all paths on the same host share a pool.
+    """
+    parts = urlsplit(base_url or "")
+    return "{scheme}://{netloc}".format(scheme=parts.scheme, netloc=parts.netloc)
+
+
+def build_session() -> requests.Session:
+    """
+    create a requests.Session with a connection pool sized according to
+    the MEMBERPRESS_HTTP_* settings.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=getattr(settings, "MEMBERPRESS_HTTP_POOL_CONNECTIONS", 4),
+        pool_maxsize=getattr(settings, "MEMBERPRESS_HTTP_POOL_MAXSIZE", 10),
+        pool_block=getattr(settings, "MEMBERPRESS_HTTP_POOL_BLOCK", False),
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not getattr(settings, "MEMBERPRESS_HTTP_KEEP_ALIVE", True):
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session(base_url: str = None) -> requests.Session:
+    """
+    return the process-wide session for base_url, creating it on first use.
+    requests.Session and its urllib3 pools are safe to share between threads
+    for plain request/response calls like the ones made by MemberpressAPIClient.
+    """
+    key = session_key(base_url or settings.MEMBERPRESS_API_BASE_URL)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = build_session()
+            _sessions[key] = session
+            logger.debug("created pooled http session for {key}".format(key=key))
+    return session
+
+
+def get_async_session(base_url: str = None, verify: bool = True):
+    """
+    return the httpx.AsyncClient for base_url on the running event loop, or
+    None if httpx is not installed.
+    """
+    if httpx is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    sessions = _async_sessions.setdefault(loop, {})
+    key = (session_key(base_url or settings.MEMBERPRESS_API_BASE_URL), verify)
+    session = sessions.get(key)
+    if session is None or session.is_closed:
+        maxsize = getattr(settings, "MEMBERPRESS_HTTP_POOL_MAXSIZE", 10)
+        keep_alive = getattr(settings, "MEMBERPRESS_HTTP_KEEP_ALIVE", True)
+        session = httpx.AsyncClient(
+            verify=verify,
+            limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize if keep_alive else 0),
+        )
+        sessions[key] = session
+        logger.debug("created pooled async http session for {key}".format(key=key))
+    return session
+
+
+async def aclose_sessions() -> None:
+    """
+    close the async sessions that belong to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    for session in _async_sessions.pop(loop, {}).values():
+        await session.aclose()
+
+
+def close_sessions() -> None:
+    """
+    close and forget all pooled sessions. mostly useful for tests and for
+    forked worker processes that should not share sockets with their parent.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _reset_after_fork() -> None:
+    # a forked worker must not reuse the parent's sockets.
+    global _sessions_lock
+    _sessions_lock = threading.Lock()
+    _sessions.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -25,6 +25,59 @@ env = environ.Env(
             "secret",
         ],
     ),
+    MEMBERPRESS_REDACTION_MAX_ITEMS=(int, 10000),
+    MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE=(float, 1.0),
+    MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH=(int, 4096),
+    MEMBERPRESS_HTTP_POOL_CONNECTIONS=(int, 4),
+    MEMBERPRESS_HTTP_POOL_MAXSIZE=(int, 10),
+    MEMBERPRESS_HTTP_POOL_BLOCK=(bool, False),
+    MEMBERPRESS_HTTP_KEEP_ALIVE=(bool, True),
+    MEMBERPRESS_CACHE_STALE_EXPIRATION=(int, 60 * 60 * 24 * 7),
+    MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT=(int, 10),
+    MEMBERPRESS_SINGLE_FLIGHT_WAIT=(float, 2.0),
+    MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL=(float, 0.05),
+    MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE=(bool, False),
+    MEMBERPRESS_CACHE_SOFT_EXPIRATION=(int, 60 * 60),
+    MEMBERPRESS_CACHE_SOFT_RATIO=(float, 0.5),
+    MEMBERPRESS_CACHE_REFRESH_WORKERS=(int, 4),
+    MEMBERPRESS_CACHE_REFRESH_HOOK=(str, ""),
+    MEMBERPRESS_CACHE_JITTER=(float, 0.1),
+    MEMBERPRESS_CACHE_EARLY_REFRESH_BETA=(float, 1.0),
+    MEMBERPRESS_CACHE_EXPIRY_AWARE=(bool, False),
+    MEMBERPRESS_CONDITIONAL_GET=(bool, True),
+    MEMBERPRESS_METRICS=(bool, False),
+    MEMBERPRESS_METRICS_TOKEN=(str, ""),
+    MEMBERPRESS_CACHE_MIN_EXPIRATION=(int, 60),
+    MEMBERPRESS_CACHE_MAX_EXPIRATION=(int, 60 * 60 * 24 * 7),
+    MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION=(int, 60 * 5),
+    MEMBERPRESS_MEMBER_STATUS_STORE=(bool, False),
+    MEMBERPRESS_MEMBER_STATUS_EXPIRATION=(int, 60 * 60 * 24),
+    MEMBERPRESS_USERNAME_INDEX=(bool, False),
+    MEMBERPRESS_BULK_MAX_WORKERS=(int, 8),
+    MEMBERPRESS_RETRY_MAX_ATTEMPTS=(int, 3),
+    MEMBERPRESS_RETRY_BACKOFF=(float, 0.2),
+    MEMBERPRESS_RETRY_BACKOFF_MAX=(float, 5.0),
+    MEMBERPRESS_RETRY_DEADLINE=(float, 10.0),
+    MEMBERPRESS_CIRCUIT_BREAKER=(bool, True),
+    MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD=(int, 5),
+    MEMBERPRESS_CIRCUIT_FAILURE_WINDOW=(int, 60),
+    MEMBERPRESS_CIRCUIT_SLOW_CALL=(float, 5.0),
+    MEMBERPRESS_CIRCUIT_OPEN_DURATION=(int, 30),
+    MEMBERPRESS_CIRCUIT_OPEN_POLICY=(str, "fail-closed"),
+    MEMBERPRESS_HTTP_CONNECT_TIMEOUT=(float, 3.05),
+    MEMBERPRESS_HTTP_READ_TIMEOUT=(float, 10.0),
+    MEMBERPRESS_RATE_LIMIT=(int, 0),
+    MEMBERPRESS_RATE_LIMIT_BURST=(int, 1),
+    MEMBERPRESS_RATE_LIMIT_BATCH_SHARE=(float, 0.5),
+    MEMBERPRESS_RATE_LIMIT_WAIT=(float, 1.0),
+    MEMBERPRESS_LOCAL_CACHE=(bool, False),
+    MEMBERPRESS_LOCAL_CACHE_TIMEOUT=(float, 5),
+    MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES=(int, 1000),
+    MEMBERPRESS_LOCAL_CACHE_MAX_BYTES=(int, 10 * 1024 * 1024),
+    MEMBERPRESS_CACHE_CODEC=(str, "pickle"),
+    MEMBERPRESS_CACHE_COMPRESSION=(str, "zlib"),
+    MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES=(int, 1024),
+    MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS=(list, []),
 )
 
 # path to this file.
@@ -46,5 +99,58 @@ def plugin_settings(settings):
     settings.MEMBERPRESS_API_KEY_NAME = env("MEMBERPRESS_API_KEY_NAME")  # noqa: F841
     settings.MEMBERPRESS_CACHE_EXPIRATION = env("MEMBERPRESS_CACHE_EXPIRATION")  # noqa: F841
     settings.MEMBERPRESS_SENSITIVE_KEYS = env("MEMBERPRESS_SENSITIVE_KEYS")  # noqa: F841
+    settings.MEMBERPRESS_REDACTION_MAX_ITEMS = env("MEMBERPRESS_REDACTION_MAX_ITEMS")  # noqa: F841
+    settings.MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE = env("MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE")  # noqa: F841
+    settings.MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH = env("MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_POOL_CONNECTIONS = env("MEMBERPRESS_HTTP_POOL_CONNECTIONS")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_POOL_MAXSIZE = env("MEMBERPRESS_HTTP_POOL_MAXSIZE")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_POOL_BLOCK = env("MEMBERPRESS_HTTP_POOL_BLOCK")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_KEEP_ALIVE = env("MEMBERPRESS_HTTP_KEEP_ALIVE")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_STALE_EXPIRATION = env("MEMBERPRESS_CACHE_STALE_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT = env("MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT")  # noqa: F841
+    settings.MEMBERPRESS_SINGLE_FLIGHT_WAIT = env("MEMBERPRESS_SINGLE_FLIGHT_WAIT")  # noqa: F841
+    settings.MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL = env("MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE = env("MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_SOFT_EXPIRATION = env("MEMBERPRESS_CACHE_SOFT_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_SOFT_RATIO = env("MEMBERPRESS_CACHE_SOFT_RATIO")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_REFRESH_WORKERS = env("MEMBERPRESS_CACHE_REFRESH_WORKERS")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_REFRESH_HOOK = env("MEMBERPRESS_CACHE_REFRESH_HOOK")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_JITTER = env("MEMBERPRESS_CACHE_JITTER")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_EARLY_REFRESH_BETA = env("MEMBERPRESS_CACHE_EARLY_REFRESH_BETA")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_EXPIRY_AWARE = env("MEMBERPRESS_CACHE_EXPIRY_AWARE")  # noqa: F841
+    settings.MEMBERPRESS_CONDITIONAL_GET = env("MEMBERPRESS_CONDITIONAL_GET")  # noqa: F841
+    settings.MEMBERPRESS_METRICS = env("MEMBERPRESS_METRICS")  # noqa: F841
+    settings.MEMBERPRESS_METRICS_TOKEN = env("MEMBERPRESS_METRICS_TOKEN")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_MIN_EXPIRATION = env("MEMBERPRESS_CACHE_MIN_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_MAX_EXPIRATION = env("MEMBERPRESS_CACHE_MAX_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION = env("MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_MEMBER_STATUS_STORE = env("MEMBERPRESS_MEMBER_STATUS_STORE")  # noqa: F841
+    settings.MEMBERPRESS_MEMBER_STATUS_EXPIRATION = env("MEMBERPRESS_MEMBER_STATUS_EXPIRATION")  # noqa: F841
+    settings.MEMBERPRESS_USERNAME_INDEX = env("MEMBERPRESS_USERNAME_INDEX")  # noqa: F841
+    settings.MEMBERPRESS_BULK_MAX_WORKERS = env("MEMBERPRESS_BULK_MAX_WORKERS")  # noqa: F841
+    settings.MEMBERPRESS_RETRY_MAX_ATTEMPTS = env("MEMBERPRESS_RETRY_MAX_ATTEMPTS")  # noqa: F841
+    settings.MEMBERPRESS_RETRY_BACKOFF = env("MEMBERPRESS_RETRY_BACKOFF")  # noqa: F841
+    settings.MEMBERPRESS_RETRY_BACKOFF_MAX = env("MEMBERPRESS_RETRY_BACKOFF_MAX")  # noqa: F841
+    settings.MEMBERPRESS_RETRY_DEADLINE = env("MEMBERPRESS_RETRY_DEADLINE")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_BREAKER = env("MEMBERPRESS_CIRCUIT_BREAKER")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD = env("MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_FAILURE_WINDOW = env("MEMBERPRESS_CIRCUIT_FAILURE_WINDOW")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_SLOW_CALL = env("MEMBERPRESS_CIRCUIT_SLOW_CALL")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_OPEN_DURATION = env("MEMBERPRESS_CIRCUIT_OPEN_DURATION")  # noqa: F841
+    settings.MEMBERPRESS_CIRCUIT_OPEN_POLICY = env("MEMBERPRESS_CIRCUIT_OPEN_POLICY")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_CONNECT_TIMEOUT = env("MEMBERPRESS_HTTP_CONNECT_TIMEOUT")  # noqa: F841
+    settings.MEMBERPRESS_HTTP_READ_TIMEOUT = env("MEMBERPRESS_HTTP_READ_TIMEOUT")  # noqa: F841
+    settings.MEMBERPRESS_RATE_LIMIT = env("MEMBERPRESS_RATE_LIMIT")  # noqa: F841
+    settings.MEMBERPRESS_RATE_LIMIT_BURST = env("MEMBERPRESS_RATE_LIMIT_BURST")  # noqa: F841
+    settings.MEMBERPRESS_RATE_LIMIT_BATCH_SHARE = env("MEMBERPRESS_RATE_LIMIT_BATCH_SHARE")  # noqa: F841
+    settings.MEMBERPRESS_RATE_LIMIT_WAIT = env("MEMBERPRESS_RATE_LIMIT_WAIT")  # noqa: F841
+    settings.MEMBERPRESS_LOCAL_CACHE = env("MEMBERPRESS_LOCAL_CACHE")  # noqa: F841
+    settings.MEMBERPRESS_LOCAL_CACHE_TIMEOUT = env("MEMBERPRESS_LOCAL_CACHE_TIMEOUT")  # noqa: F841
+    settings.MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES = env("MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES")  # noqa: F841
+    settings.MEMBERPRESS_LOCAL_CACHE_MAX_BYTES = env("MEMBERPRESS_LOCAL_CACHE_MAX_BYTES")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_CODEC = env("MEMBERPRESS_CACHE_CODEC")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_COMPRESSION = env("MEMBERPRESS_CACHE_COMPRESSION")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES = env("MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES")  # noqa: F841
+    settings.MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS = env("MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS")  # noqa: F841
 
     settings.MAKO_TEMPLATE_DIRS_BASE.extend([TEMPLATES_DIR])
@@ -39,6 +39,59 @@ MEMBERPRESS_SENSITIVE_KEYS = env.list("MEMBERPRESS_SENSITIVE_KEYS") or [
     "Authorization",
     "secret",
 ]
+MEMBERPRESS_REDACTION_MAX_ITEMS = env.int("MEMBERPRESS_REDACTION_MAX_ITEMS", 10000)
+MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE = env.float("MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH = env.int("MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH", 4096)
+MEMBERPRESS_HTTP_POOL_CONNECTIONS = env.int("MEMBERPRESS_HTTP_POOL_CONNECTIONS", 4)
+MEMBERPRESS_HTTP_POOL_MAXSIZE = env.int("MEMBERPRESS_HTTP_POOL_MAXSIZE", 10)
+MEMBERPRESS_HTTP_POOL_BLOCK = env.bool("MEMBERPRESS_HTTP_POOL_BLOCK", False)
+MEMBERPRESS_HTTP_KEEP_ALIVE = env.bool("MEMBERPRESS_HTTP_KEEP_ALIVE", True)
+MEMBERPRESS_CACHE_STALE_EXPIRATION = env.int("MEMBERPRESS_CACHE_STALE_EXPIRATION", 60 * 60 * 24 * 7)
+MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT = env.int("MEMBERPRESS_SINGLE_FLIGHT_LEASE_TIMEOUT", 10)
+MEMBERPRESS_SINGLE_FLIGHT_WAIT = env.float("MEMBERPRESS_SINGLE_FLIGHT_WAIT", 2.0)
+MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL = env.float("MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL", 0.05)
+MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE = env.bool("MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE", False)
+MEMBERPRESS_CACHE_SOFT_EXPIRATION = env.int("MEMBERPRESS_CACHE_SOFT_EXPIRATION", 60 * 60)
+MEMBERPRESS_CACHE_SOFT_RATIO = env.float("MEMBERPRESS_CACHE_SOFT_RATIO", 0.5)
+MEMBERPRESS_CACHE_REFRESH_WORKERS = env.int("MEMBERPRESS_CACHE_REFRESH_WORKERS", 4)
+MEMBERPRESS_CACHE_REFRESH_HOOK = env.str("MEMBERPRESS_CACHE_REFRESH_HOOK", "")
+MEMBERPRESS_CACHE_JITTER = env.float("MEMBERPRESS_CACHE_JITTER", 0.1)
+MEMBERPRESS_CACHE_EARLY_REFRESH_BETA = env.float("MEMBERPRESS_CACHE_EARLY_REFRESH_BETA", 1.0)
+MEMBERPRESS_CACHE_EXPIRY_AWARE = env.bool("MEMBERPRESS_CACHE_EXPIRY_AWARE", False)
+MEMBERPRESS_CONDITIONAL_GET = env.bool("MEMBERPRESS_CONDITIONAL_GET", True)
+MEMBERPRESS_METRICS = env.bool("MEMBERPRESS_METRICS", False)
+MEMBERPRESS_METRICS_TOKEN = env.str("MEMBERPRESS_METRICS_TOKEN", "")
+MEMBERPRESS_CACHE_MIN_EXPIRATION = env.int("MEMBERPRESS_CACHE_MIN_EXPIRATION", 60)
+MEMBERPRESS_CACHE_MAX_EXPIRATION = env.int("MEMBERPRESS_CACHE_MAX_EXPIRATION", 60 * 60 * 24 * 7)
+MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION = env.int("MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION", 60 * 5)
+MEMBERPRESS_MEMBER_STATUS_STORE = env.bool("MEMBERPRESS_MEMBER_STATUS_STORE", False)
+MEMBERPRESS_MEMBER_STATUS_EXPIRATION = env.int("MEMBERPRESS_MEMBER_STATUS_EXPIRATION", 60 * 60 * 24)
+MEMBERPRESS_USERNAME_INDEX = env.bool("MEMBERPRESS_USERNAME_INDEX", False)
+MEMBERPRESS_BULK_MAX_WORKERS = env.int("MEMBERPRESS_BULK_MAX_WORKERS", 8)
+MEMBERPRESS_RETRY_MAX_ATTEMPTS = env.int("MEMBERPRESS_RETRY_MAX_ATTEMPTS", 3)
+MEMBERPRESS_RETRY_BACKOFF = env.float("MEMBERPRESS_RETRY_BACKOFF", 0.2)
+MEMBERPRESS_RETRY_BACKOFF_MAX = env.float("MEMBERPRESS_RETRY_BACKOFF_MAX", 5.0)
+MEMBERPRESS_RETRY_DEADLINE = env.float("MEMBERPRESS_RETRY_DEADLINE", 10.0)
+MEMBERPRESS_CIRCUIT_BREAKER = env.bool("MEMBERPRESS_CIRCUIT_BREAKER", True)
+MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD = env.int("MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD", 5)
+MEMBERPRESS_CIRCUIT_FAILURE_WINDOW = env.int("MEMBERPRESS_CIRCUIT_FAILURE_WINDOW", 60)
+MEMBERPRESS_CIRCUIT_SLOW_CALL = env.float("MEMBERPRESS_CIRCUIT_SLOW_CALL", 5.0)
+MEMBERPRESS_CIRCUIT_OPEN_DURATION = env.int("MEMBERPRESS_CIRCUIT_OPEN_DURATION", 30)
+MEMBERPRESS_CIRCUIT_OPEN_POLICY = env.str("MEMBERPRESS_CIRCUIT_OPEN_POLICY", "fail-closed")
+MEMBERPRESS_HTTP_CONNECT_TIMEOUT = env.float("MEMBERPRESS_HTTP_CONNECT_TIMEOUT", 3.05)
+MEMBERPRESS_HTTP_READ_TIMEOUT = env.float("MEMBERPRESS_HTTP_READ_TIMEOUT", 10.0)
+MEMBERPRESS_RATE_LIMIT = env.int("MEMBERPRESS_RATE_LIMIT", 0)
+MEMBERPRESS_RATE_LIMIT_BURST = env.int("MEMBERPRESS_RATE_LIMIT_BURST", 1)
+MEMBERPRESS_RATE_LIMIT_BATCH_SHARE = env.float("MEMBERPRESS_RATE_LIMIT_BATCH_SHARE", 0.5)
+MEMBERPRESS_RATE_LIMIT_WAIT = env.float("MEMBERPRESS_RATE_LIMIT_WAIT", 1.0)
+MEMBERPRESS_LOCAL_CACHE = env.bool("MEMBERPRESS_LOCAL_CACHE", False)
+MEMBERPRESS_LOCAL_CACHE_TIMEOUT = env.float("MEMBERPRESS_LOCAL_CACHE_TIMEOUT", 5)
+MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES = env.int("MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES", 1000)
+MEMBERPRESS_LOCAL_CACHE_MAX_BYTES = env.int("MEMBERPRESS_LOCAL_CACHE_MAX_BYTES", 10 * 1024 * 1024)
+MEMBERPRESS_CACHE_CODEC = env.str("MEMBERPRESS_CACHE_CODEC", "pickle")
+MEMBERPRESS_CACHE_COMPRESSION = env.str("MEMBERPRESS_CACHE_COMPRESSION", "zlib")
+MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES = env.int("MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES", 1024)
+MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS = env.list("MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS", default=[])
 
 # -----------------------------------------------------------------------------
 # Required to run ./manage.py runserver
@@ -221,4 +274,5 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "memberpress_client.middleware.MemberIdentityMapMiddleware",
 ]
@@ -120,6 +120,10 @@ class Subscription(MemberpressAPIClient):
     def created_at(self) -> datetime:
         return self.str2datetime(self.json.get("created_at"))
 
+    @property
+    def expires_at(self) -> datetime:
+        return self.str2datetime(self.json.get("expires_at"))
+
     @property
     def total(self) -> float:
         return self.str2float(self.json["total"])
@@ -0,0 +1,462 @@
+import asyncio
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import HTTPError
+
+from memberpress_client import local_cache
+from memberpress_client.caching import (
+    acquire_lease,
+    cache_policy,
+    get_negative,
+    get_stale,
+    get_validated,
+    invalidate,
+    is_negative,
+    jittered,
+    make_entry,
+    refresh_early,
+    release_lease,
+    submit,
+    unwrap,
+)
+from memberpress_client.client import AsyncMemberpressAPIClient, MemberpressAPIClient
+from memberpress_client.constants import MemberPressAPI_Endpoints
+from memberpress_client.member import Member
+from memberpress_client.tests.test_client import MockResponse
+
+
+class SlowMockResponse(MockResponse):
+    def json(self):
+        time.sleep(0.2)
+        return self.json_data
+
+
+@override_settings(MEMBERPRESS_SINGLE_FLIGHT_WAIT=0.5, MEMBERPRESS_SINGLE_FLIGHT_POLL_INTERVAL=0.01)
+class TestSingleFlight(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.cache_key = self.api_client.cache_key(self.api_client.get_url("test"))
+
+    def test_lease(self):
+        token = acquire_lease(self.cache_key)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_lease(self.cache_key))
+        release_lease(self.cache_key, "someone-elses-token")
+        self.assertIsNone(acquire_lease(self.cache_key))
+        release_lease(self.cache_key, token)
+        self.assertIsNotNone(acquire_lease(self.cache_key))
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_fetch_sets_stale_value(self, mock_get):
+        self.api_client.get("test")
+        self.assertEqual(get_stale(self.cache_key), {"foo": "bar"})
+        # the lease is released once the value is cached
+        self.assertIsNotNone(acquire_lease(self.cache_key))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_one_copy_per_response(self, mock_get):
+        # the last known good value is the entry itself, not a second copy
+        payload = {"foo": os.urandom(8000).hex()}
+        mock_get.return_value = MockResponse(payload, 200)
+        writes = {}
+        cache_set = cache.set
+
+        def record(key, value, *args, **kwargs):
+            writes[key] = len(pickle.dumps(value))
+            cache_set(key, value, *args, **kwargs)
+
+        with patch("memberpress_client.caching.cache.set", side_effect=record):
+            self.api_client.get("test")
+        entry_size = writes.pop(self.cache_key)
+        self.assertGreater(entry_size, 8000)
+        self.assertLess(sum(writes.values()), 1000)
+        self.assertEqual(get_stale(self.cache_key), payload)
+
+        invalidate(self.cache_key)
+        self.assertIsNone(unwrap(cache.get(self.cache_key))[0])
+        self.assertEqual(get_stale(self.cache_key), payload)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_waits_for_lease_holder(self, mock_get):
+        acquire_lease(self.cache_key)
+        timer = threading.Timer(0.1, cache.set, args=(self.cache_key, {"foo": "from-lease-holder"}))
+        timer.start()
+        self.assertEqual(self.api_client.get("test"), {"foo": "from-lease-holder"})
+        timer.join()
+        self.assertEqual(mock_get.call_count, 0)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_serves_stale_value_while_leased(self, mock_get):
+        self.api_client.get("test")
+        invalidate(self.cache_key)
+        acquire_lease(self.cache_key)
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_fetches_when_lease_holder_never_delivers(self, mock_get):
+        acquire_lease(self.cache_key)
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_lease_holder_rechecks_the_cache(self, mock_get):
+        cache.set(self.cache_key, {"foo": "from-previous-holder"})
+        # the previous lease holder stored its value between our cache miss and acquire_lease()
+        with patch("memberpress_client.client.cache_get", return_value=None):
+            self.assertEqual(self.api_client.get("test"), {"foo": "from-previous-holder"})
+        self.assertEqual(mock_get.call_count, 0)
+        self.assertIsNotNone(acquire_lease(self.cache_key))
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=SlowMockResponse({"foo": "bar"}, 200))
+    def test_concurrent_misses_make_one_request(self, mock_get):
+        results = []
+
+        def lookup():
+            results.append(MemberpressAPIClient().get("test"))
+
+        threads = [threading.Thread(target=lookup) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [{"foo": "bar"}] * 5)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", side_effect=ValueError("boom"))
+    def test_exception_releases_locks(self, mock_get):
+        with self.assertRaises(ValueError):
+            self.api_client.get("test")
+        self.assertFalse(self.api_client.locked)
+        self.assertIsNotNone(acquire_lease(self.cache_key))
+
+
+@override_settings(MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE=True, MEMBERPRESS_CACHE_SOFT_EXPIRATION=0)
+class TestStaleWhileRevalidate(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_entry(self):
+        value, is_stale = unwrap(make_entry({"foo": "bar"}, 60))
+        self.assertEqual(value, {"foo": "bar"})
+        self.assertTrue(is_stale)
+        with override_settings(MEMBERPRESS_CACHE_STALE_WHILE_REVALIDATE=False):
+            self.assertEqual(unwrap(make_entry({"foo": "bar"}, 60)), ({"foo": "bar"}, False))
+        # values cached by earlier versions are fresh
+        self.assertEqual(unwrap({"foo": "bar"}), ({"foo": "bar"}, False))
+
+    @override_settings(MEMBERPRESS_CACHE_EXPIRATION=60 * 60, MEMBERPRESS_CACHE_SOFT_EXPIRATION=60 * 60)
+    @patch("memberpress_client.caching.time.time", return_value=1000.0)
+    def test_shipped_defaults_leave_a_stale_window(self, mock_time):
+        # equal soft and hard expirations, as in settings/local.py
+        entry = make_entry({"foo": "bar"}, jittered(60 * 60, cache_policy()["jitter"]))
+        self.assertLess(entry["soft_expires_at"], entry["expires_at"])
+        self.assertEqual(unwrap(entry), ({"foo": "bar"}, False))
+        mock_time.return_value = entry["soft_expires_at"] + 1
+        self.assertEqual(unwrap(entry), ({"foo": "bar"}, True))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_serves_stale_and_refreshes_in_background(self, mock_get):
+        mock_get.side_effect = [MockResponse({"version": 1}, 200), MockResponse({"version": 2}, 200)]
+        api_client = MemberpressAPIClient()
+        self.assertEqual(api_client.get("test"), {"version": 1})
+
+        futures = []
+        with patch("memberpress_client.client.submit", side_effect=lambda *args: futures.append(submit(*args))):
+            # the soft-expired value is returned immediately ...
+            self.assertEqual(api_client.get("test"), {"version": 1})
+        # ... and replaced once the background refresh completes
+        self.assertEqual(len(futures), 1)
+        futures[0].result(timeout=5)
+        self.assertEqual(mock_get.call_count, 2)
+        cache_key = api_client.cache_key(api_client.get_url("test"))
+        self.assertEqual(unwrap(cache.get(cache_key))[0], {"version": 2})
+        # the refresh lease was released
+        self.assertIsNotNone(acquire_lease(cache_key))
+
+    @patch("memberpress_client.client.submit")
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_one_refresh_at_a_time(self, mock_get, mock_submit):
+        api_client = MemberpressAPIClient()
+        api_client.get("test")
+        api_client.get("test")
+        api_client.get("test")
+        self.assertEqual(mock_submit.call_count, 1)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(MEMBERPRESS_CACHE_REFRESH_HOOK="memberpress_client.tasks.refresh")
+    @patch("memberpress_client.caching.import_string")
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_refresh_hook(self, mock_get, mock_import_string):
+        api_client = MemberpressAPIClient()
+        api_client.get("test")
+        self.assertEqual(api_client.get("test"), {"foo": "bar"})
+        mock_import_string.assert_called_once_with("memberpress_client.tasks.refresh")
+        mock_import_string.return_value.assert_called_once_with(
+            url=api_client.get_url("test"), params=None, operation=""
+        )
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestEarlyExpiration(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_jittered(self):
+        timeouts = {jittered(1000, 0.1) for _ in range(50)}
+        self.assertTrue(all(900 <= timeout <= 1000 for timeout in timeouts))
+        self.assertGreater(len(timeouts), 1)
+        self.assertEqual(jittered(1000, 0), 1000)
+
+    @override_settings(
+        MEMBERPRESS_CACHE_EXPIRATION=600,
+        MEMBERPRESS_CACHE_POLICIES={"get_member": {"expiration": 60, "beta": 0}},
+    )
+    def test_cache_policy(self):
+        self.assertEqual(cache_policy()["expiration"], 600)
+        self.assertEqual(cache_policy("get_member"), {"expiration": 60, "jitter": 0.1, "beta": 0})
+
+    def test_refresh_early(self):
+        # far from expiring
+        self.assertFalse(refresh_early(make_entry({"foo": "bar"}, 3600, delta=0.1, beta=1.0)))
+        # within delta of expiring, with a large beta
+        self.assertTrue(refresh_early(make_entry({"foo": "bar"}, 1, delta=10, beta=100.0)))
+        # disabled
+        self.assertFalse(refresh_early(make_entry({"foo": "bar"}, 1, delta=10, beta=0)))
+        # values cached by earlier versions
+        self.assertFalse(refresh_early({"foo": "bar"}))
+
+    @patch("memberpress_client.client.submit")
+    @patch("memberpress_client.client.refresh_early", return_value=True)
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_refreshes_early_in_background(self, mock_get, mock_refresh_early, mock_submit):
+        api_client = MemberpressAPIClient()
+        api_client.get("test")
+        self.assertEqual(api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_submit.call_count, 1)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+@override_settings(MEMBERPRESS_CACHE_MIN_EXPIRATION=60, MEMBERPRESS_CACHE_MAX_EXPIRATION=86400)
+class TestExpiryAwareExpiration(SimpleTestCase):
+    def setUp(self):
+        self.api_client = MemberpressAPIClient()
+
+    def date(self, **kwargs) -> str:
+        return (datetime.now() + timedelta(**kwargs)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def test_soonest_expiration(self):
+        member = {
+            "id": 1,
+            "username": "jon",
+            "active_memberships": [{"expire_fixed": "0000-00-00 00:00:00"}],
+            "recent_transactions": [{"expires_at": self.date(hours=-1)}, {"expires_at": self.date(hours=2)}],
+            "latest_txn": {"expires_at": self.date(hours=1)},
+        }
+        self.assertAlmostEqual(self.api_client.entitlement_timeout(member), 3600, delta=5)
+
+    def test_bounds(self):
+        soon = {"id": 1, "username": "jon", "latest_txn": {"expires_at": self.date(seconds=5)}}
+        self.assertEqual(self.api_client.entitlement_timeout(soon), 60)
+        later = {"id": 1, "username": "jon", "latest_txn": {"expires_at": self.date(days=30)}}
+        self.assertEqual(self.api_client.entitlement_timeout(later), 86400)
+        # lifetime memberships
+        self.assertEqual(self.api_client.entitlement_timeout({"id": 1, "username": "jon"}), 86400)
+
+    @override_settings(MEMBERPRESS_CACHE_EXPIRY_AWARE=True, MEMBERPRESS_CACHE_JITTER=0)
+    @patch("memberpress_client.client.caching.cache_set")
+    def test_cache_set(self, mock_cache_set):
+        member = {"id": 1, "username": "jon", "latest_txn": {"expires_at": self.date(hours=1)}}
+        self.api_client.cache_set("key", member)
+        self.assertAlmostEqual(mock_cache_set.call_args.args[2], 3600, delta=5)
+
+
+class NotModifiedResponse(MockResponse):
+    def __init__(self):
+        super().__init__(None, 304)
+
+    def json(self):
+        raise AssertionError("a 304 has no body")
+
+
+class TestConditionalGet(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.cache_key = self.api_client.cache_key(self.api_client.get_url("test"))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_not_modified(self, mock_get):
+        mock_get.return_value = MockResponse({"foo": "bar"}, 200, headers={"ETag": '"v1"'})
+        self.api_client.get("test")
+        self.assertEqual(get_validated(self.cache_key)[1]["etag"], '"v1"')
+
+        invalidate(self.cache_key)
+        mock_get.return_value = NotModifiedResponse()
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+        # the entry is cached again
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_unchanged_body_is_not_decoded(self, mock_get):
+        self.api_client.get("test")
+        self.assertNotIn("If-None-Match", mock_get.call_args.kwargs["headers"])
+        invalidate(self.cache_key)
+        with patch.object(MemberpressAPIClient, "decode") as mock_decode:
+            self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        mock_decode.assert_not_called()
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_changed_body(self, mock_get):
+        self.api_client.get("test")
+        invalidate(self.cache_key)
+        mock_get.return_value = MockResponse({"foo": "baz"}, 200)
+        self.assertEqual(self.api_client.get("test"), {"foo": "baz"})
+
+    @override_settings(MEMBERPRESS_CONDITIONAL_GET=False)
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_disabled(self, mock_get):
+        self.api_client.get("test")
+        self.assertEqual(get_validated(self.cache_key), ({"foo": "bar"}, {}))
+
+
+class NotFoundResponse(MockResponse):
+    def __init__(self):
+        super().__init__({"code": "not-found"}, 404)
+        self.content = b""
+        self.request = None
+
+    def raise_for_status(self):
+        raise HTTPError("404 Client Error", response=self)
+
+
+class TestNegativeCaching(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.cache_key = self.api_client.cache_key(self.api_client.get_url("members?search=nobody"))
+
+    def test_is_negative(self):
+        for value in (None, [], {}, "", "not json", 0):
+            self.assertTrue(is_negative(value))
+        for value in ([{"username": "jon"}], {"username": "jon"}):
+            self.assertFalse(is_negative(value))
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([], 200))
+    def test_empty_search_result(self, mock_get):
+        self.assertEqual(self.api_client.get("members?search=nobody"), [])
+        self.assertEqual(self.api_client.get("members?search=nobody"), [])
+        self.assertEqual(mock_get.call_count, 1)
+        # negative results live in their own namespace
+        self.assertIsNone(cache.get(self.cache_key))
+        self.assertEqual(get_negative(self.cache_key), {"value": []})
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=NotFoundResponse())
+    def test_not_found(self, mock_get):
+        self.assertIsNone(self.api_client.get("members/12345"))
+        self.assertIsNone(self.api_client.get("members/12345"))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION=0)
+    @patch("memberpress_client.client.requests.Session.get", return_value=NotFoundResponse())
+    def test_disabled(self, mock_get):
+        with self.assertRaises(Exception):
+            self.api_client.get("members/12345")
+        with self.assertRaises(Exception):
+            self.api_client.get("members/12345")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_positive_result_replaces_negative(self, mock_get):
+        mock_get.side_effect = [MockResponse([], 200), MockResponse([{"username": "nobody"}], 200)]
+        self.api_client.get("members?search=nobody")
+        self.api_client.refresh(self.api_client.get_url("members?search=nobody"))
+        self.assertIsNone(get_negative(self.cache_key))
+        self.assertEqual(self.api_client.get("members?search=nobody"), [{"username": "nobody"}])
+        self.assertEqual(mock_get.call_count, 2)
+
+
+@override_settings(
+    MEMBERPRESS_LOCAL_CACHE=True, MEMBERPRESS_LOCAL_CACHE_MAX_ENTRIES=2, MEMBERPRESS_LOCAL_CACHE_MAX_BYTES=10000
+)
+class TestLocalCache(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.api_client = MemberpressAPIClient()
+
+    def test_lru(self):
+        local_cache.set("a", 1)
+        local_cache.set("b", 2)
+        local_cache.get("a")
+        local_cache.set("c", 3)
+        # b was the least recently used
+        self.assertIsNone(local_cache.get("b"))
+        self.assertEqual(local_cache.get("a"), 1)
+        self.assertEqual(local_cache.get("c"), 3)
+
+    def test_size_limit(self):
+        local_cache.set("a", "x" * 6000)
+        local_cache.set("b", "x" * 6000)
+        self.assertIsNone(local_cache.get("a"))
+        local_cache.set("c", "x" * 20000)
+        self.assertIsNone(local_cache.get("c"))
+        self.assertLessEqual(local_cache.stats()["bytes"], 10000)
+
+    @override_settings(MEMBERPRESS_LOCAL_CACHE_TIMEOUT=0.05)
+    def test_expiration(self):
+        local_cache.set("a", 1)
+        time.sleep(0.1)
+        self.assertIsNone(local_cache.get("a"))
+
+    def test_copies(self):
+        local_cache.set("a", {"foo": "bar"})
+        local_cache.get("a")["foo"] = "baz"
+        self.assertEqual(local_cache.get("a"), {"foo": "bar"})
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"username": "jon"}, 200))
+    def test_hit_skips_django_cache(self, mock_get):
+        self.api_client.get("members/1")
+        with patch("memberpress_client.caching.cache.get") as mock_cache_get:
+            self.assertEqual(self.api_client.get("members/1"), {"username": "jon"})
+        mock_cache_get.assert_not_called()
+        self.assertEqual(local_cache.stats()["hits"], 1)
+
+    @patch(
+        "memberpress_client.client.AsyncMemberpressAPIClient.request",
+        new_callable=AsyncMock,
+        return_value=MockResponse({"username": "jon"}, 200),
+    )
+    def test_async_miss_is_counted_once(self, mock_request):
+        asyncio.run(AsyncMemberpressAPIClient().get("members/1"))
+        local_cache.clear()
+        self.assertEqual(asyncio.run(AsyncMemberpressAPIClient().get("members/1")), {"username": "jon"})
+        self.assertEqual(local_cache.stats()["misses"], 1)
+        # the shared hit filled the local tier
+        asyncio.run(AsyncMemberpressAPIClient().get("members/1"))
+        self.assertEqual(local_cache.stats()["hits"], 1)
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([{"username": "jon"}], 200))
+    def test_invalidation_evicts_local_tier(self, mock_get):
+        cache_key = Member.cache_keys(username="jon")["username"]
+        self.api_client.get(MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(username="jon"))
+        self.assertIsNotNone(local_cache.get(cache_key))
+        Member.invalidate_cache(username="jon")
+        self.assertIsNone(local_cache.get(cache_key))
+
+    def test_disabled(self):
+        with override_settings(MEMBERPRESS_LOCAL_CACHE=False):
+            local_cache.set("a", 1)
+        self.assertIsNone(local_cache.get("a"))
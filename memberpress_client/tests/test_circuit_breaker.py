@@ -0,0 +1,117 @@
+# python stuff
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ConnectionError, HTTPError
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import circuit_breaker
+from memberpress_client.caching import invalidate
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.exceptions import CircuitOpenError, MemberpressUpstreamUnavailable, RateLimitExceeded
+from memberpress_client.member import Member
+from memberpress_client.tests.test_client import MockResponse
+from memberpress_client.tests.test_retry import ErrorResponse
+
+
+@override_settings(
+    MEMBERPRESS_RETRY_MAX_ATTEMPTS=1,
+    MEMBERPRESS_CIRCUIT_FAILURE_THRESHOLD=2,
+    MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION=0,
+)
+class TestCircuitBreaker(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.url = self.api_client.get_url("test")
+
+    def test_states(self):
+        self.assertEqual(circuit_breaker.state(self.url), "closed")
+        circuit_breaker.record_failure(self.url)
+        self.assertEqual(circuit_breaker.state(self.url), "closed")
+        circuit_breaker.record_failure(self.url)
+        self.assertEqual(circuit_breaker.state(self.url), "open")
+        self.assertFalse(circuit_breaker.allow_request(self.url))
+
+        # the open period ends
+        cache.delete(circuit_breaker.keys(self.url)["open"])
+        self.assertEqual(circuit_breaker.state(self.url), "half-open")
+        self.assertTrue(circuit_breaker.allow_request(self.url))
+        # only one probe at a time
+        self.assertFalse(circuit_breaker.allow_request(self.url))
+
+        circuit_breaker.record_success(self.url, 0.1)
+        self.assertEqual(circuit_breaker.state(self.url), "closed")
+
+    def test_half_open_probe_failure_reopens(self):
+        circuit_breaker.trip(self.url)
+        cache.delete(circuit_breaker.keys(self.url)["open"])
+        circuit_breaker.record_failure(self.url)
+        self.assertEqual(circuit_breaker.state(self.url), "open")
+
+    def test_half_open_probe_released_when_not_a_failure(self):
+        circuit_breaker.trip(self.url)
+        cache.delete(circuit_breaker.keys(self.url)["open"])
+        with self.assertRaises(HTTPError):
+            with circuit_breaker.guard(self.url):
+                raise _http_error(404)
+        self.assertEqual(circuit_breaker.state(self.url), "half-open")
+        # the next call is let through as the probe
+        self.assertTrue(circuit_breaker.allow_request(self.url))
+
+    @override_settings(MEMBERPRESS_CIRCUIT_SLOW_CALL=1.0)
+    def test_slow_calls(self):
+        circuit_breaker.record_success(self.url, 2.0)
+        circuit_breaker.record_success(self.url, 2.0)
+        self.assertEqual(circuit_breaker.state(self.url), "open")
+
+    def test_is_failure(self):
+        self.assertTrue(circuit_breaker.is_failure(ConnectionError()))
+        self.assertTrue(circuit_breaker.is_failure(_http_error(503)))
+        self.assertTrue(circuit_breaker.is_failure(_http_error(429)))
+        self.assertFalse(circuit_breaker.is_failure(_http_error(404)))
+        self.assertFalse(circuit_breaker.is_failure(ValueError()))
+
+    @patch("memberpress_client.client.requests.Session.get", side_effect=ConnectionError())
+    def test_opens_and_fails_fast(self, mock_get):
+        for _ in range(2):
+            with self.assertRaises(MemberpressUpstreamUnavailable):
+                self.api_client.get("test")
+        with self.assertRaises(CircuitOpenError):
+            self.api_client.get("test")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_serves_last_known_good(self, mock_get):
+        mock_get.return_value = MockResponse({"foo": "bar"}, 200)
+        self.api_client.get("test")
+        invalidate(self.api_client.cache_key(self.url))
+
+        circuit_breaker.trip(self.url)
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_paywall_policy(self, mock_get):
+        circuit_breaker.trip(self.url)
+        member = Member(username="nobody")
+        self.assertTrue(member.upstream_unavailable)
+        self.assertTrue(member.should_raise_paywall)
+        with override_settings(MEMBERPRESS_CIRCUIT_OPEN_POLICY="fail-open"):
+            self.assertFalse(member.should_raise_paywall)
+        self.assertEqual(mock_get.call_count, 0)
+
+    @patch("memberpress_client.member.Member.fetch_member", side_effect=RateLimitExceeded("no token"))
+    def test_paywall_policy_is_only_for_an_open_breaker(self, mock_fetch_member):
+        member = Member(username="nobody")
+        self.assertTrue(member.upstream_unavailable)
+        self.assertTrue(member.should_raise_paywall)
+
+
+def _http_error(status_code):
+    try:
+        ErrorResponse(status_code).raise_for_status()
+    except Exception as e:
+        return e
@@ -1,14 +1,18 @@
+import asyncio
+import json
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from django.core.cache import cache
 
-from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.client import AsyncMemberpressAPIClient, MemberpressAPIClient
 
 class MockResponse:
-    def __init__(self, json_data, status_code):
+    def __init__(self, json_data, status_code, headers=None):
         self.json_data = json_data
         self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(json_data, default=str).encode("utf-8")
 
     def json(self):
         return self.json_data
@@ -22,7 +26,7 @@ class TestClient(TestCase):
     def setUp(self):
         cache.clear()
 
-    @patch("memberpress_client.client.requests.get", return_value=MockResponse({"foo": "bar"}, 200))
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
     def test_response_caching(self, mock_get):
         client = MemberpressAPIClient()
         assert mock_get.call_count == 0
@@ -51,3 +55,39 @@ class TestClient(TestCase):
         client.get("test", params={"param_1": "value_1", "param_2": "value_3"}, enable_caching=False)
         assert mock_get.call_count == 5
         
+
+class TestAsyncClient(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @patch(
+        "memberpress_client.client.AsyncMemberpressAPIClient.request",
+        new_callable=AsyncMock,
+        return_value=MockResponse({"foo": "bar"}, 200),
+    )
+    def test_response_caching(self, mock_request):
+        client = AsyncMemberpressAPIClient()
+        # first call should make a request
+        self.assertEqual(asyncio.run(client.get("test")), {"foo": "bar"})
+        assert mock_request.call_count == 1
+        # second call should retrieve from cache, including cache entries made by the blocking client
+        asyncio.run(client.get("test"))
+        assert mock_request.call_count == 1
+        self.assertEqual(MemberpressAPIClient().get("test"), {"foo": "bar"})
+        # call again with caching disabled should make a request
+        asyncio.run(client.get("test", enable_caching=False))
+        assert mock_request.call_count == 2
+
+    @patch(
+        "memberpress_client.client.AsyncMemberpressAPIClient.request",
+        new_callable=AsyncMock,
+        return_value=MockResponse({"foo": "bar"}, 200),
+    )
+    def test_concurrent_requests(self, mock_request):
+        async def fetch_all():
+            client = AsyncMemberpressAPIClient
+            return await asyncio.gather(*[client().get(f"test/{i}") for i in range(5)])
+
+        self.assertEqual(asyncio.run(fetch_all()), [{"foo": "bar"}] * 5)
+        assert mock_request.call_count == 5
@@ -0,0 +1,69 @@
+# python stuff
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import codec
+from memberpress_client.caching import get_stale
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.tests.test_client import MockResponse
+
+MEMBER = {
+    "id": 1,
+    "username": "jon",
+    "address": {"mepr-address-city": "Seattle"},
+    "recent_transactions": [{"id": n, "amount": "10.00"} for n in range(100)],
+}
+
+
+@override_settings(MEMBERPRESS_CACHE_CODEC="json", MEMBERPRESS_CACHE_COMPRESS_MIN_BYTES=1024)
+class TestCodec(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+
+    def test_round_trip(self):
+        entry = codec.encode(MEMBER)
+        self.assertEqual(entry["codec"], "json")
+        self.assertEqual(entry["compression"], "zlib")
+        self.assertEqual(codec.decode(entry), MEMBER)
+
+        # small values are not compressed
+        entry = codec.encode({"value": None})
+        self.assertIsNone(entry["compression"])
+        self.assertEqual(codec.decode(entry), {"value": None})
+
+    def test_reads_entries_written_with_other_settings(self):
+        self.assertEqual(codec.decode(MEMBER), MEMBER)
+        entry = codec.encode(MEMBER)
+        with override_settings(MEMBERPRESS_CACHE_CODEC="pickle", MEMBERPRESS_CACHE_COMPRESSION=None):
+            self.assertEqual(codec.decode(entry), MEMBER)
+
+    def test_unknown_version_is_a_miss(self):
+        entry = codec.encode(MEMBER)
+        entry[codec.CODEC_MARKER] = codec.CODEC_VERSION + 1
+        self.assertIsNone(codec.decode(entry))
+
+    @override_settings(MEMBERPRESS_CACHE_CODEC="pickle")
+    def test_pickle_is_passthrough(self):
+        self.assertIs(codec.encode(MEMBER), MEMBER)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse(MEMBER, 200))
+    def test_client(self, mock_get):
+        self.assertEqual(self.api_client.get("members/1"), MEMBER)
+        self.assertEqual(self.api_client.get("members/1"), MEMBER)
+        self.assertEqual(mock_get.call_count, 1)
+        cache_key = self.api_client.cache_key(self.api_client.get_url("members/1"))
+        self.assertIn(codec.CODEC_MARKER, cache.get(cache_key))
+        self.assertEqual(get_stale(cache_key), MEMBER)
+
+    @override_settings(MEMBERPRESS_CACHE_MEMBER_EXCLUDE_FIELDS=["address"])
+    def test_project(self):
+        self.assertNotIn("address", codec.project(MEMBER))
+        self.assertNotIn("address", codec.project([MEMBER])[0])
+        self.assertIn("address", MEMBER)
+        # only member dicts are projected
+        self.assertEqual(codec.project({"address": 1}), {"address": 1})
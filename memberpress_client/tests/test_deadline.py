@@ -0,0 +1,82 @@
+# python stuff
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ReadTimeout
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import deadline
+from memberpress_client.caching import acquire_lease
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.constants import MemberPressAPI_Operations
+from memberpress_client.deadline import memberpress_deadline
+from memberpress_client.exceptions import DeadlineExceeded
+from memberpress_client.tests.test_client import MockResponse
+
+
+class TestDeadline(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+
+    def test_remaining(self):
+        self.assertIsNone(deadline.remaining())
+        with memberpress_deadline(10):
+            self.assertAlmostEqual(deadline.remaining(), 10, delta=0.1)
+            # nested deadlines only shorten the budget
+            with memberpress_deadline(20):
+                self.assertLessEqual(deadline.remaining(), 10)
+            with memberpress_deadline(1):
+                self.assertLessEqual(deadline.remaining(), 1)
+        self.assertIsNone(deadline.remaining())
+
+    @override_settings(
+        MEMBERPRESS_HTTP_CONNECT_TIMEOUT=2,
+        MEMBERPRESS_HTTP_READ_TIMEOUT=8,
+        MEMBERPRESS_HTTP_TIMEOUTS={MemberPressAPI_Operations.GET_MEMBER: (1, 4)},
+    )
+    def test_timeouts(self):
+        self.assertEqual(deadline.timeouts(), (2, 8))
+        self.assertEqual(deadline.timeouts(MemberPressAPI_Operations.GET_MEMBER), (1, 4))
+        with memberpress_deadline(3):
+            connect, read = deadline.timeouts()
+            self.assertEqual(connect, 2)
+            self.assertLessEqual(read, 3)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_every_call_has_a_timeout(self, mock_get):
+        self.api_client.get("test")
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], deadline.timeouts())
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_expired_deadline(self, mock_get):
+        with memberpress_deadline(0):
+            with self.assertRaises(DeadlineExceeded):
+                self.api_client.get("test")
+        self.assertEqual(mock_get.call_count, 0)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_timeout_caused_by_deadline(self, mock_get):
+        def get(*args, **kwargs):
+            time.sleep(kwargs["timeout"][1])
+            raise ReadTimeout()
+
+        mock_get.side_effect = get
+        with memberpress_deadline(0.05):
+            # not retried, and not counted against the circuit breaker
+            with self.assertRaises(DeadlineExceeded):
+                self.api_client.get("test")
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_bounds_single_flight_wait(self, mock_get):
+        acquire_lease(self.api_client.cache_key(self.api_client.get_url("test")))
+        start = time.monotonic()
+        with memberpress_deadline(0.1):
+            with self.assertRaises(DeadlineExceeded):
+                self.api_client.get("test")
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(mock_get.call_count, 0)
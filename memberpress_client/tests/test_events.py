@@ -6,10 +6,15 @@ import unittest
 import json
 from datetime import datetime
 
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
 # our testing code starts here
 # -----------------------------------------------------------------------------
+from memberpress_client.caching import unwrap
 from memberpress_client.constants import MemberpressEvents, MemberpressTransactionTypes
 from memberpress_client.events import get_event, MEMBERPRESS_EVENT_CLASSES
+from memberpress_client.member import Member
 from memberpress_client.models import MemberpressEventLog
 
 # setup test data
@@ -169,3 +174,41 @@ class TestMember(unittest.TestCase):
         for file in os.listdir(EVENTS_FOLDER):
             if file.endswith(EXT):
                 persist(event_str=file[:-5])
+
+
+class TestEventCache(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_transaction_event_invalidates_member(self):
+        data_dict = load_json(MemberpressEvents.TRANSACTION_COMPLETED)
+        event = get_event(data_dict)
+        cache_keys = Member.cache_keys(user_id=12, username="Jspu82")
+        for cache_key in cache_keys.values():
+            cache.set(cache_key, {"username": "Jspu82"})
+
+        self.assertTrue(event.update_cache())
+        for cache_key in cache_keys.values():
+            self.assertIsNone(cache.get(cache_key))
+
+    def test_member_event_writes_through(self):
+        data_dict = load_json(MemberpressEvents.MEMBER_ACCOUNT_UPDATED)
+        event = get_event(data_dict)
+
+        self.assertTrue(event.update_cache())
+        cache_keys = Member.cache_keys(user_id=9, username="memberpress_support")
+        self.assertEqual(unwrap(cache.get(cache_keys["user_id"]))[0], data_dict["data"])
+        # username lookups share the member's canonical entry
+        self.assertEqual(cache_keys["username"], cache_keys["user_id"])
+
+    def test_member_deleted_invalidates_member(self):
+        data_dict = load_json(MemberpressEvents.MEMBER_DELETED)
+        event = get_event(data_dict)
+        member = data_dict["data"]
+        cache_keys = Member.cache_keys(user_id=member["id"], username=member["username"])
+        for cache_key in cache_keys.values():
+            cache.set(cache_key, member)
+
+        self.assertTrue(event.update_cache())
+        for cache_key in cache_keys.values():
+            self.assertIsNone(cache.get(cache_key))
@@ -0,0 +1,64 @@
+# python stuff
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import keys
+from memberpress_client.caching import get_negative
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.constants import MemberPressAPI_Endpoints
+from memberpress_client.member import Member
+from memberpress_client.tests.test_client import MockResponse
+
+MEMBER = {"id": 7, "username": "jon"}
+
+
+class TestKeys(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.by_id = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(user_id=7)
+        self.by_username = MemberPressAPI_Endpoints.MEMBERPRESS_API_MEMBER_PATH(username="jon")
+
+    def test_member_lookup(self):
+        self.assertEqual(keys.member_lookup(self.by_id), ("user_id", "7"))
+        self.assertEqual(keys.member_lookup(self.by_username), ("username", "jon"))
+        self.assertEqual(keys.member_lookup(self.by_username, {"page": 2}), (None, None))
+        self.assertEqual(keys.member_lookup(MemberPressAPI_Endpoints.MEMBERPRESS_API_ME_PATH), (None, None))
+
+    def test_long_keys_are_hashed(self):
+        key = keys.url_key("https://example.com/" + "x" * 300)
+        self.assertLessEqual(len(key), keys.MAX_KEY_LENGTH)
+        self.assertTrue(key.startswith(keys.GET_PREFIX))
+        self.assertNotEqual(key, keys.url_key("https://example.com/" + "y" * 300))
+
+    def test_bump_namespace(self):
+        # forget the bumped version once the cache is cleared for the next test
+        self.addCleanup(keys._namespace.update, version=None)
+        key = keys.member_key(7)
+        keys.bump_namespace()
+        self.assertNotEqual(keys.member_key(7), key)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([MEMBER], 200))
+    def test_username_and_user_id_share_an_entry(self, mock_get):
+        self.assertEqual(self.api_client.get(self.by_username), [MEMBER])
+        self.assertEqual(self.api_client.cache_key(self.by_username), self.api_client.cache_key(self.by_id))
+        self.assertEqual(self.api_client.get(self.by_id), MEMBER)
+        self.assertEqual(self.api_client.get(self.by_username), [MEMBER])
+        self.assertEqual(mock_get.call_count, 1)
+
+        Member.invalidate_cache(user_id=7)
+        self.api_client.get(self.by_username)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([], 200))
+    def test_unknown_username(self, mock_get):
+        self.assertEqual(self.api_client.get(self.by_username), [])
+        self.assertEqual(get_negative(keys.url_key(self.by_username)), {"value": []})
+        Member.update_cache(MEMBER)
+        self.assertIsNone(get_negative(keys.url_key(self.by_username)))
+        self.assertEqual(self.api_client.get(self.by_username), [MEMBER])
+        self.assertEqual(mock_get.call_count, 1)
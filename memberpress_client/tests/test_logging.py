@@ -0,0 +1,53 @@
+# python stuff
+import logging
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.decorators import app_logger
+from memberpress_client.tests.test_client import MockResponse
+from memberpress_client.utils import LazyJSON, log_postrip, log_pretrip
+
+
+class TestLogging(SimpleTestCase):
+    def test_lazy_json_is_masked(self):
+        self.assertIn("REDACTED", str(LazyJSON({"password": "secret"})))
+        self.assertNotIn("secret", str(LazyJSON({"password": "secret"})))
+
+    @override_settings(MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH=10)
+    def test_lazy_json_is_capped(self):
+        self.assertIn("characters truncated", str(LazyJSON({"foo": "x" * 100})))
+
+    @patch("memberpress_client.utils.LazyJSON.__str__")
+    @patch("memberpress_client.utils.logger.info")
+    def test_nothing_is_formatted_when_disabled(self, mock_info, mock_str):
+        utils_logger = logging.getLogger("memberpress_client.utils")
+        self.addCleanup(utils_logger.setLevel, utils_logger.level)
+        utils_logger.setLevel(logging.WARNING)
+        log_pretrip(caller="post", url="members", data={"foo": "bar"})
+        log_postrip(caller="post", path="members", response=MockResponse({}, 200))
+        mock_info.assert_not_called()
+        mock_str.assert_not_called()
+
+    def test_structured_records(self):
+        with self.assertLogs("memberpress_client.utils", level=logging.INFO) as logs:
+            log_postrip(caller="get", path="members/1", response=MockResponse({}, 200), operation="get_member")
+        self.assertEqual(logs.records[0].memberpress["status_code"], 200)
+        self.assertEqual(logs.records[0].memberpress["operation"], "get_member")
+
+    @override_settings(MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE=0)
+    def test_payload_sampling(self):
+        with self.assertLogs("memberpress_client.utils", level=logging.INFO) as logs:
+            log_pretrip(caller="post", url="members", data={"foo": "bar"})
+        self.assertNotIn("foo", logs.output[0])
+
+    def test_app_logger(self):
+        @app_logger
+        def view(request, token=None):
+            return "ok"
+
+        with self.assertLogs("memberpress_client.decorators", level=logging.INFO) as logs:
+            self.assertEqual(view("request", token="secret"), "ok")
+        self.assertIn("REDACTED", logs.output[0])
@@ -1,18 +1,22 @@
 # python stuff
+import asyncio
 import os
 import io
 import unittest
 import json
 from datetime import datetime
 from requests import request
+from unittest.mock import AsyncMock, patch
 
+from django.core.cache import cache
 
 # our testing code starts here
 # -----------------------------------------------------------------------------
-from memberpress_client.member import Member  # noqa: E402
+from memberpress_client.member import AsyncMember, Member, iter_members  # noqa: E402
 from memberpress_client.transaction import Transaction  # noqa: E402
 from memberpress_client.subscription import Subscription  # noqa: E402
 from memberpress_client.membership import Membership  # noqa: E402
+from memberpress_client.tests.test_client import MockResponse  # noqa: E402
 
 # setup test data
 HERE = os.path.abspath(os.path.dirname(__file__))
@@ -275,6 +279,74 @@ class TestMember(unittest.TestCase):
         self.assertEqual(type(mbr.custom_profile_fields), list)
         self.assertEqual(mbr.cannot_purchase_message, "You don't have access to purchase this item.")
 
+    @patch("memberpress_client.client.AsyncMemberpressAPIClient.get", new_callable=AsyncMock)
+    def test_offline_7_async_member(self, mock_get):
+        mock_get.return_value = [valid_member_response]
+
+        member = AsyncMember(username="JonSpurling81")
+        # construction does not block on the rest api
+        self.assertEqual(mock_get.call_count, 0)
+        self.assertEqual(member.is_valid, False)
+
+        member = asyncio.run(member.fetch())
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(member.is_valid, True)
+        self.assertEqual(member.id, 8)
+        self.assertEqual(member.username, "JonSpurling81")
+        self.assertEqual(member.is_active_subscription, True)
+
+        async def gather():
+            return await asyncio.gather(AsyncMember(username="JonSpurling81"), AsyncMember(user_id=8))
+
+        members = asyncio.run(gather())
+        self.assertEqual([m.id for m in members], [8, 8])
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_offline_8_bulk(self, mock_get):
+        cache.clear()
+        valid_member_2 = json.loads(load_test_member("valid-member-2.json"), strict=False)[0]
+
+        def get(url, **kwargs):
+            if url.endswith("members?search=JonSpurling81"):
+                return MockResponse([valid_member_response], 200)
+            if url.endswith("members/{id}".format(id=valid_member_2["id"])):
+                return MockResponse(valid_member_2, 200)
+            return MockResponse([], 200)
+
+        mock_get.side_effect = get
+        members = Member.bulk(usernames=["JonSpurling81", "nobody"], user_ids=[valid_member_2["id"]])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(members["JonSpurling81"].id, 8)
+        self.assertEqual(members["JonSpurling81"].is_valid, True)
+        self.assertEqual(members[valid_member_2["id"]].username, valid_member_2["username"])
+        self.assertIsNone(members["nobody"])
+
+        # everything, including the non-member, is now served from one cache.get_many()
+        members = Member.prefetch_many(usernames=["JonSpurling81", "nobody"], user_ids=[valid_member_2["id"]])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(members["JonSpurling81"]["id"], 8)
+        self.assertIsNone(members["nobody"])
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_offline_9_iter_members(self, mock_get):
+        all_members = [{"id": i, "username": "member{i}".format(i=i)} for i in range(1, 26)]
+
+        def get(url, params=None, **kwargs):
+            start = (params["page"] - 1) * params["per_page"]
+            return MockResponse(all_members[start : start + params["per_page"]], 200)
+
+        mock_get.side_effect = get
+        self.assertEqual(list(iter_members(page_size=10, prefetch_pages=2)), all_members)
+        self.assertTrue(all(call.kwargs["params"]["per_page"] == 10 for call in mock_get.call_args_list))
+
+        # stopping early does not walk the remaining pages
+        mock_get.reset_mock()
+        members = iter_members(page_size=5, prefetch_pages=0)
+        self.assertEqual(next(members), all_members[0])
+        members.close()
+        self.assertEqual(mock_get.call_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+# python stuff
+import io
+import json
+import os
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.constants import MemberpressEvents
+from memberpress_client.events import get_event
+from memberpress_client.member import Member
+from memberpress_client.member_status import get_status, update_from_event, upsert_status
+from memberpress_client.models import MemberStatus
+from memberpress_client.tests.test_client import MockResponse
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+
+
+def load_json(*path):
+    with io.open(os.path.join(HERE, "data", *path), "rt", encoding="utf8") as f:
+        return json.loads(f.read(), strict=False)
+
+
+valid_member_response = load_json("api", "valid-member.json")
+
+
+class TestMemberStatus(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_upsert(self):
+        status = upsert_status(Member(response=valid_member_response))
+        self.assertEqual(status.user_id, 8)
+        self.assertEqual(status.username, "JonSpurling81")
+        self.assertTrue(status.is_active_subscription)
+        self.assertFalse(status.should_raise_paywall)
+        self.assertEqual(get_status(user_id=8), status)
+        self.assertEqual(get_status(username="JonSpurling81"), status)
+
+    def test_stale(self):
+        upsert_status(Member(response=valid_member_response))
+        MemberStatus.objects.update(modified=timezone.now() - timedelta(days=2))
+        self.assertIsNone(get_status(user_id=8))
+
+        MemberStatus.objects.update(modified=timezone.now(), expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(get_status(user_id=8))
+
+    def test_member_events(self):
+        event = get_event(load_json("events", MemberpressEvents.MEMBER_ACCOUNT_UPDATED + ".json"))
+        self.assertTrue(update_from_event(event))
+        status = get_status(username="memberpress_support")
+        self.assertEqual(status.user_id, 9)
+        self.assertTrue(status.should_raise_paywall)
+
+        # transaction events only identify the member
+        MemberStatus.objects.create(user_id=12, username="Jspu82", is_active_subscription=True)
+        event = get_event(load_json("events", MemberpressEvents.TRANSACTION_COMPLETED + ".json"))
+        self.assertTrue(update_from_event(event))
+        self.assertFalse(MemberStatus.objects.filter(username="Jspu82").exists())
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_expires_at_is_utc(self):
+        # memberpress dates are utc. the server's time zone must not shift them.
+        expiry = (datetime.now(dt_timezone.utc) + timedelta(days=2)).replace(microsecond=0)
+        response = deepcopy(valid_member_response)
+        response["active_memberships"][0]["expire_fixed"] = expiry.strftime("%Y-%m-%d %H:%M:%S")
+        status = upsert_status(Member(response=response))
+        self.assertEqual(self.as_utc(status.expires_at), expiry)
+        self.assertEqual(get_status(user_id=8), status)
+
+    def test_expires_at_of_subscriptions(self):
+        # trials and recurring subscriptions often have no fixed membership expiry
+        expiry = (datetime.now(dt_timezone.utc) + timedelta(days=7)).replace(microsecond=0)
+        response = deepcopy(valid_member_response)
+        response["active_memberships"][0]["expire_fixed"] = "0000-00-00 00:00:00"
+        response["recent_subscriptions"][0]["expires_at"] = expiry.strftime("%Y-%m-%d %H:%M:%S")
+        status = upsert_status(Member(response=response))
+        self.assertEqual(self.as_utc(status.expires_at), expiry)
+
+    def as_utc(self, value):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value.astimezone(dt_timezone.utc)
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_member_reads_status_store(self, mock_get):
+        MemberStatus.objects.create(user_id=8, username="JonSpurling81", is_active_subscription=True)
+        member = Member(user_id=8, use_status_store=True)
+        self.assertFalse(member.should_raise_paywall)
+        self.assertEqual(mock_get.call_count, 0)
+
+        # any other property falls back to the rest api
+        mock_get.return_value = MockResponse(valid_member_response, 200)
+        self.assertEqual(member.email, valid_member_response["email"])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue(member.is_valid)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse(valid_member_response, 200))
+    def test_member_materializes_status(self, mock_get):
+        member = Member(user_id=8, use_status_store=True)
+        self.assertFalse(member.should_raise_paywall)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue(MemberStatus.objects.filter(user_id=8, is_active_subscription=True).exists())
+
+        # the store is opt-in
+        MemberStatus.objects.all().delete()
+        cache.clear()
+        Member(user_id=8)
+        self.assertFalse(MemberStatus.objects.exists())
@@ -0,0 +1,86 @@
+# python stuff
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import metrics
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.constants import MemberPressAPI_Operations
+from memberpress_client.tests.test_client import MockResponse
+
+OPERATION = MemberPressAPI_Operations.GET_MEMBER
+
+
+@override_settings(MEMBERPRESS_METRICS=True)
+class TestMetrics(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.clear()
+
+    def sample(self, name: str, **labels):
+        for metric in metrics.REGISTRY:
+            for sample_name, sample_labels, value in metric.samples():
+                if sample_name == name and sample_labels == labels:
+                    return value
+        return None
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_client(self, mock_get):
+        api_client = MemberpressAPIClient()
+        api_client.get("test", operation=OPERATION)
+        api_client.get("test", operation=OPERATION)
+        self.assertEqual(self.sample("memberpress_cache_requests_total", operation=OPERATION, result="miss"), 1)
+        self.assertEqual(self.sample("memberpress_cache_requests_total", operation=OPERATION, result="hit"), 1)
+        self.assertEqual(
+            self.sample("memberpress_upstream_requests_total", verb="get", operation=OPERATION, status_code=200), 1
+        )
+        duration = self.sample("memberpress_upstream_request_duration_seconds_count", verb="get", operation=OPERATION)
+        self.assertEqual(duration, 1)
+
+    def test_histogram(self):
+        metrics.webhook("login", True, 0.02)
+        metrics.webhook("login", True, 3.0)
+        labels = {"event": "login"}
+        self.assertEqual(self.sample("memberpress_webhook_duration_seconds_bucket", le="0.01", **labels), 0)
+        self.assertEqual(self.sample("memberpress_webhook_duration_seconds_bucket", le="0.025", **labels), 1)
+        self.assertEqual(self.sample("memberpress_webhook_duration_seconds_bucket", le="+Inf", **labels), 2)
+        self.assertEqual(self.sample("memberpress_webhook_events_total", event="login", processed="true"), 2)
+
+    @override_settings(MEMBERPRESS_METRICS_TOKEN="secret")
+    def test_view(self):
+        metrics.cache_result(OPERATION, "hit")
+        response = metrics.metrics_view(RequestFactory().get("/metrics/", HTTP_AUTHORIZATION="Bearer secret"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        body = response.content.decode("utf-8")
+        self.assertIn("# TYPE memberpress_cache_requests_total counter", body)
+        self.assertIn('memberpress_cache_requests_total{operation="%s",result="hit"} 1' % OPERATION, body)
+
+    @override_settings(MEMBERPRESS_METRICS_TOKEN="secret")
+    def test_view_requires_token(self):
+        request = RequestFactory().get("/metrics/")
+        self.assertEqual(metrics.metrics_view(request).status_code, 403)
+        request = RequestFactory().get("/metrics/", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(metrics.metrics_view(request).status_code, 403)
+
+    @override_settings(MEMBERPRESS_METRICS_TOKEN="")
+    def test_view_without_token_requires_staff(self):
+        request = RequestFactory().get("/metrics/")
+        self.assertEqual(metrics.metrics_view(request).status_code, 403)
+        request.user = AnonymousUser()
+        self.assertEqual(metrics.metrics_view(request).status_code, 403)
+        request.user = get_user_model()(username="staff", is_staff=True, is_active=True)
+        self.assertEqual(metrics.metrics_view(request).status_code, 200)
+
+    def test_escaping(self):
+        self.assertEqual(metrics.format_labels({"event": 'a"b\\c'}), '{event="a\\"b\\\\c"}')
+
+    @override_settings(MEMBERPRESS_METRICS=False)
+    def test_disabled(self):
+        metrics.cache_result(OPERATION, "hit")
+        self.assertIsNone(self.sample("memberpress_cache_requests_total", operation=OPERATION, result="hit"))
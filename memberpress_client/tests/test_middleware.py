@@ -0,0 +1,53 @@
+# python stuff
+import io
+import json
+import os
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.identity_map import identity_map
+from memberpress_client.member import AsyncMember, Member
+from memberpress_client.middleware import MemberIdentityMapMiddleware
+from memberpress_client.tests.test_client import MockResponse
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+
+with io.open(os.path.join(HERE, "data", "api", "valid-member.json"), "rt", encoding="utf8") as f:
+    valid_member_response = json.loads(f.read(), strict=False)
+
+
+@patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([valid_member_response], 200))
+class TestIdentityMap(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_no_identity_map(self, mock_get):
+        self.assertIsNot(Member(username="JonSpurling81"), Member(username="JonSpurling81"))
+
+    def test_middleware(self, mock_get):
+        def view(request):
+            member = Member(username="JonSpurling81")
+            self.assertIs(Member(username="JonSpurling81"), member)
+            self.assertIs(Member("JonSpurling81"), member)
+            # registered under its user id too
+            self.assertIs(Member(user_id=8), member)
+            # members built from a response are never shared
+            self.assertIsNot(Member(response=valid_member_response), member)
+            self.assertIsNot(AsyncMember(username="JonSpurling81"), member)
+            return member
+
+        member = MemberIdentityMapMiddleware(view)(request=None)
+        self.assertEqual(member.is_valid, True)
+        self.assertEqual(mock_get.call_count, 1)
+        # the map is discarded at the end of the request
+        self.assertIsNot(Member(username="JonSpurling81"), member)
+
+    def test_invalidate_cache(self, mock_get):
+        with identity_map():
+            member = Member(username="JonSpurling81")
+            Member.invalidate_cache(user_id=8, username="JonSpurling81")
+            self.assertIsNot(Member(username="JonSpurling81"), member)
@@ -0,0 +1,93 @@
+# python stuff
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import ratelimit
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.deadline import memberpress_deadline
+from memberpress_client.exceptions import RateLimitExceeded
+from memberpress_client.ratelimit import BATCH, INTERACTIVE, memberpress_priority
+from memberpress_client.tests.test_client import MockResponse
+
+
+@override_settings(
+    MEMBERPRESS_RATE_LIMIT=4,
+    MEMBERPRESS_RATE_LIMIT_BURST=4,
+    MEMBERPRESS_RATE_LIMIT_BATCH_SHARE=0.5,
+    MEMBERPRESS_RATE_LIMIT_WAIT=0,
+)
+@patch("memberpress_client.ratelimit.time.time", return_value=1000.5)
+class TestRateLimit(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+        self.url = self.api_client.get_url("test")
+
+    def test_interactive_bucket(self, mock_time):
+        for _ in range(4):
+            self.assertTrue(ratelimit.try_acquire(self.url, INTERACTIVE))
+        self.assertFalse(ratelimit.try_acquire(self.url, INTERACTIVE))
+        self.assertAlmostEqual(ratelimit.reserve(self.url, INTERACTIVE), 0.25)
+
+        # one token is back after 1 / rate seconds
+        mock_time.return_value = 1000.75
+        self.assertTrue(ratelimit.try_acquire(self.url, INTERACTIVE))
+        self.assertFalse(ratelimit.try_acquire(self.url, INTERACTIVE))
+
+    @override_settings(MEMBERPRESS_RATE_LIMIT_BURST=1)
+    def test_no_burst_across_a_second_boundary(self, mock_time):
+        # callers retry as soon as reserve() says they may, from just before a second boundary
+        now = 1000.9
+        starts = []
+        while now < 1004:
+            mock_time.return_value = now
+            delay = ratelimit.reserve(self.url, INTERACTIVE)
+            if delay:
+                now += delay
+            else:
+                starts.append(now)
+                now += 0.01
+        self.assertGreater(len(starts), 8)
+        for start in starts:
+            self.assertLessEqual(len([s for s in starts if start <= s < start + 1 - 1e-9]), 4)
+
+    def test_batch_cannot_starve_interactive(self, mock_time):
+        self.assertTrue(ratelimit.try_acquire(self.url, BATCH))
+        self.assertTrue(ratelimit.try_acquire(self.url, BATCH))
+        self.assertFalse(ratelimit.try_acquire(self.url, BATCH))
+        self.assertTrue(ratelimit.try_acquire(self.url, INTERACTIVE))
+        self.assertTrue(ratelimit.try_acquire(self.url, INTERACTIVE))
+        self.assertFalse(ratelimit.try_acquire(self.url, INTERACTIVE))
+
+    def test_priority(self, mock_time):
+        self.assertEqual(ratelimit.priority(), INTERACTIVE)
+        with memberpress_priority(BATCH):
+            self.assertEqual(ratelimit.priority(), BATCH)
+        self.assertEqual(ratelimit.priority(), INTERACTIVE)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse({"foo": "bar"}, 200))
+    def test_client_is_rate_limited(self, mock_get, mock_time):
+        for path in ["a", "b", "c", "d"]:
+            self.api_client.get(path)
+        with self.assertRaises(RateLimitExceeded):
+            self.api_client.get("e", enable_caching=False)
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("memberpress_client.ratelimit.time.sleep")
+    def test_batch_wait_is_bounded_by_deadline(self, mock_sleep, mock_time):
+        with memberpress_priority(BATCH):
+            ratelimit.acquire(self.url)
+            ratelimit.acquire(self.url)
+            with memberpress_deadline(0.4):
+                with self.assertRaises(RateLimitExceeded):
+                    ratelimit.acquire(self.url)
+        mock_sleep.assert_not_called()
+
+    @override_settings(MEMBERPRESS_RATE_LIMIT=0)
+    def test_disabled(self, mock_time):
+        for _ in range(10):
+            ratelimit.acquire(self.url)
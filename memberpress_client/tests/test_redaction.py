@@ -0,0 +1,39 @@
+# python stuff
+from django.test import SimpleTestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.redaction import REDACTED, TRUNCATED_KEY, redact
+from memberpress_client.utils import masked_dict
+
+
+@override_settings(MEMBERPRESS_SENSITIVE_KEYS=["password", "Authorization"])
+class TestRedaction(SimpleTestCase):
+    def test_nested(self):
+        payload = {
+            "username": "jon",
+            "profile": {"password": "secret", "city": "Seattle"},
+            "members": [{"authorization": "Bearer x"}, {"username": "ann"}],
+        }
+        redacted = redact(payload)
+        self.assertEqual(redacted["profile"], {"password": REDACTED, "city": "Seattle"})
+        self.assertEqual(redacted["members"][0], {"authorization": REDACTED})
+        # the original is untouched
+        self.assertEqual(payload["profile"]["password"], "secret")
+
+    def test_copy_on_write(self):
+        payload = {"profile": {"password": "secret"}, "address": {"city": "Seattle"}}
+        redacted = redact(payload)
+        self.assertIsNot(redacted, payload)
+        self.assertIs(redacted["address"], payload["address"])
+        clean = {"address": {"city": "Seattle"}}
+        self.assertIs(redact(clean), clean)
+
+    @override_settings(MEMBERPRESS_REDACTION_MAX_ITEMS=3)
+    def test_size_cap(self):
+        redacted = redact({"a": 1, "b": 2, "c": 3, "d": {"password": "secret"}, "e": 5})
+        self.assertEqual(redacted, {"a": 1, "b": 2, "c": 3, TRUNCATED_KEY: "2 more keys"})
+
+    def test_masked_dict(self):
+        self.assertEqual(masked_dict(None), {})
+        self.assertEqual(masked_dict([("password", "secret")]), {"password": REDACTED})
@@ -0,0 +1,125 @@
+# python stuff
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import skipIf
+from unittest.mock import patch
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.caching import invalidate
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.exceptions import MemberpressUpstreamUnavailable
+from memberpress_client.member import Member
+from memberpress_client.retry import Retry, retry_after
+from memberpress_client.session import httpx
+from memberpress_client.tests.test_client import MockResponse
+
+
+class ErrorResponse(MockResponse):
+    def __init__(self, status_code, headers=None):
+        super().__init__({}, status_code)
+        self.headers = headers or {}
+        self.content = b""
+        self.request = requests.Request("GET", "https://example.com/").prepare()
+
+    def raise_for_status(self):
+        raise HTTPError("{status_code} Error".format(status_code=self.status_code), response=self)
+
+
+@override_settings(MEMBERPRESS_RETRY_BACKOFF=0, MEMBERPRESS_NEGATIVE_CACHE_EXPIRATION=0)
+class TestRetry(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_client = MemberpressAPIClient()
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after(ErrorResponse(429, {"Retry-After": "3"})), 3.0)
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(retry_after(ErrorResponse(429, {"Retry-After": format_datetime(when)})), 30, delta=2)
+        self.assertIsNone(retry_after(ErrorResponse(429, {"Retry-After": "soon"})))
+        self.assertIsNone(retry_after(ErrorResponse(429)))
+
+    def test_policy(self):
+        retry = Retry("get")
+        self.assertTrue(retry.is_retryable(HTTPError(response=ErrorResponse(503))))
+        self.assertTrue(retry.is_retryable(ConnectionError()))
+        self.assertFalse(retry.is_retryable(HTTPError(response=ErrorResponse(404))))
+
+        # never blindly retry a post
+        retry = Retry("post")
+        self.assertTrue(retry.is_retryable(HTTPError(response=ErrorResponse(429))))
+        self.assertTrue(retry.is_retryable(ConnectTimeout()))
+        self.assertFalse(retry.is_retryable(HTTPError(response=ErrorResponse(503))))
+        self.assertFalse(retry.is_retryable(ConnectionError()))
+
+        with override_settings(MEMBERPRESS_RETRY_POLICY={"post": {"statuses": [429, 503]}}):
+            self.assertTrue(Retry("post").is_retryable(HTTPError(response=ErrorResponse(503))))
+
+    @skipIf(httpx is None, "httpx is not installed")
+    def test_httpx_policy(self):
+        self.assertTrue(Retry("get").is_retryable(httpx.ReadTimeout("timed out")))
+        self.assertTrue(Retry("get").is_retryable(httpx.ConnectError("refused")))
+        self.assertTrue(Retry("post").is_retryable(httpx.ConnectTimeout("timed out")))
+        self.assertFalse(Retry("post").is_retryable(httpx.ReadTimeout("timed out")))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_get_retries(self, mock_get):
+        mock_get.side_effect = [ErrorResponse(503), ConnectionError(), MockResponse({"foo": "bar"}, 200)]
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=ErrorResponse(503))
+    def test_max_attempts(self, mock_get):
+        with self.assertRaises(MemberpressUpstreamUnavailable):
+            self.api_client.get("test")
+        self.assertEqual(mock_get.call_count, 3)
+        # the lease and instance lock were released between attempts
+        self.assertFalse(self.api_client.locked)
+
+    @patch("memberpress_client.decorators.time.sleep")
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_honours_retry_after(self, mock_get, mock_sleep):
+        mock_get.side_effect = [ErrorResponse(429, {"Retry-After": "2"}), MockResponse({"foo": "bar"}, 200)]
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        mock_sleep.assert_called_once_with(2.0)
+
+    @override_settings(MEMBERPRESS_RETRY_DEADLINE=1.0)
+    @patch("memberpress_client.decorators.time.sleep")
+    @patch("memberpress_client.client.requests.Session.get", return_value=ErrorResponse(429, {"Retry-After": "5"}))
+    def test_deadline(self, mock_get, mock_sleep):
+        with self.assertRaises(Exception):
+            self.api_client.get("test")
+        self.assertEqual(mock_get.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_failures_serve_last_known_good(self, mock_get):
+        mock_get.return_value = MockResponse({"foo": "bar"}, 200)
+        self.api_client.get("test")
+        invalidate(self.api_client.cache_key(self.api_client.get_url("test")))
+
+        mock_get.return_value = None
+        mock_get.side_effect = ConnectionError()
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        mock_get.side_effect = None
+        mock_get.return_value = ErrorResponse(503)
+        self.assertEqual(self.api_client.get("test"), {"foo": "bar"})
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("memberpress_client.client.requests.Session.get", side_effect=ConnectionError())
+    def test_member_survives_exhausted_retries(self, mock_get):
+        member = Member(username="nobody")
+        self.assertTrue(member.upstream_unavailable)
+        self.assertTrue(member.should_raise_paywall)
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("memberpress_client.client.requests.Session.post", return_value=ErrorResponse(503))
+    def test_post_is_not_retried(self, mock_post):
+        with self.assertRaises(Exception):
+            self.api_client.post("test", data={"foo": "bar"})
+        self.assertEqual(mock_post.call_count, 1)
@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from memberpress_client.client import MemberpressAPIClient
+from memberpress_client.session import close_sessions, get_session, session_key
+
+
+class TestSession(TestCase):
+    def setUp(self):
+        close_sessions()
+
+    def tearDown(self):
+        close_sessions()
+
+    def test_session_key(self):
+        self.assertEqual(session_key("https://example.com/wp-json/mp/v1/"), "https://example.com")
+        self.assertEqual(session_key("https://example.com:8443/"), "https://example.com:8443")
+
+    def test_session_is_shared_per_host(self):
+        session = get_session("https://example.com/")
+        self.assertIs(get_session("https://example.com/wp-json/mp/v1/members/1"), session)
+        self.assertIsNot(get_session("https://other.example.com/"), session)
+
+    def test_clients_share_session(self):
+        client_1 = MemberpressAPIClient()
+        client_2 = MemberpressAPIClient()
+        self.assertIs(client_1.get_session(), client_2.get_session())
+
+    def test_pool_settings(self):
+        adapter = get_session("https://example.com/").get_adapter("https://example.com/")
+        self.assertEqual(adapter._pool_maxsize, 10)
+        self.assertEqual(adapter.max_retries.total, 0)
@@ -0,0 +1,84 @@
+# python stuff
+import io
+import json
+import os
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client import username_index
+from memberpress_client.constants import MemberpressEvents
+from memberpress_client.events import get_event
+from memberpress_client.member import Member
+from memberpress_client.models import UsernameIndex
+from memberpress_client.tests.test_client import MockResponse
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+
+
+def load_json(*path):
+    with io.open(os.path.join(HERE, "data", *path), "rt", encoding="utf8") as f:
+        return json.loads(f.read(), strict=False)
+
+
+valid_member_response = load_json("api", "valid-member.json")
+
+
+@override_settings(MEMBERPRESS_USERNAME_INDEX=True)
+class TestUsernameIndex(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_remember(self):
+        username_index.remember("jon", 7)
+        self.assertEqual(username_index.get_user_id("jon"), 7)
+
+        # the index outlives the cache
+        cache.clear()
+        self.assertEqual(username_index.get_user_id("jon"), 7)
+
+        # renamed
+        username_index.remember("jonathan", 7)
+        self.assertFalse(UsernameIndex.objects.filter(username="jon").exists())
+        self.assertEqual(username_index.get_user_ids(["jon", "jonathan"]), {"jonathan": 7})
+
+    def test_remember_many(self):
+        username_index.remember_many([{"id": 7, "username": "jon"}, {"id": 8, "username": "ann"}, {"foo": "bar"}])
+        cache.clear()
+        self.assertEqual(username_index.get_user_ids(["jon", "ann"]), {"jon": 7, "ann": 8})
+
+    def test_member_events(self):
+        event = get_event(load_json("events", MemberpressEvents.MEMBER_ACCOUNT_UPDATED + ".json"))
+        self.assertTrue(event.update_username_index())
+        self.assertEqual(username_index.get_user_id("memberpress_support"), 9)
+
+        event = get_event(load_json("events", MemberpressEvents.MEMBER_DELETED + ".json"))
+        self.assertTrue(event.update_username_index())
+        self.assertIsNone(username_index.get_user_id(event.member.username))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_member_uses_user_id(self, mock_get):
+        mock_get.return_value = MockResponse([valid_member_response], 200)
+        Member(username="JonSpurling81", use_status_store=False)
+        self.assertIn("search=JonSpurling81", mock_get.call_args.args[0])
+        self.assertEqual(username_index.get_user_id("JonSpurling81"), 8)
+
+        cache.clear()
+        mock_get.return_value = MockResponse(valid_member_response, 200)
+        member = Member(username="JonSpurling81", use_status_store=False)
+        self.assertTrue(member.is_valid)
+        self.assertTrue(mock_get.call_args.args[0].endswith("members/8"))
+
+    @patch("memberpress_client.client.requests.Session.get")
+    def test_renamed_member(self, mock_get):
+        username_index.remember("JonSpurling81", 99)
+        mock_get.side_effect = [
+            MockResponse(dict(valid_member_response, id=99, username="someone-else"), 200),
+            MockResponse([valid_member_response], 200),
+        ]
+        member = Member(username="JonSpurling81", use_status_store=False)
+        self.assertEqual(member.id, 8)
+        self.assertEqual(username_index.get_user_id("JonSpurling81"), 8)
@@ -0,0 +1,56 @@
+# python stuff
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+# our testing code starts here
+# -----------------------------------------------------------------------------
+from memberpress_client.member import Member
+from memberpress_client.tests.test_client import MockResponse
+
+MEMBER = {"id": 7, "username": "jon"}
+
+
+class TestWarmCache(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def warm(self, *args) -> str:
+        stdout = io.StringIO()
+        call_command("memberpress_warm_cache", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([MEMBER], 200))
+    def test_users(self, mock_get):
+        get_user_model().objects.create(username="jon")
+        self.assertIn("warmed 1 members, 0 not found", self.warm("--source", "users"))
+        self.assertEqual(mock_get.call_count, 1)
+
+        # already cached
+        self.warm("--source", "users")
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse(MEMBER, 200))
+    def test_csv(self, mock_get):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("user_id\n7\n")
+        self.addCleanup(os.remove, f.name)
+        self.assertIn("warmed 1 members", self.warm("--source", "csv", "--csv", f.name))
+        self.assertTrue(mock_get.call_args.args[0].endswith("members/7"))
+
+        with self.assertRaises(CommandError):
+            self.warm("--source", "csv")
+
+    @patch("memberpress_client.client.requests.Session.get", return_value=MockResponse([MEMBER], 200))
+    def test_members(self, mock_get):
+        # without prefetching, a single short page is the only request
+        self.assertIn("warmed 1 members", self.warm("--source", "members", "--prefetch-pages", "0"))
+        self.assertEqual(Member.prefetch_many(user_ids=[7]), {7: MEMBER})
+        self.assertEqual(mock_get.call_count, 1)
@@ -14,6 +14,14 @@ urlpatterns = [
     path("api/v1/", include("memberpress_client.api.v1.urls")),
 ]
 
+if getattr(settings, "MEMBERPRESS_METRICS", False):
+    # Prometheus text exposition format, for scraping
+    from memberpress_client.metrics import metrics_view
+
+    urlpatterns += [
+        path("metrics/", metrics_view, name="metrics"),
+    ]
+
 if settings.DEBUG:
     # only used for local development.
     from django.contrib import admin
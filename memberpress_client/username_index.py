@@ -0,0 +1,127 @@
+"""
+Lawrence McDaniel - https://lawrencemcdaniel.com
+Oct-2022
+
+memberpress REST API Client plugin for Django - username index.
+
+members?search={username} is a slow, fuzzy search that can return several
+members. Once a username's Wordpress user id is known, Member looks it up with
+the exact members/{id} endpoint instead.
+
+The mapping lives in the cache, as the username aliases of keys.py, and with
+MEMBERPRESS_USERNAME_INDEX enabled also in the UsernameIndex table, so that it
+survives cache evictions and restarts. It is learned from search lookups made
+by Member, from member webhook events and from iter_members() bulk syncs.
+"""
+# python stuff
+import logging
+
+# django stuff
+from django.conf import settings
+from django.db import transaction
+
+# our stuff
+from memberpress_client import codec, keys
+from memberpress_client.constants import MemberpressEvents
+from memberpress_client.models import UsernameIndex
+
+logger = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return getattr(settings, "MEMBERPRESS_USERNAME_INDEX", False)
+
+
+def get_user_id(username: str):
+    """
+    the Wordpress user id of username, or None if it is not known.
+    """
+    if not username:
+        return None
+    user_id = keys.get_alias(username)
+    if user_id or not enabled():
+        return user_id
+
+    user_id = UsernameIndex.objects.filter(username=username).values_list("user_id", flat=True).first()
+    if user_id:
+        keys.set_alias(username, user_id)
+    return user_id
+
+
+def get_user_ids(usernames) -> dict:
+    """
+    get_user_id() for many usernames, with one cache and at most one database round trip.
+    """
+    retval = keys.get_aliases(usernames)
+    missing = [username for username in usernames if not retval.get(username)]
+    if missing and enabled():
+        for username, user_id in UsernameIndex.objects.filter(username__in=missing).values_list("username", "user_id"):
+            keys.set_alias(username, user_id)
+            retval[username] = user_id
+    return {username: user_id for username, user_id in retval.items() if user_id}
+
+
+def remember(username: str, user_id) -> None:
+    """
+    record that username is user_id, replacing any earlier username of user_id.
+    """
+    if not (username and user_id):
+        return
+    user_id = int(user_id)
+    keys.set_alias(username, user_id)
+    if not enabled():
+        return
+
+    with transaction.atomic():
+        # the member's username changed, or the username now belongs to someone else
+        previous = UsernameIndex.objects.filter(user_id=user_id).exclude(username=username)
+        for old_username in previous.values_list("username", flat=True):
+            keys.delete_alias(old_username)
+        previous.delete()
+        UsernameIndex.objects.update_or_create(username=username, defaults={"user_id": user_id})
+
+
+def remember_many(members) -> None:
+    """
+    remember() every member dict of a bulk sync, for example a page of iter_members().
+    """
+    members = {member["username"]: int(member["id"]) for member in members if codec.is_member_dict(member)}
+    if not members:
+        return
+    for username, user_id in members.items():
+        keys.set_alias(username, user_id)
+    if not enabled():
+        return
+
+    known = dict(UsernameIndex.objects.filter(username__in=list(members)).values_list("username", "user_id"))
+    changed = {username: user_id for username, user_id in members.items() if known.get(username) != user_id}
+    for username, user_id in changed.items():
+        remember(username, user_id)
+
+
+def forget(user_id=None, username=None) -> None:
+    if username:
+        keys.delete_alias(username)
+    if not enabled():
+        return
+    if user_id:
+        UsernameIndex.objects.filter(user_id=user_id).delete()
+    if username:
+        UsernameIndex.objects.filter(username=username).delete()
+
+
+def update_from_event(event) -> bool:
+    """
+    apply a webhook event to the index. returns True if the index was touched.
+    """
+    if not event.is_valid or not event.has_member:
+        return False
+
+    member = event.member
+    if event.event == MemberpressEvents.MEMBER_DELETED:
+        forget(user_id=member.id, username=member.username)
+        return True
+    if member.id and member.username:
+        remember(member.username, member.id)
+        return True
+    return False
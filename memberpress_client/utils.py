@@ -3,10 +3,18 @@ Lawrence McDaniel - https://lawrencemcdaniel.com
 Oct-2022
 
 memberpress REST API Client plugin for Django - utility and helper functions.
+
+request logging is lazy: nothing is formatted unless a handler will emit the
+record, and payloads are only serialized when the record is actually written.
+request and response summaries carry their fields as a "memberpress" dict in
+the record's extra, for structured log handlers. Request payloads are logged
+for a MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE share of requests and are cut at
+MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH characters.
 """
 # python stuff
 import json
 import logging
+import random
 import pytz
 from unittest.mock import MagicMock
 from requests import Response
@@ -18,6 +26,7 @@ from django.core.exceptions import ObjectDoesNotExist
 
 
 # our  stuff
+from memberpress_client.redaction import redact
 
 UTC = pytz.UTC
 logger = logging.getLogger(__name__)
@@ -45,18 +54,10 @@ def masked_dict(obj) -> dict:
             "terms_of_service": true
         }
 
+    nested dicts and lists are masked too, see redaction.py. The result shares
+    whatever did not need masking with obj, so treat it as read-only.
     """
-
-    def redact(key: str, obj):
-        if key in obj:
-            obj[key] = "*** -- REDACTED -- ***"
-        return obj
-
-    obj = obj or {}
-    obj = dict(obj)
-    for key in settings.MEMBERPRESS_SENSITIVE_KEYS:
-        obj = redact(key, obj)
-    return obj
+    return redact(dict(obj or {}) if type(obj) != dict else obj)
 
 
 class MPJSONEncoder(json.JSONEncoder):
@@ -87,14 +88,54 @@ def get_user(username):
         logger.warning("could not find a User object for username {username}".format(username=username))
 
 
+def payload_sample_rate() -> float:
+    return getattr(settings, "MEMBERPRESS_LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+
+
+def payload_max_length() -> int:
+    return getattr(settings, "MEMBERPRESS_LOG_PAYLOAD_MAX_LENGTH", 4096)
+
+
+class LazyJSON:
+    """
+    a log record argument that serializes obj, as size-capped indented json,
+    only when the record is formatted. mask=True redacts sensitive keys first.
+    """
+
+    __slots__ = ("obj", "mask")
+
+    def __init__(self, obj, mask: bool = True):
+        self.obj = obj
+        self.mask = mask
+
+    def __str__(self) -> str:
+        obj = redact(self.obj) if self.mask else self.obj
+        try:
+            text = json.dumps(obj, cls=MPJSONEncoder, indent=4)
+        except (TypeError, ValueError):
+            # TypeError: cannot convert dictionary update sequence element #0 to a sequence
+            # This happens occasionally. Appears to be a malformed dict in the response body.
+            text = repr(obj)
+        max_length = payload_max_length()
+        if max_length and len(text) > max_length:
+            text = "{text}... ({truncated} characters truncated)".format(
+                text=text[:max_length], truncated=len(text) - max_length
+            )
+        return text
+
+
 def log_trace(caller: str, path: str, data: dict) -> None:
     """
     add an application log entry for higher level defs that call the edxapp api.
     """
+    if not logger.isEnabledFor(logging.INFO):
+        return
     logger.info(
-        "memberpress_client.client.Client.{caller}() request: path={path}, data={data}".format(
-            caller=caller, path=path, data=json.dumps(masked_dict(data), cls=MPJSONEncoder, indent=4)
-        )
+        "memberpress_client.client.Client.%s() request: path=%s, data=%s",
+        caller,
+        path,
+        LazyJSON(data),
+        extra={"memberpress": {"caller": caller, "path": path}},
     )
 
 
@@ -102,14 +143,20 @@ def log_pretrip(caller: str, url: str, data: dict, operation: str = "") -> None:
     """
     add an application log entry immediately prior to calling the edxapp api.
     """
-    logger.info(
-        "memberpress_client.client.Client.{caller}() {operation}, request: url={url}, data={data}".format(
-            operation=operation,
-            caller=caller,
-            url=url,
-            data=json.dumps(masked_dict(data), cls=MPJSONEncoder, indent=4),
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    extra = {"memberpress": {"caller": caller, "operation": operation, "url": url}}
+    if data and random.random() < payload_sample_rate():
+        logger.info(
+            "memberpress_client.client.Client.%s() %s, request: url=%s, data=%s",
+            caller,
+            operation,
+            url,
+            LazyJSON(data),
+            extra=extra,
         )
-    )
+        return
+    logger.info("memberpress_client.client.Client.%s() %s, request: url=%s", caller, operation, url, extra=extra)
 
 
 def log_postrip(caller: str, path: str, response: Response, operation: str = "") -> None:
@@ -117,22 +164,25 @@ def log_postrip(caller: str, path: str, response: Response, operation: str = "")
     log the api response immediately after calling the edxapp api.
     """
     status_code = response.status_code if response is not None else 599
-    log_message = "memberpress_client.client.Client.{caller}() {operation}, response status_code={response_status_code}, path={path}".format(
-        operation=operation, caller=caller, path=path, response_status_code=status_code
-    )
+    extra = {"memberpress": {"caller": caller, "operation": operation, "path": path, "status_code": status_code}}
     if 200 <= status_code <= 399:
-        logger.info(log_message)
-    else:
-        try:
-            response_content = (
-                json.dumps(response.content, cls=MPJSONEncoder, indent=4)
-                if response is not None
-                else "No response object."
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "memberpress_client.client.Client.%s() %s, response status_code=%s, path=%s",
+                caller,
+                operation,
+                status_code,
+                path,
+                extra=extra,
             )
-            log_message += ", response_content={response_content}".format(response_content=response_content)
-        except TypeError:
-            # TypeError: cannot convert dictionary update sequence element #0 to a sequence
-            # This happens occasionally. Appears to be a malformed dict in the response body.
-            pass
-
-        logger.error(log_message)
+        return
+
+    logger.error(
+        "memberpress_client.client.Client.%s() %s, response status_code=%s, path=%s, response_content=%s",
+        caller,
+        operation,
+        status_code,
+        path,
+        LazyJSON(response.content, mask=False) if response is not None else "No response object.",
+        extra=extra,
+    )